@@ -0,0 +1,110 @@
+# agent_pool.py
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from phi.agent import Agent
+from phi.model.openai import OpenAIChat
+
+from model_config import needs_escalation
+from tracing import set_attribute
+
+# Idle agents kept per specialist; more are built when that many runs overlap
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", os.getenv("TEAM_CHAT_WORKERS", "4")))
+
+
+def reset_agent(agent: Agent):
+    """
+    Give a reused agent a new session: empty memory, new session_id, no run state.
+    """
+    agent.new_session()
+    agent.session_state = {}
+    agent.run_id = None
+    agent.run_input = None
+    agent.images = agent.videos = agent.audio = None
+
+
+class AgentPool:
+    """
+    Pre-built phi Agents for one specialist, handed out one run at a time.
+
+    Building an agent is not free (JiraTools logs in to Jira), but a phi Agent
+    keeps its conversation in `memory` under its `session_id`, so one instance
+    must never serve two runs at once or carry history from one user to the
+    next. Each checkout takes an idle agent, or builds one when all are busy,
+    and resets it to a fresh session; at most `size` idle agents are kept.
+
+    With `escalate_to` set, a run() whose answer fails the confidence check
+    in model_config is run again, in a fresh session, on that model.
+    """
+
+    def __init__(self, factory: Callable[[], Agent], size: int = AGENT_POOL_SIZE, name: str = "agents",
+                 escalate_to: Optional[str] = None):
+        self.factory = factory
+        self.size = size
+        self.name = name
+        self.escalate_to = escalate_to
+        self._idle: List[Agent] = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.escalated = 0
+
+    def _build(self) -> Agent:
+        agent = self.factory()
+        with self._lock:
+            self.created += 1
+        return agent
+
+    def prewarm(self, count: int = 1):
+        """
+        Build agents ahead of the first request, up to the pool size.
+        """
+        agents = [self._build() for _ in range(max(0, min(count, self.size) - len(self._idle)))]
+        with self._lock:
+            self._idle.extend(agents)
+
+    @contextmanager
+    def agent(self):
+        with self._lock:
+            agent = self._idle.pop() if self._idle else None
+            if agent is not None:
+                self.reused += 1
+        if agent is None:
+            agent = self._build()
+        reset_agent(agent)
+        try:
+            yield agent
+        finally:
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(agent)
+
+    def run(self, message: str, **kwargs):
+        """
+        Run `message` on a pooled agent and return the RunResponse (non-streaming only).
+        """
+        kwargs = {**kwargs, "stream": False}
+        with self.agent() as agent:
+            response = agent.run(message, **kwargs)
+            if self.escalate_to is None or not needs_escalation(str(response.content or "")):
+                return response
+
+            print(f"Escalating {self.name} answer from {agent.model.id} to {self.escalate_to}")
+            with self._lock:
+                self.escalated += 1
+            set_attribute(escalated_to=self.escalate_to)
+            model = agent.model
+            reset_agent(agent)
+            agent.model = OpenAIChat(id=self.escalate_to)
+            try:
+                return agent.run(message, **kwargs)
+            finally:
+                agent.model = model
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"idle": len(self._idle), "created": self.created, "reused": self.reused,
+                    "escalated": self.escalated}
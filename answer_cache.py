@@ -0,0 +1,367 @@
+# answer_cache.py
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from knowledge_snapshot import current_path
+
+# Knowledge sources backed by an ingested export (the Arrow snapshot, or the
+# CSV before the first snapshot); cached answers that used them are dropped
+# as soon as it is re-written by a sync.
+SOURCE_FILES = {
+    "notion": "notion_pages.csv",
+    "confluence": "knoccs_confluence_chunks.csv",
+}
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Lowercase, collapse whitespace and drop trailing punctuation so trivially
+    different phrasings of the same question share a cache entry.
+    """
+    text = re.sub(r"\s+", " ", prompt.strip().lower())
+    return text.rstrip(" ?!.")
+
+
+def source_fingerprint(source: str) -> str:
+    """
+    Identify the current version of a source's ingested file by mtime and size.
+    """
+    try:
+        stat = os.stat(current_path(SOURCE_FILES[source]))
+    except OSError:
+        return "missing"
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+# Prompt embeddings computed by a missed lookup, kept for the store that usually follows
+PENDING_EMBEDDINGS = 256
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _decode_embedding(value) -> Optional[np.ndarray]:
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        return np.frombuffer(value, dtype=np.float32)
+    # rows written before embeddings were stored as float32 blobs
+    return _unit(json.loads(value))
+
+
+@dataclass
+class CacheEntry:
+    value: dict
+    expires_at: float
+    sources: Dict[str, str] = field(default_factory=dict)
+    # Unit-length float32 prompt embedding, for similarity lookups
+    embedding: Optional[np.ndarray] = None
+
+    @property
+    def size(self) -> int:
+        return len(json.dumps(self.value, default=str)) + (self.embedding.nbytes if self.embedding is not None else 0)
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU store with per-entry expiry, bounded by an approximate byte size.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+    def items(self) -> List[Tuple[str, CacheEntry]]:
+        now = time.time()
+        with self._lock:
+            return [(k, e) for k, e in self._entries.items() if e.expires_at > now]
+
+    def embeddings(self, namespace: str) -> List[Tuple[str, np.ndarray]]:
+        """
+        (key, embedding) of the live entries in `namespace` that have an embedding.
+        """
+        now, prefix = time.time(), f"{namespace}:"
+        with self._lock:
+            return [(k, e.embedding) for k, e in self._entries.items()
+                    if e.embedding is not None and e.expires_at > now and k.startswith(prefix)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _pop(self, key: str):
+        self._bytes -= self._entries.pop(key).size
+
+
+class SQLiteCacheBackend:
+    """
+    SQLite-backed store so several uvicorn workers share one cache.
+    LRU order is kept through a last-access timestamp.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answer_cache ("
+                " key TEXT PRIMARY KEY, value TEXT, sources TEXT, embedding TEXT,"
+                " expires_at REAL, last_access REAL, size INTEGER)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def _entry(row) -> CacheEntry:
+        value, sources, embedding, expires_at = row
+        return CacheEntry(json.loads(value), expires_at, json.loads(sources), _decode_embedding(embedding))
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, sources, embedding, expires_at FROM answer_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[3] <= now:
+                conn.execute("DELETE FROM answer_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE answer_cache SET last_access = ? WHERE key = ?", (now, key))
+            return self._entry(row)
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answer_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(entry.value), json.dumps(entry.sources),
+                 entry.embedding.astype(np.float32).tobytes() if entry.embedding is not None else None,
+                 entry.expires_at, time.time(), entry.size),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM answer_cache").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = conn.execute(
+                    "SELECT key, size FROM answer_cache WHERE key != ? ORDER BY last_access LIMIT 1", (key,)
+                ).fetchone()
+                if oldest is None:
+                    break
+                conn.execute("DELETE FROM answer_cache WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+
+    def delete(self, key: str):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM answer_cache WHERE key = ?", (key,))
+
+    def items(self) -> List[Tuple[str, CacheEntry]]:
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, value, sources, embedding, expires_at FROM answer_cache WHERE expires_at > ?",
+                (time.time(),),
+            ).fetchall()
+        return [(row[0], self._entry(row[1:])) for row in rows]
+
+    def embeddings(self, namespace: str) -> List[Tuple[str, np.ndarray]]:
+        """
+        (key, embedding) of the live entries in `namespace` that have an
+        embedding. Keys start with "<namespace>:", so the primary key index
+        limits the scan to the namespace (";" sorts right after ":").
+        """
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, embedding FROM answer_cache"
+                " WHERE key >= ? AND key < ? AND embedding IS NOT NULL AND expires_at > ?",
+                (f"{namespace}:", f"{namespace};", time.time()),
+            ).fetchall()
+        return [(key, _decode_embedding(embedding)) for key, embedding in rows]
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM answer_cache")
+
+
+class AnswerCache:
+    """
+    Response cache in front of the chat endpoints.
+
+    Lookups first try an exact match on the normalized prompt, then (if an
+    embedding function and threshold are configured) the most similar cached
+    prompt in the same namespace, scored with one matrix product over that
+    namespace's embeddings. Entries expire after `ttl` seconds and are
+    discarded once any knowledge source they depended on has been re-ingested.
+    """
+
+    def __init__(self, backend, ttl: float, embed_fn: Callable[[str], List[float]] = None, similarity_threshold: float = None):
+        self.backend = backend
+        self.ttl = ttl
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        self._pending: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._pending_lock = threading.Lock()
+
+    @staticmethod
+    def _key(namespace: str, prompt: str) -> str:
+        return f"{namespace}:{normalize_prompt(prompt)}"
+
+    @staticmethod
+    def _is_current(entry: CacheEntry) -> bool:
+        return all(source_fingerprint(source) == fp for source, fp in entry.sources.items())
+
+    @property
+    def semantic(self) -> bool:
+        return self.embed_fn is not None and self.similarity_threshold is not None
+
+    def lookup(self, namespace: str, prompt: str) -> Tuple[Optional[dict], str]:
+        """
+        Return (cached_value, "hit") or (None, "miss").
+        """
+        key = self._key(namespace, prompt)
+        entry = self.backend.get(key)
+        if entry is not None and not self._is_current(entry):
+            self.backend.delete(key)
+            entry = None
+
+        if entry is None and self.semantic:
+            embedding = self._embed(prompt)
+            if embedding is not None:
+                entry = self._similar_entry(namespace, embedding)
+                if entry is None:
+                    self._keep_embedding(key, embedding)
+
+        if entry is None:
+            self.misses += 1
+            return None, "miss"
+        self.hits += 1
+        return entry.value, "hit"
+
+    def _embed(self, prompt: str) -> Optional[np.ndarray]:
+        try:
+            return _unit(self.embed_fn(normalize_prompt(prompt)))
+        except Exception as ex:
+            print(f"Answer cache embedding failed: {ex}")
+            return None
+
+    def _keep_embedding(self, key: str, embedding: np.ndarray):
+        # so store() after this miss does not embed the same prompt again
+        with self._pending_lock:
+            self._pending[key] = embedding
+            self._pending.move_to_end(key)
+            while len(self._pending) > PENDING_EMBEDDINGS:
+                self._pending.popitem(last=False)
+
+    def _similar_entry(self, namespace: str, embedding: np.ndarray) -> Optional[CacheEntry]:
+        candidates = [(key, vector) for key, vector in self.backend.embeddings(namespace) if vector.shape == embedding.shape]
+        if not candidates:
+            return None
+        scores = np.vstack([vector for _, vector in candidates]) @ embedding
+        for i in np.argsort(-scores):
+            if scores[i] < self.similarity_threshold:
+                break
+            entry = self.backend.get(candidates[i][0])
+            if entry is not None and self._is_current(entry):
+                return entry
+        return None
+
+    def store(self, namespace: str, prompt: str, value: dict, sources=()):
+        """
+        Cache `value` for `prompt`, recording the current version of every
+        knowledge source the answer was built from.
+        """
+        key = self._key(namespace, prompt)
+        embedding = None
+        if self.semantic:
+            with self._pending_lock:
+                embedding = self._pending.pop(key, None)
+            if embedding is None:
+                embedding = self._embed(prompt)
+        entry = CacheEntry(
+            value=value,
+            expires_at=time.time() + self.ttl,
+            sources={source: source_fingerprint(source) for source in sources},
+            embedding=embedding,
+        )
+        self.backend.set(key, entry)
+
+    def invalidate_source(self, source: str):
+        """
+        Drop every entry built from `source`, e.g. right after it was re-ingested.
+        """
+        for key, entry in self.backend.items():
+            if source in entry.sources:
+                self.backend.delete(key)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+def make_answer_cache_from_env() -> Optional[AnswerCache]:
+    """
+    Build the answer cache from ANSWER_CACHE_* settings, or None when disabled.
+    """
+    backend_name = os.getenv("ANSWER_CACHE_BACKEND", "memory").lower()
+    if backend_name in ("", "off", "none"):
+        return None
+
+    max_bytes = int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    if backend_name == "sqlite":
+        backend = SQLiteCacheBackend(os.getenv("ANSWER_CACHE_PATH", "answer_cache.sqlite3"), max_bytes)
+    else:
+        backend = MemoryCacheBackend(max_bytes)
+
+    embed_fn, threshold = None, os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD")
+    if threshold:
+        from phi.embedder.openai import OpenAIEmbedder
+        embed_fn = OpenAIEmbedder().get_embedding
+
+    return AnswerCache(
+        backend,
+        ttl=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "900")),
+        embed_fn=embed_fn,
+        similarity_threshold=float(threshold) if threshold else None,
+    )
@@ -313,59 +313,75 @@ def display_sources(sources):
             </div>
             """, unsafe_allow_html=True)
 
-def send_team_query(prompt):
-    """Send query to team_chat endpoint"""
-    try:
-        with st.spinner("🤖 Team agents are collaborating..."):
-            response = requests.post(
-                f"{FASTAPI_URL}/team_chat",
-                json={"message": prompt},
-                timeout=300  # Increased to 5 minutes
-            )
-            
-            if response.status_code == 200:
-                response_data = response.json()
-                ai_response = response_data.get("responses", {}).get("team", "No response generated")
-                
-                
-                return ai_response
-            else:
-                return f"Error: {response.status_code} - {response.text}", []
-                
-    except requests.exceptions.Timeout:
-        return "⏰ Request timed out. The agents are taking longer than expected. Please try a simpler query or try again.", []
-    except requests.exceptions.ConnectionError:
-        return "🔌 Connection error. Please ensure the FastAPI server is running on localhost:8080", []
-    except requests.exceptions.RequestException as e:
-        return f"❌ Request error: {str(e)}", []
+def iter_sse(response):
+    """Yield (event, data) pairs from a server-sent event response"""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+def describe_event(event, data):
+    """Short status line for tool and specialist events"""
+    if event == "specialist_start":
+        return f"🔎 Asking the {data['specialist']} specialist..."
+    if event == "specialist_done":
+        return f"✅ {data['specialist']} specialist {data['status']} in {data['seconds']:.1f}s"
+    if event == "handoff":
+        return f"🤝 Handing off to {data['specialist'].replace('_', ' ')}..."
+    if event == "tool_start":
+        return f"🔧 Calling {data['tool']}..."
+    return ""
 
-def send_mcp_query(prompt):
-    """Send query to chat endpoint"""
+def stream_query(endpoint, prompt):
+    """Stream a query from an SSE endpoint, rendering tokens as they arrive"""
+    activity = st.empty()
+    placeholder = st.empty()
+    answer = ""
     try:
-        with st.spinner("⚡ MCP agents are processing..."):
-            response = requests.post(
-                f"{FASTAPI_URL}/chat",
-                json={"message": prompt},
-                timeout=300  # Increased to 5 minutes
-            )
-            
-            if response.status_code == 200:
-                response_data = response.json()
-                ai_response = response_data.get("response", "No response generated")
-                return ai_response, []
-            else:
-                return f"Error: {response.status_code} - {response.text}", []
-                
+        with requests.post(
+            f"{FASTAPI_URL}{endpoint}",
+            json={"message": prompt},
+            stream=True,
+            timeout=(10, 300)  # connect timeout, max wait between events
+        ) as response:
+            if response.status_code != 200:
+                return f"Error: {response.status_code} - {response.text}"
+
+            for event, data in iter_sse(response):
+                if event == "token":
+                    answer += data.get("text", "")
+                    placeholder.markdown(answer + "▌")
+                elif event == "error":
+                    answer += f"\n\n❌ {data.get('detail', 'Unknown error')}"
+                elif event == "done":
+                    if data.get("timings"):
+                        st.caption(" • ".join(f"{name}: {secs:.1f}s" for name, secs in data["timings"].items()))
+                else:
+                    status = describe_event(event, data)
+                    if status:
+                        activity.caption(status)
     except requests.exceptions.Timeout:
-        return "⏰ Request timed out. The MCP agents are taking longer than expected. Please try a simpler query or try again.", []
+        answer += "\n\n⏰ Request timed out. The agents are taking longer than expected. Please try a simpler query or try again."
     except requests.exceptions.ConnectionError:
-        return "🔌 Connection error. Please ensure the FastAPI server is running on localhost:8080", []
+        answer += "\n\n🔌 Connection error. Please ensure the FastAPI server is running on localhost:8080"
     except requests.exceptions.RequestException as e:
-        return f"❌ Request error: {str(e)}", []
+        answer += f"\n\n❌ Request error: {str(e)}"
+
+    activity.empty()
+    answer = answer or "No response generated"
+    placeholder.markdown(answer)
+    return answer
 
 def create_chat_interface():
     """Create the main chat interface"""
-    sources = None
     mode_name = "Team Intelligence" if st.session_state.current_mode == "team" else "MCP Intelligence"
     mode_icon = "🤖" if st.session_state.current_mode == "team" else "⚡"
     
@@ -396,27 +412,20 @@ def create_chat_interface():
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Send to appropriate endpoint
-        if st.session_state.current_mode == "team":
-            ai_response = send_team_query(prompt)
-        else:
-            ai_response, sources = send_mcp_query(prompt)
+        # Stream from the appropriate endpoint, rendering tokens as they arrive
+        endpoint = "/team_chat/stream" if st.session_state.current_mode == "team" else "/chat/stream"
+        with st.chat_message("assistant"):
+            ai_response = stream_query(endpoint, prompt)
         
         # Add AI response
         current_messages.append({
             "role": "assistant", 
             "content": ai_response,
-            "sources": sources,
             "timestamp": datetime.now().isoformat()
         })
         
         # Update query count
         st.session_state.query_count += 1
-        
-        with st.chat_message("assistant"):
-            st.markdown(ai_response)
-            if sources:
-                display_sources(sources)
 
 # Main application flow
 def main():
@@ -0,0 +1,2 @@
+# Offline benchmarks and local stand-ins for the external services.
+# Run from the repository root, e.g. `python -m benchmarks.bench_confluence_export`.
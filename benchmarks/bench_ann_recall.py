@@ -0,0 +1,146 @@
+# benchmarks/bench_ann_recall.py
+
+"""
+Recall and latency of PgVector's HNSW / IVFFlat indexes against exact search,
+on the exported knowledge base rows (optionally padded with synthetic rows to
+see how the trade-off moves at workspace scale).
+
+Builds scratch tables `bench_ann_*` in the given database, sweeps the
+search-time knob (hnsw.ef_search or ivfflat.probes) and reports recall@k and
+p50/p95 latency for each value. Exact search is the same query with no index.
+
+    python -m benchmarks.bench_ann_recall --index hnsw --sweep 10,20,40,80,160
+    python -m benchmarks.bench_ann_recall --index ivfflat --lists 50 --sweep 1,2,5,10,20 --synthetic 50000 --fake-embeddings
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+from phi.document import Document
+
+from benchmarks.bench_vector_search import LocalEmbedder
+from knowledge_sync import read_row_documents
+from vector_store import VECTOR_DB_URL
+
+SOURCES = [("notion_pages.csv", "Page ID", "Page Title"), ("knoccs_confluence.csv", "page_id", "title")]
+
+
+class PrecomputedEmbedder:
+    """Returns query embeddings computed up front, so only the database is timed."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.dimensions = len(next(iter(embeddings.values())))
+
+    def get_embedding(self, text):
+        return self.embeddings[text]
+
+
+def load_corpus(args, embedder):
+    documents = []
+    for path, id_column, title_column in SOURCES:
+        try:
+            documents.extend(read_row_documents(path, id_column, title_column))
+        except OSError:
+            print(f"skipping {path} (not exported yet)")
+    for i in range(args.synthetic):
+        documents.append(Document(id=f"synthetic-{i}", name=f"synthetic {i}",
+                                  content=f"Synthetic page {i} about feature {i % 997} " + "lorem ipsum " * 20))
+
+    texts = [doc.content for doc in documents]
+    vectors = embedder.embed_batch(texts) if hasattr(embedder, "embed_batch") else [embedder.get_embedding(t) for t in texts]
+    for doc, vector in zip(documents, vectors):
+        doc.embedding = vector
+    return documents
+
+
+def make_queries(documents, n, embedder, seed=7):
+    """Row titles as queries, which is what users mostly ask for."""
+    rng = random.Random(seed)
+    titles = [doc.name for doc in documents if doc.name and doc.name != "Untitled"]
+    texts = list(dict.fromkeys(rng.choice(titles) + suffix for suffix in ("", " status", " owner") for _ in range(n)))[:n]
+    return {text: embedder.get_embedding(text) for text in texts}
+
+
+def exact_top_k(documents, queries, k):
+    matrix = np.asarray([doc.embedding for doc in documents], dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    ids = [doc.id for doc in documents]
+    truth = {}
+    for text, vector in queries.items():
+        scores = matrix @ (np.asarray(vector, dtype=np.float32) / np.linalg.norm(vector))
+        truth[text] = {ids[i] for i in np.argsort(-scores)[:k]}
+    return truth
+
+
+def measure(vector_db, queries, truth, k):
+    timings, recalls = [], []
+    for text in queries:
+        started = time.perf_counter()
+        results = vector_db.search(text, limit=k)
+        timings.append((time.perf_counter() - started) * 1000)
+        recalls.append(len({doc.id for doc in results} & truth[text]) / len(truth[text]))
+    timings.sort()
+    return statistics.mean(recalls), statistics.median(timings), timings[max(int(len(timings) * 0.95) - 1, 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default=VECTOR_DB_URL)
+    parser.add_argument("--index", choices=["hnsw", "ivfflat"], default="hnsw")
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--lists", type=int, default=0, help="IVFFlat lists (0: rows / 1000)")
+    parser.add_argument("--sweep", default="", help="comma-separated ef_search (hnsw) or probes (ivfflat) values")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--synthetic", type=int, default=0, help="extra synthetic rows to add to the corpus")
+    parser.add_argument("--fake-embeddings", action="store_true", help="deterministic local vectors instead of OpenAI")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch table afterwards")
+    args = parser.parse_args()
+
+    from phi.vectordb.pgvector import HNSW, Ivfflat, PgVector
+
+    from embedding_cache import CachedBatchEmbedder
+
+    embedder = LocalEmbedder() if args.fake_embeddings else CachedBatchEmbedder()
+    documents = load_corpus(args, embedder)
+    queries = make_queries(documents, args.queries, embedder)
+    truth = exact_top_k(documents, queries, args.k)
+    print(f"{len(documents)} documents, {len(queries)} queries, k={args.k}")
+
+    table_name = f"bench_ann_{args.index}"
+    if args.index == "hnsw":
+        index = HNSW(name=f"{table_name}_index", m=args.m, ef_construction=args.ef_construction)
+        knob, sweep = "ef_search", [int(v) for v in (args.sweep or "10,20,40,80,160").split(",")]
+    else:
+        index = Ivfflat(name=f"{table_name}_index", lists=args.lists or 100, dynamic_lists=not args.lists)
+        knob, sweep = "probes", [int(v) for v in (args.sweep or "1,2,5,10,20").split(",")]
+
+    vector_db = PgVector(table_name=table_name, db_url=args.db_url, embedder=embedder, vector_index=index)
+    vector_db.drop()
+    vector_db.create()
+    vector_db.insert(documents)
+    vector_db.embedder = PrecomputedEmbedder(queries)
+
+    recall, p50, p95 = measure(vector_db, queries, truth, args.k)
+    print(f"{'exact (no index)':<24} recall {recall:6.3f}   p50 {p50:8.2f}ms   p95 {p95:8.2f}ms")
+
+    started = time.perf_counter()
+    vector_db.optimize(force_recreate=True)
+    print(f"built {args.index} index in {time.perf_counter() - started:.1f}s")
+
+    for value in sweep:
+        setattr(vector_db.vector_index, knob, value)
+        recall, p50, p95 = measure(vector_db, queries, truth, args.k)
+        print(f"{args.index} {knob}={value:<10} recall {recall:6.3f}   p50 {p50:8.2f}ms   p95 {p95:8.2f}ms")
+
+    if not args.keep:
+        vector_db.drop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_embeddings.py
+
+"""
+Embedding throughput against the local fake OpenAI server: phi's default
+one-request-per-document OpenAIEmbedder versus CachedBatchEmbedder with a
+cold cache and with a warm cache (what a `recreate=True` or a fresh Postgres
+costs once texts have been embedded before).
+
+    python -m benchmarks.bench_embeddings --docs 2000 --latency 0.05
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fake_openai import FakeOpenAI
+
+
+def synthetic_texts(n):
+    return [
+        f"Page ID: {100000 + i}\nPage Title: KNOCCS synthetic page {i}\nSummary: feature {i} " + "lorem ipsum " * 40
+        for i in range(n)
+    ]
+
+
+def run(label, embed, texts):
+    started = time.perf_counter()
+    vectors = embed(texts)
+    seconds = time.perf_counter() - started
+    assert len(vectors) == len(texts)
+    print(f"{label:<28} {len(texts):>7} docs {seconds:>8.2f}s {len(texts) / seconds:>10.0f} docs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated round trip per request (s)")
+    parser.add_argument("--per-input-latency", type=float, default=0.0005, help="simulated work per input (s)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--skip-sequential", action="store_true", help="skip the slow one-at-a-time baseline")
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    from phi.embedder.openai import OpenAIEmbedder
+
+    from embedding_cache import CachedBatchEmbedder
+
+    texts = synthetic_texts(args.docs)
+    with FakeOpenAI(latency=args.latency, per_input_latency=args.per_input_latency) as fake, \
+            tempfile.TemporaryDirectory() as tmp:
+        if not args.skip_sequential:
+            sequential = OpenAIEmbedder(base_url=fake.url)
+            run("one request per doc", lambda t: [sequential.get_embedding(text) for text in t], texts)
+
+        embedder = CachedBatchEmbedder(
+            base_url=fake.url,
+            cache_path=os.path.join(tmp, "embeddings.sqlite3"),
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+        )
+        run(f"batched x{args.concurrency}, cold cache", embedder.embed_batch, texts)
+        run("batched, warm cache", embedder.embed_batch, texts)
+        run("per-doc lookups, warm cache", lambda t: [embedder.get_embedding(text) for text in t], texts)
+
+        print(f"server saw: {dict(fake.requests)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/bench_mcp_sessions.py
+
+"""
+MCP tool-call latency with a new session per call (what
+MultiServerMCPClient.get_tools() does, i.e. one container start per call with
+the stdio docker config) versus mcp_manager's pooled long-lived sessions, over
+stdio and streamable HTTP, plus recovery time after the server restarts.
+
+    python -m benchmarks.bench_mcp_sessions --calls 20 --startup-delay 1
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from benchmarks.fake_mcp_server import FakeMCPServer
+
+
+def stdio_connection(args):
+    return {
+        "transport": "stdio",
+        "command": sys.executable,
+        "args": ["-m", "benchmarks.fake_mcp_server", "--transport", "stdio",
+                 "--latency", str(args.latency), "--startup-delay", str(args.startup_delay)],
+    }
+
+
+async def run_calls(label, tools, calls, concurrency):
+    tool = next(t for t in tools if t.name == "jira_search")
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            await tool.ainvoke({"jql": f"sprint in openSprints() order by rank {i}"})
+            timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    total = time.perf_counter() - started
+    print(f"{label:<34} {calls:>4} calls x{concurrency:<3} {total:>7.2f}s   "
+          f"p50 {statistics.median(timings) * 1000:>8.1f}ms   max {max(timings) * 1000:>8.1f}ms")
+
+
+async def main_async(args):
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+    import mcp_manager
+    from mcp_manager import MCPManager
+
+    mcp_manager.RECONNECT_BASE_SECONDS = 0.2
+    mcp_manager.HEALTH_INTERVAL_SECONDS = 0.5
+
+    if not args.skip_per_call:
+        client = MultiServerMCPClient({"fake": stdio_connection(args)})
+        tools = await client.get_tools()
+        await run_calls("stdio, new session per call", tools, args.calls, 1)
+
+    manager = MCPManager({"fake": stdio_connection(args)}, sessions_per_server=args.sessions)
+    started = time.perf_counter()
+    await manager.start()
+    print(f"pooled stdio sessions ready in {time.perf_counter() - started:.2f}s")
+    tools = await manager.get_tools()
+    await run_calls("stdio, pooled sessions", tools, args.calls, 1)
+    await run_calls("stdio, pooled sessions", tools, args.calls, args.sessions)
+    await manager.stop()
+
+    server = FakeMCPServer(latency=args.latency, port=args.port)
+    server.start()
+    manager = MCPManager({"fake": {"transport": "streamable_http", "url": server.url}}, sessions_per_server=args.sessions)
+    await manager.start()
+    tools = await manager.get_tools()
+    await run_calls("http, pooled sessions", tools, args.calls, 1)
+    await run_calls("http, pooled sessions", tools, args.calls, args.sessions)
+
+    # Restart the server under the pool and time how long until calls succeed again
+    tool = next(t for t in tools if t.name == "jira_search")
+    server.stop()
+    server = FakeMCPServer(latency=args.latency, port=args.port)
+    server.start()
+    restarted = time.perf_counter()
+    while True:
+        try:
+            await tool.ainvoke({"jql": "project = KNOCCS"})
+            break
+        except Exception:
+            await asyncio.sleep(0.05)
+    print(f"calls succeed again {time.perf_counter() - restarted:.2f}s after a server restart; "
+          f"pool status: {manager.status()['fake']}")
+    await manager.stop()
+    server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated tool latency (s)")
+    parser.add_argument("--startup-delay", type=float, default=0.5, help="simulated server cold start (s)")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--skip-per-call", action="store_true", help="skip the slow new-session-per-call baseline")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
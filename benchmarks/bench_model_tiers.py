@@ -0,0 +1,99 @@
+# benchmarks/bench_model_tiers.py
+
+"""
+End-to-end latency of /chat and /team_chat per model tier, on the offline
+load-test setup (benchmarks/load_test.py). The app is booted once per tier
+with that tier's MODEL_* settings:
+
+    large        every role on the large model (the old behaviour)
+    tiered       small model for specialists and the MCP agent, large for the lead
+    escalation   tiered, plus re-running unconfident small-model answers on the large model
+
+The fake OpenAI server gives each model its own speed, by default roughly
+the ratio between gpt-4o and gpt-4o-mini. A share of the small model's
+answers (--unsure-rate) comes back as "I couldn't find ..." so escalation
+has something to catch. The report shows latency and throughput per tier,
+and how many calls each model served.
+
+    python -m benchmarks.bench_model_tiers --endpoints team_chat --concurrency 4 --requests 24
+    python -m benchmarks.bench_model_tiers --large gpt-4.1 --small gpt-4.1-mini --small-latency 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+
+from benchmarks.load_test import (AppServer, Fakes, add_arguments, app_env, free_port, parse_arguments,
+                                  print_header, run_all, write_knowledge)
+
+
+def tiers(large, small):
+    return {
+        "large": {"MODEL_LEAD": large, "MODEL_SPECIALIST": large, "MODEL_MCP_AGENT": large, "MODEL_ESCALATION": ""},
+        "tiered": {"MODEL_LEAD": large, "MODEL_SPECIALIST": small, "MODEL_MCP_AGENT": small, "MODEL_ESCALATION": ""},
+        "escalation": {"MODEL_LEAD": large, "MODEL_SPECIALIST": small, "MODEL_MCP_AGENT": small,
+                       "MODEL_ESCALATION": large},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--tiers", default="large,tiered,escalation", help="comma separated tiers to run")
+    parser.add_argument("--large", default="gpt-4o", help="large model name")
+    parser.add_argument("--small", default="gpt-4o-mini", help="small model name")
+    parser.add_argument("--large-latency", type=float, default=0.6, help="large model time to first token (s)")
+    parser.add_argument("--large-token-latency", type=float, default=0.012, help="large model time per token (s)")
+    parser.add_argument("--small-latency", type=float, default=0.25, help="small model time to first token (s)")
+    parser.add_argument("--small-token-latency", type=float, default=0.004, help="small model time per token (s)")
+    parser.add_argument("--unsure-rate", type=float, default=0.15, help="share of small-model answers that fail the confidence check")
+    parser.set_defaults(concurrency="1,4", requests=16)
+    args = parse_arguments(parser)
+
+    models = {
+        args.large: {"chat_latency": args.large_latency, "per_token_latency": args.large_token_latency},
+        args.small: {"chat_latency": args.small_latency, "per_token_latency": args.small_token_latency,
+                     "unsure_rate": args.unsure_rate},
+    }
+    settings = tiers(args.large, args.small)
+
+    workdir = tempfile.mkdtemp(prefix="bench_model_tiers_")
+    write_knowledge(workdir, args.docs)
+    summary = []
+    try:
+        for tier in (t.strip() for t in args.tiers.split(",") if t.strip()):
+            with Fakes(args, models=models) as fakes:
+                server = AppServer(workdir, {**app_env(fakes, workdir, args.answer_cache), **settings[tier]}, free_port())
+                try:
+                    started = time.perf_counter()
+                    server.start(args.startup_timeout)
+                    print(f"\n== {tier}: {json.dumps(settings[tier])} (ready in {time.perf_counter() - started:.1f}s)")
+                    print_header()
+                    rows = asyncio.run(run_all(server, fakes, args))
+                finally:
+                    server.stop()
+                # Fresh fakes per tier, so the counters cover this tier only (warm-up included)
+                calls = {model: fakes.openai.requests[f"chat:{model}"] for model in (args.large, args.small)}
+                print(f"LLM calls: {args.large} {calls[args.large]}, {args.small} {calls[args.small]}, "
+                      f"unsure small-model answers {fakes.openai.requests['unsure']}")
+                summary.extend({"tier": tier, **row, "model_calls": calls} for row in rows)
+    finally:
+        if args.keep:
+            print(f"Working directory kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'tier':<11} {'endpoint':<18} {'conc':>4} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for row in summary:
+        print(f"{row['tier']:<11} {row['endpoint']:<18} {row['concurrency']:>4} {row['throughput_rps']:>7.2f} "
+              f"{row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f} {row['p99_ms']:>8.0f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": {**vars(args), "models": models}, "results": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/bench_snapshot_load.py
+
+"""
+Knowledge base load time and peak RSS growth: reading the exported rows from CSV
+versus from the memory-mapped Arrow snapshot. Each measurement runs in a
+fresh interpreter so peak RSS is not polluted by the previous one.
+
+    python -m benchmarks.bench_snapshot_load --rows 20000 --body-chars 4000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+COLUMNS = ["chunk_id", "page_id", "title", "space_key", "version_number", "heading", "text"]
+
+
+def synthetic_rows(n, body_chars):
+    paragraph = 'Line with "quotes", commas, and <b>markup</b>.\n'
+    body = (paragraph * (body_chars // len(paragraph) + 1))[:body_chars]
+    return [
+        {"chunk_id": f"{100000 + i}-0", "page_id": str(100000 + i), "title": f"Synthetic page {i}",
+         "space_key": "KNOCCS", "version_number": "1", "heading": "Overview", "text": f"Page {i}\n{body}"}
+        for i in range(n)
+    ]
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+    except (OSError, StopIteration):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def reset_peak_rss():
+    # Linux only: restart the high-water mark so import costs are not counted
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def child(mode, csv_path):
+    """Runs in the subprocess: load documents and report time and peak RSS growth."""
+    import knowledge_snapshot
+    from knowledge_sync import read_row_documents
+
+    reset_peak_rss()
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == "snapshot-table":
+        rows = knowledge_snapshot.read_table(csv_path).num_rows
+    else:
+        rows = len(read_row_documents(csv_path, "chunk_id", "title", ["title", "heading", "text"]))
+    seconds = time.perf_counter() - started
+    print(json.dumps({"rows": rows, "seconds": seconds, "peak_rss_mb": peak_rss_mb() - baseline}))
+
+
+def measure(mode, csv_path):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_snapshot_load", "--child", mode, csv_path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--body-chars", type=int, default=2000)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(*args.child)
+
+    import knowledge_snapshot
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = synthetic_rows(args.rows, args.body_chars)
+        csv_dir, snapshot_dir = os.path.join(tmp, "csv"), os.path.join(tmp, "snapshot")
+        os.makedirs(csv_dir)
+        os.makedirs(snapshot_dir)
+        csv_path = os.path.join(csv_dir, "bench.csv")
+        knowledge_snapshot.write_csv(csv_path, rows, COLUMNS)
+        snapshot_csv_path = os.path.join(snapshot_dir, "bench.csv")
+        knowledge_snapshot.write_snapshot(snapshot_csv_path, rows, COLUMNS)
+        del rows
+
+        print(f"{args.rows} rows, CSV {os.path.getsize(csv_path) / 2**20:.1f} MB, "
+              f"snapshot {os.path.getsize(knowledge_snapshot.snapshot_path(snapshot_csv_path)) / 2**20:.1f} MB")
+        for label, mode, path in [
+            ("csv -> documents", "documents", csv_path),
+            ("snapshot -> documents", "documents", snapshot_csv_path),
+            ("snapshot table (mmap)", "snapshot-table", snapshot_csv_path),
+        ]:
+            result = measure(mode, path)
+            print(f"{label:<24} {result['seconds']:>8.3f}s   peak RSS +{result['peak_rss_mb']:>7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
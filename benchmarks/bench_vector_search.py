@@ -0,0 +1,92 @@
+# benchmarks/bench_vector_search.py
+
+"""
+Retrieval latency of the vector backends on a corpus the size of ours, with
+query embeddings computed locally so only the store itself is measured.
+
+    python -m benchmarks.bench_vector_search --docs 500
+    python -m benchmarks.bench_vector_search --docs 500 --pgvector postgresql+psycopg://ai:ai@localhost:5532/ai
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from phi.document import Document
+from phi.embedder import Embedder
+
+from benchmarks.fake_openai import fake_embedding
+
+
+class LocalEmbedder(Embedder):
+    """Deterministic embeddings without any network calls."""
+
+    dimensions: int = 1536
+
+    def get_embedding(self, text: str) -> List[float]:
+        return fake_embedding(text, self.dimensions)
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        return self.get_embedding(text), None
+
+
+def synthetic_documents(n, dimensions):
+    documents = []
+    for i in range(n):
+        content = f"Page ID: {100000 + i}\nPage Title: KNOCCS synthetic page {i}\nSummary: feature {i}"
+        documents.append(Document(id=str(100000 + i), name=f"page {i}", content=content,
+                                  embedding=fake_embedding(content, dimensions)))
+    return documents
+
+
+def measure(label, search, queries, limit):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query, limit)
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<34} p50 {statistics.median(timings):>10.1f}us   p95 {p95:>10.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--pgvector", help="also benchmark PgVector at this database URL")
+    args = parser.parse_args()
+
+    from local_vector_db import LocalVectorDb
+
+    embedder = LocalEmbedder()
+    documents = synthetic_documents(args.docs, embedder.dimensions)
+    queries = [embedder.get_embedding(f"query {i}") for i in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        local = LocalVectorDb("bench_documents", directory=tmp, embedder=embedder)
+        local.create()
+        local.upsert(documents)
+        # reopen so the matrix is memory-mapped from disk, as after a restart
+        local = LocalVectorDb("bench_documents", directory=tmp, embedder=embedder)
+        measure(f"local ({args.docs} docs)", local.search_by_vector, queries, args.limit)
+
+    if args.pgvector:
+        from phi.vectordb.pgvector import PgVector
+
+        pg = PgVector(table_name="bench_documents", db_url=args.pgvector, embedder=embedder)
+        pg.drop()
+        pg.create()
+        pg.upsert(documents)
+        # PgVector embeds the query text itself; precompute so only the round trip is timed
+        texts = [f"query {i}" for i in range(args.queries)]
+        pg.embedder = type("Precomputed", (), {"get_embedding": lambda self, t: queries[texts.index(t)]})()
+        measure(f"pgvector ({args.docs} docs)", pg.search, texts, args.limit)
+        pg.drop()
+
+
+if __name__ == "__main__":
+    main()
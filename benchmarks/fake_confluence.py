@@ -0,0 +1,172 @@
+# benchmarks/fake_confluence.py
+
+"""
+Local stand-in for the Confluence Cloud content REST API, serving synthetic
+pages so the exporter can be exercised offline at any scale.
+
+Implements the two endpoints import_confluence.py uses:
+    GET /wiki/rest/api/content/search   (CQL search, cursor pagination via _links.next)
+    GET /wiki/rest/api/content/<id>     (single page with body.storage)
+
+Run standalone with `python -m benchmarks.fake_confluence --pages 5000`, or use
+FakeConfluence as a context manager from a benchmark.
+"""
+
+import argparse
+import base64
+import json
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 128
+
+
+class FakeConfluence:
+    def __init__(self, pages=1000, max_limit=50, latency=0.0, rate_limit_every=0,
+                 body_in_search=True, host="127.0.0.1", port=0):
+        self.max_limit = max_limit
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.body_in_search = body_in_search
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self.pages = {}
+        for i in range(pages):
+            self.add_page(i)
+        self._server = _Server((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_page(self, i):
+        page_id = str(100000 + i)
+        self.pages[page_id] = {
+            "id": page_id,
+            "type": "page",
+            "title": f"KNOCCS synthetic page {i}",
+            "space": {"key": "KNOCCS"},
+            "version": {"number": 1},
+            "metadata": {"labels": {"results": [{"name": "synthetic"}]}},
+            "body": {"storage": {"value": (
+                f"<h2>Overview {i}</h2><p>This page describes <strong>feature {i}</strong> of knoccs.</p>"
+                f"<h3>Details</h3><p>{'Lorem ipsum dolor sit amet. ' * 20}</p>"
+            )}},
+        }
+        return page_id
+
+    def bump(self, page_id):
+        """Simulate an edit: new version and body."""
+        page = self.pages[page_id]
+        page["version"]["number"] += 1
+        page["body"]["storage"]["value"] += f"<p>Edited in version {page['version']['number']}.</p>"
+
+    def delete(self, page_id):
+        self.pages.pop(page_id, None)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _render(self, page, expand):
+        item = {k: v for k, v in page.items() if k != "body"}
+        if "body.storage" in expand:
+            item["body"] = page["body"]
+        return item
+
+    def _search(self, query):
+        limit = min(int(query.get("limit", 25)), self.max_limit)
+        offset = int(base64.urlsafe_b64decode(query["cursor"]).decode()) if query.get("cursor") else 0
+        expand = query.get("expand", "") if self.body_in_search else query.get("expand", "").replace("body.storage", "")
+        ids = sorted(self.pages)
+        results = [self._render(self.pages[i], expand) for i in ids[offset:offset + limit]]
+        links = {"base": f"{self.url}/wiki", "context": "/wiki"}
+        if offset + limit < len(ids):
+            cursor = base64.urlsafe_b64encode(str(offset + limit).encode()).decode()
+            # like Confluence, the next link keeps cql/limit/cursor but not the expand list
+            next_query = urllib.parse.urlencode({"cql": query.get("cql", ""), "limit": limit, "cursor": cursor})
+            links["next"] = f"/rest/api/content/search?{next_query}"
+        return {"results": results, "limit": limit, "size": len(results), "_links": links}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urllib.parse.urlsplit(self.path)
+                query = dict(urllib.parse.parse_qsl(parsed.query))
+                with fake._lock:
+                    fake.requests["total"] += 1
+                    throttled = fake.rate_limit_every and fake.requests["total"] % fake.rate_limit_every == 0
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if throttled:
+                    fake.requests["throttled"] += 1
+                    return self._send(429, {"message": "Rate limited"}, {"Retry-After": "0"})
+
+                if parsed.path == "/wiki/rest/api/content/search":
+                    fake.requests["search"] += 1
+                    return self._send(200, fake._search(query))
+                prefix = "/wiki/rest/api/content/"
+                if parsed.path.startswith(prefix):
+                    fake.requests["body"] += 1
+                    page = fake.pages.get(parsed.path[len(prefix):])
+                    if page is None:
+                        return self._send(404, {"message": "Not found"})
+                    return self._send(200, fake._render(page, query.get("expand", "")))
+                self._send(404, {"message": "Not found"})
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic Confluence pages locally")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="answer every Nth request with 429")
+    args = parser.parse_args()
+
+    fake = FakeConfluence(pages=args.pages, latency=args.latency, rate_limit_every=args.rate_limit_every, port=args.port)
+    print(f"Fake Confluence with {args.pages} pages at {fake.url} (set CONFLUENCE_URL to this)")
+    fake._server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
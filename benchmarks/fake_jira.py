@@ -0,0 +1,176 @@
+# benchmarks/fake_jira.py
+
+"""
+Local stand-in for the Jira Server REST API, serving synthetic issues so the
+Jira specialist (phi's JiraTools over the `jira` client) runs offline.
+
+Implements what JiraTools uses:
+    GET  /rest/api/2/serverInfo
+    GET  /rest/api/2/field
+    GET  /rest/api/2/search               (JQL ignored, startAt/maxResults paging)
+    GET  /rest/api/2/issue/<key>
+    POST /rest/api/2/issue
+    POST /rest/api/2/issue/<key>/comment
+
+Run standalone with `python -m benchmarks.fake_jira --issues 200`, or use
+FakeJira as a context manager from a benchmark.
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATUSES = ("To Do", "In Progress", "In Review", "Done")
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 128
+
+
+class FakeJira:
+    def __init__(self, issues=200, project="KNOCCS", latency=0.05, host="127.0.0.1", port=0):
+        self.project = project
+        self.latency = latency
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self.issues = {}
+        for i in range(issues):
+            self.add_issue(f"KNOCCS synthetic issue {i}", f"Work item {i} for the current release.")
+        self._server = _Server((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_issue(self, summary, description, project=None):
+        number = 100 + len(self.issues)
+        key = f"{project or self.project}-{number}"
+        self.issues[key] = {
+            "id": str(10000 + number),
+            "key": key,
+            "self": f"/rest/api/2/issue/{key}",
+            "fields": {
+                "summary": summary,
+                "description": description,
+                "project": {"key": project or self.project, "name": project or self.project},
+                "issuetype": {"name": "Task"},
+                "status": {"name": STATUSES[number % len(STATUSES)]},
+                "assignee": {"displayName": f"Bench User {number % 7}"} if number % 5 else None,
+                "reporter": {"displayName": "Bench Reporter"},
+                "comment": {"comments": []},
+            },
+        }
+        return self.issues[key]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _get(self, path, query):
+        if path == "/rest/api/2/serverInfo":
+            return 200, {"baseUrl": self.url, "version": "9.12.0", "versionNumbers": [9, 12, 0],
+                         "deploymentType": "Server", "serverTitle": "Fake Jira"}
+        if path == "/rest/api/2/field":
+            return 200, [{"id": name, "name": name, "custom": False}
+                         for name in ("summary", "description", "status", "assignee", "reporter")]
+        if path == "/rest/api/2/search":
+            start = int(query.get("startAt", ["0"])[0])
+            limit = min(int(query.get("maxResults", ["50"])[0]), 100)
+            issues = list(self.issues.values())
+            return 200, {"startAt": start, "maxResults": limit, "total": len(issues),
+                         "issues": issues[start:start + limit]}
+        if path.startswith("/rest/api/2/issue/"):
+            issue = self.issues.get(path.rsplit("/", 1)[1])
+            if issue is None:
+                return 404, {"errorMessages": ["Issue does not exist or you do not have permission to see it."]}
+            return 200, issue
+        return 404, {"errorMessages": ["Not found"]}
+
+    def _post(self, path, payload):
+        if path == "/rest/api/2/issue":
+            fields = payload.get("fields") or {}
+            issue = self.add_issue(fields.get("summary", ""), fields.get("description", ""),
+                                   (fields.get("project") or {}).get("key"))
+            return 201, {"id": issue["id"], "key": issue["key"], "self": issue["self"]}
+        if path.startswith("/rest/api/2/issue/") and path.endswith("/comment"):
+            issue = self.issues.get(path.split("/")[-2])
+            if issue is None:
+                return 404, {"errorMessages": ["Issue does not exist"]}
+            comment = {"id": str(len(issue["fields"]["comment"]["comments"]) + 1), "body": payload.get("body", "")}
+            issue["fields"]["comment"]["comments"].append(comment)
+            return 201, comment
+        return 404, {"errorMessages": ["Not found"]}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _route(self, method):
+                parsed = urllib.parse.urlparse(self.path)
+                with fake._lock:
+                    fake.requests[f"{method} {parsed.path.rstrip('/')}"] += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                return parsed
+
+            def do_GET(self):
+                parsed = self._route("GET")
+                self._send(*fake._get(parsed.path.rstrip("/"), urllib.parse.parse_qs(parsed.query)))
+
+            def do_POST(self):
+                parsed = self._route("POST")
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake._lock:
+                    result = fake._post(parsed.path.rstrip("/"), payload)
+                self._send(*result)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Jira REST API locally")
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--issues", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every request")
+    args = parser.parse_args()
+
+    fake = FakeJira(issues=args.issues, latency=args.latency, port=args.port)
+    print(f"Fake Jira at {fake.url} (set JIRA_URL to this)")
+    fake._server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/fake_mcp_server.py
+
+"""
+Local stand-in for the mcp-atlassian / mcp/notion tool servers, serving a few
+tools with the same shape over stdio or streamable HTTP.
+
+Tools: jira_search, jira_get_issue, jira_create_issue (mutating),
+confluence_get_page, notion_query_database. `toolset` serves all of them or
+only the mcp-atlassian ("atlassian") or mcp/notion ("notion") ones. Every call
+sleeps `latency` seconds; `startup_delay` simulates a cold container start.
+
+    python -m benchmarks.fake_mcp_server --transport http --port 8767   # MCP_ATLASSIAN_URL=http://127.0.0.1:8767/mcp
+    python -m benchmarks.fake_mcp_server --transport stdio --startup-delay 2
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from collections import Counter
+
+from mcp.server.fastmcp import FastMCP
+
+TOOLSETS = {
+    "all": ("jira_search", "jira_get_issue", "jira_create_issue", "confluence_get_page", "notion_query_database"),
+    "atlassian": ("jira_search", "jira_get_issue", "jira_create_issue", "confluence_get_page"),
+    "notion": ("notion_query_database",),
+}
+
+
+def build_server(latency=0.05, host="127.0.0.1", port=8767, calls=None, toolset="all"):
+    calls = calls if calls is not None else Counter()
+    mcp = FastMCP(f"fake-{toolset}", host=host, port=port, log_level="WARNING")
+
+    def serve(fn):
+        return mcp.tool()(fn) if fn.__name__ in TOOLSETS[toolset] else fn
+
+    async def work(tool):
+        calls[tool] += 1
+        if latency:
+            await asyncio.sleep(latency)
+
+    @serve
+    async def jira_search(jql: str, limit: int = 10) -> str:
+        """Search Jira issues with JQL."""
+        await work("jira_search")
+        issues = [f"KNOCCS-{100 + i}: synthetic issue {i} matching '{jql}' (In Progress)" for i in range(limit)]
+        return "\n".join(issues)
+
+    @serve
+    async def jira_get_issue(issue_key: str) -> str:
+        """Get a Jira issue by key."""
+        await work("jira_get_issue")
+        return f"{issue_key}: synthetic issue, status In Progress, assignee Bench User"
+
+    @serve
+    async def jira_create_issue(project_key: str, summary: str) -> str:
+        """Create a Jira issue."""
+        await work("jira_create_issue")
+        return f"Created {project_key}-{900 + calls['jira_create_issue']}: {summary}"
+
+    @serve
+    async def confluence_get_page(page_id: str) -> str:
+        """Get a Confluence page by id."""
+        await work("confluence_get_page")
+        return f"Page {page_id}: Overview of feature {page_id}. " + "Lorem ipsum. " * 20
+
+    @serve
+    async def notion_query_database(database_id: str) -> str:
+        """Query a Notion database."""
+        await work("notion_query_database")
+        return "\n".join(f"Row {i} of {database_id}: Roadmap item {i}" for i in range(5))
+
+    return mcp, calls
+
+
+class FakeMCPServer:
+    """
+    Streamable HTTP fake MCP server on a background thread; can be stopped and
+    started again on the same port to exercise reconnects.
+    """
+
+    def __init__(self, latency=0.05, host="127.0.0.1", port=8767, toolset="all"):
+        self.latency = latency
+        self.toolset = toolset
+        self.host = host
+        self.port = port
+        self.calls = Counter()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/mcp"
+
+    def start(self):
+        import uvicorn
+
+        mcp, _ = build_server(self.latency, self.host, self.port, self.calls, self.toolset)
+        config = uvicorn.Config(mcp.streamable_http_app(), host=self.host, port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self.url
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake MCP tools locally")
+    parser.add_argument("--transport", choices=["stdio", "http"], default="http")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every tool call")
+    parser.add_argument("--toolset", choices=sorted(TOOLSETS), default="all")
+    parser.add_argument("--startup-delay", type=float, default=0.0, help="seconds before serving (cold start)")
+    args = parser.parse_args()
+
+    time.sleep(args.startup_delay)
+    mcp, _ = build_server(args.latency, port=args.port, toolset=args.toolset)
+    mcp.run("stdio" if args.transport == "stdio" else "streamable-http")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+# benchmarks/fake_openai.py
+
+"""
+Local stand-in for the OpenAI API, so embedding pipelines and agents can be
+measured offline without spending tokens.
+
+Implements:
+    POST /v1/embeddings         (string or list input, deterministic unit vectors per text)
+    POST /v1/chat/completions   (plain or streamed; calls one offered tool, then answers)
+
+Every embeddings request costs `latency` seconds plus `per_input_latency` per
+input, which roughly models a real provider: a fixed round trip plus work per
+text. A chat completion costs `chat_latency` seconds before the first token and
+`per_token_latency` per generated token. When the request offers tools and
+the conversation has no tool result since the last user message, the model
+calls one tool (preferring names in PREFERRED_TOOLS) with arguments filled in
+from its schema; otherwise it answers with `completion_tokens` words derived
+from the prompt, so the same prompt always gets the same answer. `models`
+overrides chat_latency and per_token_latency per model name, and its
+`unsure_rate` makes that share of a model's answers (picked by prompt hash)
+an "I couldn't find ..." reply, to exercise escalation to a larger model.
+
+Run standalone with `python -m benchmarks.fake_openai --port 8766`, or use
+FakeOpenAI as a context manager from a benchmark.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 128
+
+
+def fake_embedding(text, dimensions):
+    """Deterministic unit vector for `text`."""
+    rng = random.Random(hashlib.md5(text.encode("utf-8")).digest())
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+# Tools the fake model reaches for first, so agents exercise their real data path
+PREFERRED_TOOLS = ("search_knowledge_base", "search_issues", "jira_search", "notion_query_database",
+                   "confluence_get_page")
+
+WORDS = ("sprint", "release", "roadmap", "issue", "page", "status", "owner", "milestone", "review",
+         "deploy", "feature", "blocked", "done", "priority", "team", "update")
+
+
+def fake_answer(prompt, tokens):
+    """Deterministic `tokens`-word answer for `prompt`."""
+    rng = random.Random(hashlib.md5(prompt.encode("utf-8")).digest())
+    return " ".join(rng.choice(WORDS) for _ in range(tokens))
+
+
+def _count_tokens(messages):
+    return sum(len(str(m.get("content") or "").split()) for m in messages) + 4 * len(messages)
+
+
+def _tool_arguments(schema, prompt):
+    # Fill every required parameter (or the first one) with a plausible value of its type
+    properties = schema.get("properties") or {}
+    names = schema.get("required") or list(properties)[:1]
+    arguments = {}
+    for name in names:
+        kind = (properties.get(name) or {}).get("type", "string")
+        arguments[name] = 5 if kind in ("integer", "number") else (True if kind == "boolean" else prompt[:200])
+    return arguments
+
+
+class FakeOpenAI:
+    def __init__(self, latency=0.05, per_input_latency=0.0005, max_inputs=2048, host="127.0.0.1", port=0,
+                 chat_latency=0.3, per_token_latency=0.01, completion_tokens=60, models=None):
+        self.latency = latency
+        self.per_input_latency = per_input_latency
+        self.max_inputs = max_inputs
+        self.chat_latency = chat_latency
+        self.per_token_latency = per_token_latency
+        self.completion_tokens = completion_tokens
+        self.models = models or {}
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _embeddings(self, payload):
+        inputs = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+        if len(inputs) > self.max_inputs:
+            return 400, {"error": {"message": f"Too many inputs, max {self.max_inputs}", "type": "invalid_request_error"}}
+        dimensions = int(payload.get("dimensions") or 1536)
+        with self._lock:
+            self.requests["embeddings"] += 1
+            self.requests["inputs"] += len(inputs)
+        time.sleep(self.latency + self.per_input_latency * len(inputs))
+        tokens = sum(len(text.split()) for text in inputs)
+        return 200, {
+            "object": "list",
+            "model": payload.get("model", "text-embedding-3-small"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(text, dimensions)}
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    def _latency(self, payload):
+        """(seconds to first token, seconds per token) for the requested model."""
+        profile = self.models.get(payload.get("model"), {})
+        return profile.get("chat_latency", self.chat_latency), profile.get("per_token_latency", self.per_token_latency)
+
+    def _reply(self, payload):
+        """
+        The assistant message for a chat request: a tool call, or the final answer text.
+        """
+        messages = payload.get("messages") or []
+        last_user = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+        prompt = str(messages[last_user].get("content") or "") if last_user >= 0 else ""
+        tools = [t["function"] for t in payload.get("tools") or [] if t.get("type") == "function"]
+        answered = any(m.get("role") == "tool" for m in messages[last_user + 1:])
+        if tools and not answered and payload.get("tool_choice") != "none":
+            tool = next((t for name in PREFERRED_TOOLS for t in tools if t["name"] == name), tools[0])
+            arguments = _tool_arguments(tool.get("parameters") or {}, prompt)
+            call = {"id": f"call_{uuid.uuid4().hex[:24]}", "type": "function",
+                    "function": {"name": tool["name"], "arguments": json.dumps(arguments)}}
+            return {"role": "assistant", "content": None, "tool_calls": [call]}, 20
+        context = " ".join(str(m.get("content") or "") for m in messages)
+        unsure_rate = self.models.get(payload.get("model"), {}).get("unsure_rate", 0.0)
+        if unsure_rate and random.Random(hashlib.md5(f"{payload.get('model')}:{prompt}".encode()).digest()).random() < unsure_rate:
+            with self._lock:
+                self.requests["unsure"] += 1
+            return {"role": "assistant", "content": "I couldn't find any information about that."}, 9
+        return {"role": "assistant", "content": fake_answer(context, self.completion_tokens)}, self.completion_tokens
+
+    def _chat(self, payload):
+        with self._lock:
+            self.requests["chat"] += 1
+            self.requests[f"chat:{payload.get('model')}"] += 1
+        message, tokens = self._reply(payload)
+        usage = {"prompt_tokens": _count_tokens(payload.get("messages") or []), "completion_tokens": tokens}
+        usage["total_tokens"] = usage["prompt_tokens"] + tokens
+        first_token, per_token = self._latency(payload)
+        time.sleep(first_token + per_token * tokens)
+        return 200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": message,
+                         "finish_reason": "tool_calls" if message.get("tool_calls") else "stop"}],
+            "usage": usage,
+        }
+
+    def _chat_chunks(self, payload):
+        """
+        Yield (delay, chunk) pairs for a streamed chat completion.
+        """
+        with self._lock:
+            self.requests["chat"] += 1
+            self.requests[f"chat:{payload.get('model')}"] += 1
+        message, tokens = self._reply(payload)
+        first_token, per_token = self._latency(payload)
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:24]}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": payload.get("model", "gpt-4o")}
+
+        def chunk(delta, finish_reason=None):
+            return {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+        if message.get("tool_calls"):
+            call = message["tool_calls"][0]
+            yield first_token, chunk({"role": "assistant", "content": None, "tool_calls": [{"index": 0, **call}]})
+            yield per_token * tokens, chunk({}, "tool_calls")
+        else:
+            words = message["content"].split(" ")
+            yield first_token, chunk({"role": "assistant", "content": ""})
+            for i, word in enumerate(words):
+                yield per_token, chunk({"content": word if i == 0 else f" {word}"})
+            yield 0, chunk({}, "stop")
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            prompt_tokens = _count_tokens(payload.get("messages") or [])
+            yield 0, {**base, "choices": [], "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": tokens,
+                                                       "total_tokens": prompt_tokens + tokens}}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, chunks):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for delay, chunk in chunks:
+                    time.sleep(delay)
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                path = self.path.rstrip("/")
+                if path == "/v1/embeddings":
+                    return self._send(*fake._embeddings(payload))
+                if path == "/v1/chat/completions":
+                    if payload.get("stream"):
+                        return self._stream(fake._chat_chunks(payload))
+                    return self._send(*fake._chat(payload))
+                self._send(404, {"error": {"message": "Not found"}})
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI API locally")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every request")
+    parser.add_argument("--per-input-latency", type=float, default=0.0005, help="seconds added per embedded input")
+    parser.add_argument("--chat-latency", type=float, default=0.3, help="seconds before the first chat token")
+    parser.add_argument("--per-token-latency", type=float, default=0.01, help="seconds per generated chat token")
+    parser.add_argument("--completion-tokens", type=int, default=60, help="words in each chat answer")
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(latency=args.latency, per_input_latency=args.per_input_latency, port=args.port,
+                      chat_latency=args.chat_latency, per_token_latency=args.per_token_latency,
+                      completion_tokens=args.completion_tokens)
+    print(f"Fake OpenAI at {fake.url} (set OPENAI_BASE_URL to this)")
+    fake._server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+# benchmarks/load_test.py
+
+"""
+Offline load test for main.py: boots the real FastAPI app with uvicorn in a
+subprocess, wired to local fakes instead of paid or shared services:
+
+    OpenAI            benchmarks/fake_openai.py   (chat completions + embeddings, configurable latency)
+    mcp-atlassian     benchmarks/fake_mcp_server.py --toolset atlassian (streamable HTTP)
+    mcp/notion        benchmarks/fake_mcp_server.py --toolset notion
+    Jira (JiraTools)  benchmarks/fake_jira.py
+    vector store      VECTOR_BACKEND=local, over synthetic Notion/Confluence snapshots
+
+then drives each endpoint at each concurrency level with a closed loop of
+clients and reports latency percentiles, throughput, errors (429s and 504s
+from admission control included), LLM calls per request and the server's RSS.
+The app runs in a temporary working directory, so exports, caches and vector
+files in the checkout are not touched.
+
+    python -m benchmarks.load_test --endpoints chat,team_chat --concurrency 1,4,16 --requests 48
+    python -m benchmarks.load_test --endpoints team_chat/stream --chat-latency 1 --per-token-latency 0.02
+
+Other server settings (TEAM_MODE, TEAM_CHAT_WORKERS, AGENT_POOL_SIZE, ...) are
+taken from the environment as usual. Answers are never cached unless
+--answer-cache is given, and every request uses a distinct prompt.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.fake_jira import FakeJira
+from benchmarks.fake_mcp_server import FakeMCPServer
+from benchmarks.fake_openai import FakeOpenAI
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUESTIONS = [
+    "What is the status of the current sprint for release {n}?",
+    "Summarize the roadmap for feature {n} and who owns it.",
+    "Which issues are blocked for milestone {n}?",
+    "Where is the deployment procedure for service {n} documented?",
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of `values` (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+
+def rss_mb(pid):
+    """(current, peak) resident set size of `pid` in MB, or (None, None) without /proc."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["VmRSS"].split()[0]) / 1024, int(fields["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def write_knowledge(workdir, docs):
+    """Synthetic Notion and Confluence snapshots for the knowledge bases to load."""
+    import knowledge_snapshot
+    from data import CSV_COLUMNS
+    from import_confluence import CHUNK_COLUMNS
+
+    notion = [{"Database ID": f"db-{i % 5}", "Database Title": f"Roadmap {i % 5}", "Page ID": f"page-{i}",
+               "Page Title": f"Feature {i} plan", "Summary": f"Feature {i} ships in release {i % 12}; owner team {i % 7}."}
+              for i in range(docs)]
+    chunks = [{"chunk_id": f"{100000 + i}-0", "page_id": str(100000 + i), "title": f"Service {i} runbook",
+               "space_key": "KNOCCS", "version_number": "1", "heading": "Deployment",
+               "text": f"To deploy service {i}, run the pipeline for milestone {i % 9} and verify the health checks."}
+              for i in range(docs)]
+    knowledge_snapshot.write_snapshot(os.path.join(workdir, "notion_pages.csv"), notion, CSV_COLUMNS)
+    knowledge_snapshot.write_snapshot(os.path.join(workdir, "knoccs_confluence_chunks.csv"), chunks, CHUNK_COLUMNS)
+
+
+class Fakes:
+    """Every fake backend the app talks to, started together."""
+
+    def __init__(self, args, models=None):
+        self.openai = FakeOpenAI(latency=args.embedding_latency, chat_latency=args.chat_latency,
+                                 per_token_latency=args.per_token_latency, completion_tokens=args.completion_tokens,
+                                 models=models)
+        self.atlassian = FakeMCPServer(latency=args.tool_latency, port=free_port(), toolset="atlassian")
+        self.notion = FakeMCPServer(latency=args.tool_latency, port=free_port(), toolset="notion")
+        self.jira = FakeJira(latency=args.tool_latency)
+
+    def __enter__(self):
+        for fake in (self.openai, self.atlassian, self.notion, self.jira):
+            fake.start()
+        return self
+
+    def __exit__(self, *exc):
+        for fake in (self.openai, self.atlassian, self.notion, self.jira):
+            fake.stop()
+
+    def env(self):
+        return {
+            "OPENAI_API_KEY": "sk-fake",
+            "OPENAI_BASE_URL": self.openai.url,
+            "OPENAI_API_BASE": self.openai.url,
+            "MCP_ATLASSIAN_URL": self.atlassian.url,
+            "MCP_NOTION_URL": self.notion.url,
+            "JIRA_URL": self.jira.url,
+            "JIRA_USERNAME": "bench",
+            "JIRA_API_TOKEN": "bench",
+        }
+
+    def calls(self):
+        return {"llm": self.openai.requests["chat"],
+                "tools": sum(self.atlassian.calls.values()) + sum(self.notion.calls.values())
+                + sum(n for name, n in self.jira.requests.items() if "serverInfo" not in name and "field" not in name)}
+
+
+def app_env(fakes, workdir, answer_cache=False):
+    """Environment for main:app: the fakes, the local vector store and no background sync."""
+    env = {
+        **fakes.env(),
+        "VECTOR_BACKEND": "local",
+        "LOCAL_VECTOR_DIR": os.path.join(workdir, "vector_store"),
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.sqlite3"),
+        "SYNC_ENABLED": "false",
+    }
+    if not answer_cache:
+        env["ANSWER_CACHE_BACKEND"] = "off"
+    return env
+
+
+class AppServer:
+    """uvicorn main:app in a subprocess, in its own working directory."""
+
+    def __init__(self, workdir, env, port):
+        self.workdir = workdir
+        self.env = env
+        self.port = port
+        self.process = None
+        self.log_path = os.path.join(workdir, "server.log")
+        self._log = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout):
+        env = {**os.environ, **self.env, "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")]))}
+        self._log = open(self.log_path, "w")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning"],
+            cwd=self.workdir, env=env, stdout=self._log, stderr=subprocess.STDOUT,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with {self.process.returncode}, see {self.log_path}")
+            try:
+                # uvicorn only accepts connections once the startup event has finished
+                if httpx.get(f"{self.url}/mcp/status", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise TimeoutError(f"Server not ready after {timeout:.0f}s, see {self.log_path}")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self._log is not None:
+            self._log.close()
+
+
+async def one_request(client, endpoint, prompt, force_all=False):
+    """(status, seconds, seconds to first token or None) for one request."""
+    started = time.perf_counter()
+    body = {"message": prompt, "force_all": force_all}
+    if not endpoint.endswith("/stream"):
+        response = await client.post(f"/{endpoint}", json=body)
+        return response.status_code, time.perf_counter() - started, None
+
+    first_token, status = None, None
+    async with client.stream("POST", f"/{endpoint}", json=body) as response:
+        status = response.status_code
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[7:]
+                if event == "token" and first_token is None:
+                    first_token = time.perf_counter() - started
+                elif event == "error":
+                    status = 599  # failed after the 200 was sent
+    return status, time.perf_counter() - started, first_token
+
+
+async def run_level(server, fakes, endpoint, concurrency, requests, timeout, offset, force_all=False):
+    results, counter = [], iter(range(requests))
+    peak = [0.0]
+
+    async def client_loop(client):
+        for n in counter:
+            prompt = QUESTIONS[n % len(QUESTIONS)].format(n=offset + n)
+            try:
+                results.append(await one_request(client, endpoint, prompt, force_all))
+            except httpx.HTTPError as ex:
+                results.append((type(ex).__name__, timeout, None))
+
+    async def sample_memory():
+        while True:
+            current, _ = rss_mb(server.process.pid)
+            peak[0] = max(peak[0], current or 0.0)
+            await asyncio.sleep(0.1)
+
+    calls_before = fakes.calls()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=server.url, timeout=timeout, limits=limits) as client:
+        sampler = asyncio.ensure_future(sample_memory())
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+    calls_after = fakes.calls()
+
+    ok = [r for r in results if r[0] == 200]
+    latencies = [r[1] for r in ok]
+    first_tokens = [r[2] for r in ok if r[2] is not None]
+    errors = {}
+    for status, _, _ in results:
+        if status != 200:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "ttft_p50_ms": round(percentile(first_tokens, 50) * 1000, 1) if first_tokens else None,
+        "llm_calls_per_request": round((calls_after["llm"] - calls_before["llm"]) / max(1, len(results)), 2),
+        "tool_calls_per_request": round((calls_after["tools"] - calls_before["tools"]) / max(1, len(results)), 2),
+        "rss_mb": round(rss_mb(server.process.pid)[0] or 0.0, 1),
+        "peak_rss_mb": round(peak[0], 1),
+    }
+
+
+def print_header():
+    print(f"{'endpoint':<18} {'conc':>4} {'ok/req':<9} {'errors':<12} {'req/s':>7} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'ttft ms':>8} {'llm/r':>5} {'tool/r':>5} {'rss MB':>7} {'peak':>7}")
+
+
+def print_row(row):
+    errors = ",".join(f"{k}:{v}" for k, v in sorted(row["errors"].items())) or "-"
+    ttft = f"{row['ttft_p50_ms']:>8.0f}" if row["ttft_p50_ms"] is not None else f"{'-':>8}"
+    print(f"{row['endpoint']:<18} {row['concurrency']:>4} {row['ok']:>4}/{row['requests']:<4} {errors:<12} "
+          f"{row['throughput_rps']:>7.2f} {row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f} {row['p99_ms']:>8.0f} {ttft} "
+          f"{row['llm_calls_per_request']:>5.1f} {row['tool_calls_per_request']:>5.1f} "
+          f"{row['rss_mb']:>7.0f} {row['peak_rss_mb']:>7.0f}")
+
+
+async def run_all(server, fakes, args):
+    rows, offset = [], 0
+    for endpoint in args.endpoints:
+        # One untimed request per endpoint so lazy setup is not counted
+        async with httpx.AsyncClient(base_url=server.url, timeout=args.timeout) as client:
+            await one_request(client, endpoint, f"warm-up for {endpoint}")
+        for concurrency in args.concurrency:
+            requests = max(args.requests, concurrency)
+            row = await run_level(server, fakes, endpoint, concurrency, requests, args.timeout, offset, args.force_all)
+            offset += requests
+            print_row(row)
+            rows.append(row)
+    return rows
+
+
+def add_arguments(parser):
+    """Load and fake-backend options shared with the other app-level benchmarks."""
+    parser.add_argument("--endpoints", default="chat,team_chat",
+                        help="comma separated: chat, team_chat, chat/stream, team_chat/stream")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma separated client counts")
+    parser.add_argument("--requests", type=int, default=32, help="requests per endpoint and concurrency level")
+    parser.add_argument("--timeout", type=float, default=300, help="client timeout per request (s)")
+    parser.add_argument("--chat-latency", type=float, default=0.3, help="fake LLM time to first token (s)")
+    parser.add_argument("--per-token-latency", type=float, default=0.005, help="fake LLM time per token (s)")
+    parser.add_argument("--completion-tokens", type=int, default=60, help="words per fake LLM answer")
+    parser.add_argument("--embedding-latency", type=float, default=0.02, help="fake embeddings round trip (s)")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="fake MCP/Jira latency per call (s)")
+    parser.add_argument("--docs", type=int, default=500, help="synthetic rows per knowledge base")
+    parser.add_argument("--answer-cache", action="store_true", help="leave the answer cache on")
+    parser.add_argument("--force-all", action="store_true", help="ask /team_chat to consult every specialist")
+    parser.add_argument("--startup-timeout", type=float, default=180)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the working directory (server.log, vector files)")
+
+
+def parse_arguments(parser):
+    args = parser.parse_args()
+    args.endpoints = [e.strip().strip("/") for e in args.endpoints.split(",") if e.strip()]
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    return args
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    args = parse_arguments(parser)
+
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    write_knowledge(workdir, args.docs)
+    server = None
+    try:
+        with Fakes(args) as fakes:
+            server = AppServer(workdir, app_env(fakes, workdir, args.answer_cache), free_port())
+            started = time.perf_counter()
+            server.start(args.startup_timeout)
+            print(f"App ready in {time.perf_counter() - started:.1f}s, RSS {rss_mb(server.process.pid)[0] or 0:.0f} MB "
+                  f"({args.docs} rows per knowledge base, TEAM_MODE={os.getenv('TEAM_MODE', 'parallel')})")
+            print_header()
+            rows = asyncio.run(run_all(server, fakes, args))
+            if args.json:
+                with open(args.json, "w") as f:
+                    json.dump({"settings": vars(args), "results": rows}, f, indent=2)
+    finally:
+        if server is not None:
+            server.stop()
+        if args.keep:
+            print(f"Working directory kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 # agents/confluence_agent.py
 
-from phi.knowledge.csv import CSVKnowledgeBase
-from phi.vectordb.pgvector import PgVector
+from hybrid_retrieval import HybridCSVKnowledgeBase
+from vector_store import make_vector_db
 from phi.agent import Agent
+from agent_pool import AgentPool
+from import_confluence import ensure_chunks
+from model_config import escalation_model_id, phi_model
 import os
 from dotenv import load_dotenv
 
@@ -17,6 +20,21 @@ os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
 _confluence_knowledge_base = None
 _knowledge_base_loaded = False
 
+def create_confluence_knowledge_base():
+    """
+    Build (but do not load) the Confluence knowledge base: one document per page chunk, keyed by chunk_id.
+    The chunks are generated from knoccs_confluence.csv first if no export has written them yet.
+    """
+    if ensure_chunks("knoccs_confluence.csv"):
+        print("Built knoccs_confluence_chunks.csv from knoccs_confluence.csv")
+    return HybridCSVKnowledgeBase(
+        path="knoccs_confluence_chunks.csv",
+        id_column="chunk_id",
+        title_column="title",
+        content_columns=["title", "heading", "text"],
+        vector_db=make_vector_db("csv_documents_confluence"),
+    )
+
 def get_confluence_knowledge_base():
     """
     Singleton function to get or create the Confluence knowledge base.
@@ -26,27 +44,18 @@ def get_confluence_knowledge_base():
     
     if _confluence_knowledge_base is None:
         print("Initializing Confluence knowledge base for the first time...")
-        _confluence_knowledge_base = CSVKnowledgeBase(
-            path="knoccs_confluence.csv",
-            vector_db=PgVector(
-                table_name="csv_documents_confluence",
-                db_url="postgresql+psycopg://ai:ai@localhost:5532/ai",
-            ),
-        )
+        _confluence_knowledge_base = create_confluence_knowledge_base()
         
-        # Load the knowledge base only once
+        # Sync the knowledge base only once; only new or changed rows are embedded
         if not _knowledge_base_loaded:
             try:
-                print("Loading Confluence knowledge base...")
-                _confluence_knowledge_base.load(recreate=False)
-                _knowledge_base_loaded = True
+                print("Syncing Confluence knowledge base...")
+                _confluence_knowledge_base.sync()
                 print("Confluence knowledge base loaded successfully!")
             except Exception as e:
-                print(f"Error loading Confluence knowledge base: {e}")
-                print("Attempting to recreate knowledge base...")
-                _confluence_knowledge_base.load(recreate=True)
-                _knowledge_base_loaded = True
-                print("Confluence knowledge base recreated successfully!")
+                # Serve whatever is already in the vector db rather than re-embedding everything
+                print(f"Error syncing Confluence knowledge base: {e}")
+            _knowledge_base_loaded = True
     else:
         print("Using existing Confluence knowledge base instance")
     
@@ -61,6 +70,7 @@ def make_confluence_agent():
     
     agent = Agent(
         name="Confluence Knowledge Specialist",
+        model=phi_model("specialist", "confluence"),
         role="Expert technical documentation and procedural knowledge specialist focused on Confluence-based organizational information",
         description="You are a specialized Confluence documentation expert that excels at finding technical documentation, procedural guides, organizational knowledge, and process information stored in Confluence. You provide detailed technical context and procedural guidance for projects and organizational processes.",
         knowledge=knowledge_base,
@@ -85,6 +95,20 @@ def make_confluence_agent():
     
     return agent
 
+# Reused Confluence agents; each run gets a fresh session
+confluence_agents = AgentPool(make_confluence_agent, name="confluence", escalate_to=escalation_model_id("specialist", "confluence"))
+
+def refresh_confluence_knowledge_base():
+    """
+    Re-read the CSV into the already-loaded knowledge base, e.g. after a background sync.
+    Does nothing if the knowledge base has not been created yet.
+    """
+    if _confluence_knowledge_base is None:
+        return
+    print("Refreshing Confluence knowledge base...")
+    _confluence_knowledge_base.sync()
+    print("Confluence knowledge base refreshed!")
+
 def reset_confluence_knowledge_base():
     """
     Utility function to reset the knowledge base (useful for development/testing).
@@ -125,24 +149,14 @@ class ConfluenceKnowledgeBaseSingleton:
             with self._lock:
                 if not hasattr(self, 'knowledge_base') or not self._loaded:
                     print("Initializing thread-safe Confluence knowledge base...")
-                    self.knowledge_base = CSVKnowledgeBase(
-                        path="knoccs_confluence.csv",
-                        vector_db=PgVector(
-                            table_name="csv_documents_confluence",
-                            db_url="postgresql+psycopg://ai:ai@localhost:5532/ai",
-                        ),
-                    )
+                    self.knowledge_base = create_confluence_knowledge_base()
                     try:
-                        print("Loading Confluence knowledge base (thread-safe)...")
-                        self.knowledge_base.load(recreate=False)
-                        self._loaded = True
+                        print("Syncing Confluence knowledge base (thread-safe)...")
+                        self.knowledge_base.sync()
                         print("Confluence knowledge base loaded successfully!")
                     except Exception as e:
-                        print(f"Error loading knowledge base: {e}")
-                        print("Attempting to recreate...")
-                        self.knowledge_base.load(recreate=True)
-                        self._loaded = True
-                        print("Confluence knowledge base recreated successfully!")
+                        print(f"Error syncing knowledge base: {e}")
+                    self._loaded = True
         
         return self.knowledge_base
     
@@ -163,6 +177,7 @@ def make_confluence_agent_threadsafe():
     
     agent = Agent(
         name="Confluence Knowledge Specialist",
+        model=phi_model("specialist", "confluence"),
         role="Expert technical documentation and procedural knowledge specialist focused on Confluence-based organizational information",
         description="You are a specialized Confluence documentation expert that excels at finding technical documentation, procedural guides, organizational knowledge, and process information stored in Confluence. You provide detailed technical context and procedural guidance for projects and organizational processes.",
         knowledge=knowledge_base,
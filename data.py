@@ -1,53 +1,253 @@
+import asyncio
 import os
-import csv
+import json
+from datetime import datetime, timedelta, timezone
+import httpx
 from dotenv import load_dotenv
-from notion_client import Client
+from notion_client import APIErrorCode, APIResponseError, AsyncClient
+
+import knowledge_snapshot
 
 # Load token
 load_dotenv()
 NOTION_TOKEN = os.getenv("NOTION_API_KEY")
-if not NOTION_TOKEN:
-    raise RuntimeError("NOTION_API_KEY is not set in the environment or .env file")
 
-notion = Client(auth=NOTION_TOKEN)
+OUTPUT_FILE = "notion_pages.csv"
+CSV_COLUMNS = ["Database ID", "Database Title", "Page ID", "Page Title", "Summary"]
+
+# Databases queried at once; Notion allows ~3 requests/s per integration on average
+SYNC_WORKERS = int(os.getenv("NOTION_SYNC_WORKERS", "4"))
+# Incremental syncs cannot see permanently deleted pages, so do a full sync this often
+FULL_SYNC_INTERVAL_HOURS = float(os.getenv("NOTION_FULL_SYNC_INTERVAL_HOURS", "24"))
+# last_edited_time is truncated to the minute, so look back a little further than the last sync
+EDIT_TIME_MARGIN = timedelta(minutes=2)
+MAX_RETRIES = 5
+
+
+def get_notion_client(transport=None):
+    """
+    AsyncClient for the Notion API; with `transport` its connections come from
+    a pool shared with the other exporters (see ingestion.py).
+    """
+    if not NOTION_TOKEN:
+        raise RuntimeError("NOTION_API_KEY is not set in the environment or .env file")
+    client = httpx.AsyncClient(transport=transport) if transport is not None else None
+    return AsyncClient(auth=NOTION_TOKEN, client=client)
+
+
+def state_path(output_file):
+    return f"{os.path.splitext(output_file)[0]}.state.json"
+
+
+def load_state(output_file):
+    try:
+        with open(state_path(output_file), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(output_file, state):
+    tmp_path = f"{state_path(output_file)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path(output_file))
+
+
+def load_existing_rows(output_file):
+    """
+    Page ID -> row (as a dict) from the previous export, if any.
+    """
+    try:
+        return {row["Page ID"]: row for row in knowledge_snapshot.read_rows(output_file)}
+    except OSError:
+        return {}
+
+
+async def with_retries(call, **kwargs):
+    """
+    Call the Notion API, backing off exponentially when rate limited.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return await call(**kwargs)
+        except APIResponseError as ex:
+            if ex.code != APIErrorCode.RateLimited or attempt == MAX_RETRIES:
+                raise
+            await asyncio.sleep(2 ** attempt)
+
+
+async def list_databases(notion):
+    """
+    Every database the integration has access to, following search pagination.
+    """
+    databases = []
+    next_cursor = None
+    while True:
+        kwargs = {"filter": {"property": "object", "value": "database"}}
+        if next_cursor:
+            kwargs["start_cursor"] = next_cursor
+        response = await with_retries(notion.search, **kwargs)
+        databases.extend(response.get("results", []))
+        if not response.get("has_more"):
+            return databases
+        next_cursor = response.get("next_cursor")
+
+
+def database_title(db):
+    return db["title"][0]["plain_text"] if db.get("title") else "Untitled"
+
+
+def page_row(db_id, db_title, page):
+    page_id = page["id"]
+
+    # Extract page title
+    title_prop = page["properties"].get("Name", {}).get("title", [])
+    page_title = title_prop[0]["plain_text"] if title_prop else "Untitled"
+
+    # For summary, pull text from a text property (adjust as needed)
+    summary = ""
+    for prop_name, prop_value in page["properties"].items():
+        if prop_value["type"] == "rich_text" and prop_value["rich_text"]:
+            summary = prop_value["rich_text"][0]["plain_text"]
+            break
+
+    return {"Database ID": db_id, "Database Title": db_title, "Page ID": page_id,
+            "Page Title": page_title, "Summary": summary}
+
+
+async def query_database(notion, db_id, since=None):
+    """
+    All pages of a database, or only those edited on or after `since` (ISO timestamp).
+    """
+    pages = []
+    has_more = True
+    next_cursor = None
+
+    while has_more:
+        kwargs = {"database_id": db_id, "start_cursor": next_cursor}
+        if since:
+            kwargs["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since}}
+        response = await with_retries(notion.databases.query, **kwargs)
+        pages.extend(response.get("results", []))
+        has_more = response.get("has_more", False)
+        next_cursor = response.get("next_cursor")
+
+    return pages
+
+
+def write_rows(output_file, rows):
+    knowledge_snapshot.write_export(output_file, rows, CSV_COLUMNS)
+
+
+def plan_sync(output_file, incremental):
+    """
+    Load the previous export and state and decide between a full and an
+    incremental sync. Returns (started_at, state, existing_rows, full_sync, since).
+    """
+    started_at = datetime.now(timezone.utc)
+    state = load_state(output_file) if incremental else {}
+    existing_rows = load_existing_rows(output_file)
+
+    last_full = state.get("last_full_sync")
+    full_sync = (
+        not state.get("last_sync")
+        or not existing_rows
+        or not last_full
+        or started_at - datetime.fromisoformat(last_full) > timedelta(hours=FULL_SYNC_INTERVAL_HOURS)
+    )
+    since = None
+    if not full_sync:
+        since = (datetime.fromisoformat(state["last_sync"]) - EDIT_TIME_MARGIN).isoformat()
+    return started_at, state, existing_rows, full_sync, since
+
+
+def merge_and_write(output_file, titles, changed_pages, existing_rows, state, started_at, full_sync):
+    """
+    Merge the fetched pages into the existing rows by Page ID, write the
+    export if anything changed and record the sync. Returns the page count.
+    """
+    if full_sync:
+        rows = {}
+    else:
+        # keep rows of databases that are still shared, picking up database renames
+        rows = {
+            page_id: {**row, "Database Title": titles[row["Database ID"]]}
+            for page_id, row in existing_rows.items()
+            if row["Database ID"] in titles
+        }
+    changed = 0
+    for db_id, pages in changed_pages.items():
+        for page in pages:
+            if page.get("archived") or page.get("in_trash"):
+                rows.pop(page["id"], None)
+                continue
+            rows[page["id"]] = page_row(db_id, titles[db_id], page)
+            changed += 1
+
+    if list(rows.values()) != list(existing_rows.values()):
+        write_rows(output_file, rows.values())
+    else:
+        print(f"No changes in {output_file}")
+
+    state["last_sync"] = started_at.isoformat()
+    if full_sync:
+        state["last_full_sync"] = started_at.isoformat()
+    save_state(output_file, state)
+
+    print(
+        f"Notion {'full' if full_sync else 'incremental'} export done, {len(rows)} pages stored in {output_file} "
+        f"({changed} fetched, {len(set(existing_rows) - set(rows))} removed)"
+    )
+    return len(rows)
 
-# CSV setup
-output_file = "notion_pages.csv"
-with open(output_file, mode="w", newline="", encoding="utf-8") as file:
-    writer = csv.writer(file)
-    writer.writerow(["Database ID", "Database Title", "Page ID", "Page Title", "Summary"])
 
-    # Step 1: List all databases the integration has access to
-    search_results = notion.search(filter={"property": "object", "value": "database"}).get("results", [])
+async def export_notion_pages_async(output_file=OUTPUT_FILE, incremental=True, transport=None):
+    """
+    Export every page of every database the integration can see to an Arrow
+    snapshot (notion_pages.arrow), plus a CSV when KNOWLEDGE_CSV_EXPORT is on.
 
-    for db in search_results:
-        db_id = db["id"]
-        db_title = db["title"][0]["plain_text"] if db.get("title") else "Untitled"
+    Databases are queried concurrently, at most NOTION_SYNC_WORKERS at a time,
+    with notion_client.AsyncClient on the caller's event loop; reading and
+    writing the export happen on worker threads. In incremental mode only
+    pages edited since the last successful sync are fetched and merged into
+    the existing export by Page ID, and databases missing from the export
+    are fetched in full; archived pages and pages of databases that are no
+    longer shared are dropped. A full sync still runs every
+    NOTION_FULL_SYNC_INTERVAL_HOURS to catch permanently deleted pages.
+    Returns the number of pages in the export.
+    """
+    notion = get_notion_client(transport)
+    started_at, state, existing_rows, full_sync, since = await asyncio.to_thread(plan_sync, output_file, incremental)
+    query_slots = asyncio.Semaphore(SYNC_WORKERS)
+    # Databases with no rows in the previous export (e.g. newly shared) are fetched in full
+    exported_dbs = {row["Database ID"] for row in existing_rows.values()}
 
-        print(f"Fetching pages for database: {db_title} ({db_id})")
+    async def fetch(db_id, db_title):
+        db_since = since if db_id in exported_dbs else None
+        async with query_slots:
+            print(f"Fetching {'changed' if db_since else 'all'} pages for database: {db_title} ({db_id})")
+            return await query_database(notion, db_id, db_since)
 
-        # Step 2: Query all pages from database
-        has_more = True
-        next_cursor = None
+    try:
+        titles = {db["id"]: database_title(db) for db in await list_databases(notion)}
+        pages = await asyncio.gather(*(fetch(db_id, db_title) for db_id, db_title in titles.items()))
+    finally:
+        if transport is None:
+            await notion.aclose()
 
-        while has_more:
-            response = notion.databases.query(database_id=db_id, start_cursor=next_cursor)
-            pages = response.get("results", [])
-            has_more = response.get("has_more", False)
-            next_cursor = response.get("next_cursor")
+    changed_pages = dict(zip(titles, pages))
+    return await asyncio.to_thread(
+        merge_and_write, output_file, titles, changed_pages, existing_rows, state, started_at, full_sync
+    )
 
-            for page in pages:
-                page_id = page["id"]
 
-                # Extract page title
-                title_prop = page["properties"].get("Name", {}).get("title", [])
-                page_title = title_prop[0]["plain_text"] if title_prop else "Untitled"
+def export_notion_pages(output_file=OUTPUT_FILE, incremental=True):
+    """
+    Blocking form of export_notion_pages_async, for scripts and worker threads.
+    """
+    return asyncio.run(export_notion_pages_async(output_file, incremental))
 
-                # For summary, pull text from a text property (adjust as needed)
-                summary = ""
-                for prop_name, prop_value in page["properties"].items():
-                    if prop_value["type"] == "rich_text" and prop_value["rich_text"]:
-                        summary = prop_value["rich_text"][0]["plain_text"]
-                        break
 
-                writer.writerow([db_id, db_title, page_id, page_title, summary])
+if __name__ == "__main__":
+    export_notion_pages()
@@ -0,0 +1,163 @@
+# embedding_cache.py
+
+import os
+import sqlite3
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from typing import Dict, List, Optional, Tuple
+
+from openai import OpenAI as OpenAIClient
+from phi.embedder.openai import OpenAIEmbedder
+from pydantic import PrivateAttr
+
+# OpenAI accepts up to 2048 inputs per embeddings request (and ~300k tokens in total)
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_CHARS_PER_REQUEST = 600_000
+
+
+def text_hash(text: str) -> str:
+    return sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent (model, dimensions, text hash) -> float32 vector store in SQLite,
+    so texts we have embedded once are never paid for again, even after the
+    vector db is dropped or recreated.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._lock, self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT, dimensions INTEGER, text_hash TEXT, embedding BLOB,"
+                " PRIMARY KEY (model, dimensions, text_hash))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, model: str, dimensions: int, hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock, self._connect() as conn:
+            # stay well below SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT text_hash, embedding FROM embeddings WHERE model = ? AND dimensions = ?"
+                    f" AND text_hash IN ({','.join('?' * len(chunk))})",
+                    (model, dimensions, *chunk),
+                )
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, model: str, dimensions: int, items: Dict[str, List[float]]):
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                [(model, dimensions, key, array("f", vector).tobytes()) for key, vector in items.items()],
+            )
+
+
+class CachedBatchEmbedder(OpenAIEmbedder):
+    """
+    OpenAIEmbedder backed by an on-disk embedding cache, with a bulk
+    embed_batch() that sends up to MAX_INPUTS_PER_REQUEST texts per request
+    and runs a few requests concurrently.
+
+    knowledge_sync warms the cache through embed_batch() before upserting, so
+    the per-document get_embedding_and_usage() calls made by the vector db are
+    all cache hits.
+    """
+
+    cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", "embeddings.sqlite3")
+    batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", str(MAX_INPUTS_PER_REQUEST)))
+    concurrency: int = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+
+    _cache: Optional[EmbeddingCache] = PrivateAttr(default=None)
+    _cache_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def client(self) -> OpenAIClient:
+        # phi builds a new client (and connection pool) per request; build it once instead
+        with self._cache_lock:
+            if self.openai_client is None:
+                self.openai_client = super().client
+            return self.openai_client
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        with self._cache_lock:
+            if self._cache is None:
+                self._cache = EmbeddingCache(self.cache_path)
+            return self._cache
+
+    def _lookup(self, text: str) -> Optional[List[float]]:
+        key = text_hash(text)
+        return self.cache.get_many(self.model, self.dimensions, [key]).get(key)
+
+    def get_embedding(self, text: str) -> List[float]:
+        return self.get_embedding_and_usage(text)[0]
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        cached = self._lookup(text)
+        if cached is not None:
+            return cached, None
+        embedding, usage = super().get_embedding_and_usage(text)
+        if embedding:
+            self.cache.put_many(self.model, self.dimensions, {text_hash(text): embedding})
+        return embedding, usage
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        batches, current, chars = [], [], 0
+        for text in texts:
+            if current and (len(current) >= self.batch_size or chars + len(text) > MAX_CHARS_PER_REQUEST):
+                batches.append(current)
+                current, chars = [], 0
+            current.append(text)
+            chars += len(text)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_request(self, texts: List[str]) -> Dict[str, List[float]]:
+        request_params = {"input": texts, "model": self.model, "encoding_format": self.encoding_format}
+        if self.user is not None:
+            request_params["user"] = self.user
+        if self.model.startswith("text-embedding-3"):
+            request_params["dimensions"] = self.dimensions
+        if self.request_params:
+            request_params.update(self.request_params)
+        response = self.client.embeddings.create(**request_params)
+        vectors = {text_hash(texts[item.index]): item.embedding for item in response.data}
+        self.cache.put_many(self.model, self.dimensions, vectors)
+        return vectors
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed many texts at once, only sending the ones missing from the cache.
+        Returns the vectors in the order of `texts`.
+        """
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model, self.dimensions, list(set(hashes)))
+
+        missing, seen = [], set()
+        for text, key in zip(texts, hashes):
+            if key not in vectors and key not in seen:
+                missing.append(text)
+                seen.add(key)
+
+        if missing:
+            batches = self._batches(missing)
+            with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(batches)))) as pool:
+                for result in pool.map(self._embed_request, batches):
+                    vectors.update(result)
+            print(f"Embedded {len(missing)} new texts in {len(batches)} requests ({len(texts) - len(missing)} cached)")
+
+        return [vectors[key] for key in hashes]
@@ -0,0 +1,145 @@
+# hybrid_retrieval.py
+
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from phi.document import Document
+from pydantic import PrivateAttr
+
+from knowledge_sync import RowCSVKnowledgeBase
+from tracing import span
+
+# Share of the fused score given to keyword matches (0: vector only, 1: keyword only)
+HYBRID_KEYWORD_WEIGHT = float(os.getenv("HYBRID_KEYWORD_WEIGHT", "0.5"))
+# Standard reciprocal rank fusion constant; larger values flatten the rank curve
+RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+# Candidates fetched from each retriever per document returned
+CANDIDATE_FACTOR = 4
+# Title terms count this many times, so an exact page or database title wins
+TITLE_BOOST = 3
+
+# Keeps identifiers like "V6.1.1", "KNOCCS-123" or "api_v2" together
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[._\-/][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms; compound identifiers are kept whole and also split into their parts.
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = re.split(r"[._\-/]", token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+
+class BM25Index:
+    """
+    In-memory inverted index over document titles and bodies, scored with Okapi BM25.
+    """
+
+    def __init__(self, documents: List[Document], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+        for i, doc in enumerate(documents):
+            terms = Counter(tokenize(doc.content))
+            for term in tokenize(doc.meta_data.get("title") or doc.name or ""):
+                terms[term] += TITLE_BOOST
+            for term, tf in terms.items():
+                self.postings[term].append((i, tf))
+            self.lengths.append(sum(terms.values()))
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.documents) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf(term)
+            for i, tf in self.postings.get(term, ()):
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.average_length)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        if filters:
+            ranked = [i for i in ranked
+                      if all(self.documents[i].meta_data.get(k) == v for k, v in filters.items())]
+        return [self.documents[i] for i in ranked[:limit]]
+
+
+def reciprocal_rank_fusion(rankings: List[Tuple[List[Document], float]], limit: int, k: int = RRF_K) -> List[Document]:
+    """
+    Merge ranked lists of (documents, weight) into one, scoring each document
+    by the weighted sum of 1 / (k + rank) over the lists it appears in.
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    documents: Dict[str, Document] = {}
+    for ranking, weight in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id or doc.content
+            scores[key] += weight / (k + rank)
+            documents.setdefault(key, doc)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)[:limit]]
+
+
+class HybridCSVKnowledgeBase(RowCSVKnowledgeBase):
+    """
+    Row knowledge base whose search fuses vector results with a BM25 keyword
+    index over the same rows, so exact identifiers (release names, page and
+    database titles) are found in the first retrieval.
+    """
+
+    keyword_weight: float = HYBRID_KEYWORD_WEIGHT
+
+    _index: Optional[BM25Index] = PrivateAttr(default=None)
+    _index_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def build_index(self) -> BM25Index:
+        documents = [doc for document_list in self.document_lists for doc in document_list]
+        index = BM25Index(documents)
+        self._index = index
+        return index
+
+    @property
+    def keyword_index(self) -> BM25Index:
+        with self._index_lock:
+            return self._index or self.build_index()
+
+    def sync(self) -> Dict[str, int]:
+        stats = super().sync()
+        with self._index_lock:
+            self.build_index()
+        return stats
+
+    def search(
+        self, query: str, num_documents: Optional[int] = None, filters: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        limit = num_documents or self.num_documents
+        # One metric per knowledge base (notion_pages, knoccs_confluence_chunks), named like its row sources
+        source = Path(self.path).stem
+        with span("retrieval", "retrieval", source=source, metric_name=source, limit=limit):
+            if self.keyword_weight <= 0:
+                with span("vector_search", "vector_search"):
+                    return super().search(query, limit, filters)
+
+            candidates = limit * CANDIDATE_FACTOR
+            with span("keyword_search", "keyword_search"):
+                keyword_results = self.keyword_index.search(query, candidates, filters)
+            if self.keyword_weight >= 1:
+                return keyword_results[:limit]
+            with span("vector_search", "vector_search"):
+                vector_results = super().search(query, candidates, filters)
+            return reciprocal_rank_fusion(
+                [(vector_results, 1 - self.keyword_weight), (keyword_results, self.keyword_weight)], limit
+            )
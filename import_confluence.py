@@ -1,9 +1,15 @@
+import asyncio
 import os
-import requests
-from requests.auth import HTTPBasicAuth
+import random
+import threading
+from collections import Counter
+import httpx
 from dotenv import load_dotenv
-import csv
+import hashlib
+import json
 import urllib.parse
+from storage_chunker import chunk_storage, excerpt, storage_to_text
+import knowledge_snapshot
 
 load_dotenv()
 
@@ -14,110 +20,493 @@ API_TOKEN = os.getenv("CONFLUENCE_API_TOKEN")
 KEYWORD = "knoccs"  # change keyword as needed
 SPACE_KEY = os.getenv("CONFLUENCE_SPACE_KEY", None)  # optional: restrict to a space
 
-if not all([CONFLUENCE_URL, USERNAME, API_TOKEN]):
-    raise RuntimeError("Missing one of CONFLUENCE_URL, USERNAME, API_TOKEN")
+def check_config():
+    if not all([CONFLUENCE_URL, USERNAME, API_TOKEN]):
+        raise RuntimeError("Missing one of CONFLUENCE_URL, USERNAME, API_TOKEN")
+
+# Concurrency and retry tuning for the exporter
+FETCH_WORKERS = int(os.getenv("CONFLUENCE_FETCH_WORKERS", "8"))
+MAX_RETRIES = int(os.getenv("CONFLUENCE_MAX_RETRIES", "5"))
+BACKOFF_BASE_SECONDS = float(os.getenv("CONFLUENCE_BACKOFF_BASE_SECONDS", "1"))
+BACKOFF_MAX_SECONDS = float(os.getenv("CONFLUENCE_BACKOFF_MAX_SECONDS", "60"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+PAGE_SIZE = int(os.getenv("CONFLUENCE_PAGE_SIZE", "50"))
+# Documented maximum for content search; the server may still return fewer
+# results per page (e.g. with body expansions), which pagination handles
+MAX_PAGE_SIZE = 250
 
-auth = HTTPBasicAuth(USERNAME, API_TOKEN)
 headers = {
     "Accept": "application/json"
 }
 
-def search_keyword(keyword, space_key=None, limit=25, cursor=None):
+def make_client(transport=None):
     """
-    Search pages via CQL for keyword in title or text.
-    Returns a JSON response with results, maybe cursor for next.
+    Keep-alive async client for the Confluence REST API, with a connection per
+    fetch worker. Pass a shared `transport` (see ingestion.py) to draw from a
+    connection pool shared with the Notion export instead.
+    """
+    return httpx.AsyncClient(
+        auth=httpx.BasicAuth(USERNAME or "", API_TOKEN or ""),
+        headers=headers,
+        timeout=30,
+        limits=httpx.Limits(max_connections=FETCH_WORKERS + 1),
+        transport=transport,
+    )
+
+class RequestStats:
+    """
+    Thread-safe count of HTTP requests made by one export, by kind
+    ("search", "body") plus "retry" for every retried attempt.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, kind):
+        with self._lock:
+            self.counts[kind] += 1
+
+    @property
+    def total(self):
+        return sum(n for kind, n in self.counts.items() if kind != "retry")
+
+    def summary(self):
+        return ", ".join(f"{kind}={n}" for kind, n in sorted(self.counts.items())) or "none"
+
+def retry_delay(attempt, retry_after=None):
+    """
+    Seconds to wait before retry number `attempt` (0-based): the server's
+    Retry-After when given, otherwise capped exponential backoff with full jitter.
     """
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX_SECONDS)
+        except ValueError:
+            pass  # HTTP-date form; fall back to backoff
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+async def get_json(client, url, params=None, stats=None, kind="other"):
+    """
+    GET a Confluence REST URL, retrying rate limits (429), transient 5xx
+    responses and connection errors. Every attempt is recorded in `stats`.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        if stats is not None:
+            stats.record(kind if attempt == 0 else "retry")
+        try:
+            resp = await client.get(url, params=params)
+        except httpx.TransportError:
+            if attempt == MAX_RETRIES:
+                raise
+            await asyncio.sleep(retry_delay(attempt))
+            continue
+        if resp.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            delay = retry_delay(attempt, resp.headers.get("Retry-After"))
+            print(f"Confluence returned {resp.status_code}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        resp.raise_for_status()
+        return resp.json()
+
+def build_search_params(keyword, space_key=None, limit=PAGE_SIZE, include_body=True):
     # Build CQL
     cql_parts = ['type = page', f'(title ~ "{keyword}" OR text ~ "{keyword}")']
     if space_key:
         cql_parts.append(f'space = "{space_key}"')
     cql_query = " AND ".join(cql_parts)
 
-    params = {
+    return {
         "cql": cql_query,
-        "limit": limit,
-        "expand": "version,metadata.labels,space",
+        "limit": max(1, min(limit, MAX_PAGE_SIZE)),
+        "expand": search_expand(include_body),
     }
+
+def search_expand(include_body=True):
+    return "version,metadata.labels,space" + (",body.storage" if include_body else "")
+
+async def search_keyword(client, keyword, space_key=None, limit=PAGE_SIZE, cursor=None, include_body=True, stats=None):
+    """
+    Search pages via CQL for keyword in title or text.
+    Returns a JSON response with results; use next_page_url() to find the next page.
+    With `include_body` the storage body is expanded in the same call,
+    avoiding a separate content request per result.
+    """
+    params = build_search_params(keyword, space_key=space_key, limit=limit, include_body=include_body)
     if cursor:
         params["cursor"] = cursor
 
     url = f"{CONFLUENCE_URL.rstrip('/')}/wiki/rest/api/content/search"
-    resp = requests.get(url, headers=headers, auth=auth, params=params)
-    resp.raise_for_status()
-    return resp.json()
+    return await get_json(client, url, params, stats=stats, kind="search")
 
-def fetch_content_body(page_id):
+def next_page_url(search_results):
     """
-    Optional: fetch the body storage (or another representation) for the page
+    Absolute URL of the next search page, taken from `_links.next`
+    (which is relative to `_links.base`), or None on the last page.
+    """
+    links = search_results.get("_links", {})
+    next_link = links.get("next")
+    if not next_link:
+        return None
+    if next_link.startswith(("http://", "https://")):
+        return next_link
+
+    base = (links.get("base") or f"{CONFLUENCE_URL.rstrip('/')}/wiki").rstrip("/")
+    context = links.get("context", "")
+    # some deployments include the context path (e.g. /wiki) in the link itself
+    if context and next_link.startswith(context + "/") and base.endswith(context):
+        base = base[: -len(context)]
+    return base + next_link
+
+async def fetch_search_page(client, url, include_body=True, stats=None):
+    """
+    Follow a `_links.next` URL. The link carries the CQL, limit and cursor;
+    the expand list is re-added in case the server dropped it.
+    """
+    parts = urllib.parse.urlsplit(url)
+    params = dict(urllib.parse.parse_qsl(parts.query))
+    params.setdefault("expand", search_expand(include_body))
+    return await get_json(client, urllib.parse.urlunsplit(parts._replace(query="")), params, stats=stats, kind="search")
+
+async def fetch_content_body(client, page_id, stats=None):
+    """
+    Fallback: fetch the body storage (or another representation) for a page
+    whose search result came back without a body.
     """
     url = f"{CONFLUENCE_URL.rstrip('/')}/wiki/rest/api/content/{page_id}"
     params = {
         "expand": "body.storage,version,metadata.labels,space"
     }
-    resp = requests.get(url, headers=headers, auth=auth, params=params)
-    resp.raise_for_status()
-    return resp.json()
-
-def export_keyword_results(keyword, space_key=None, output_csv="knoccs_confluence.csv"):
-    with open(output_csv, mode='w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "page_id",
-            "title",
-            "space_key",
-            "version_number",
-            "labels",
-            "excerpt",  # truncated text/body
-        ])
-        # Pagination
-        cursor = None
-        while True:
-            search_results = search_keyword(keyword, space_key=space_key, limit=25, cursor=cursor)
+    return await get_json(client, url, params, stats=stats, kind="body")
+
+CSV_COLUMNS = [
+    "page_id",
+    "title",
+    "space_key",
+    "version_number",
+    "labels",
+    "excerpt",  # start of the page's clean text
+]
+
+# Heading-aware chunks of each page's clean text, which is what the knowledge base embeds
+CHUNK_COLUMNS = ["chunk_id", "page_id", "title", "space_key", "version_number", "heading", "text"]
+
+def chunks_path(output_csv):
+    return f"{os.path.splitext(output_csv)[0]}_chunks.csv"
+
+def manifest_path(output_csv):
+    return f"{os.path.splitext(output_csv)[0]}.manifest.json"
+
+def load_manifest(output_csv):
+    """
+    page_id -> {"version": ..., "hash": ...} from the previous export, if any.
+    """
+    try:
+        with open(manifest_path(output_csv), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(output_csv, manifest):
+    tmp_path = f"{manifest_path(output_csv)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path(output_csv))
+
+def load_existing_rows(output_csv):
+    """
+    page_id -> row (as a dict) from the previous export, if any.
+    """
+    try:
+        return {row["page_id"]: row for row in knowledge_snapshot.read_rows(output_csv)}
+    except OSError:
+        return {}
+
+def load_existing_chunks(output_csv):
+    """
+    page_id -> its chunk rows from the previous export, if any.
+    """
+    chunks = {}
+    try:
+        for row in knowledge_snapshot.read_rows(chunks_path(output_csv)):
+            chunks.setdefault(row["page_id"], []).append(row)
+    except OSError:
+        pass
+    return chunks
+
+def ensure_chunks(output_csv="knoccs_confluence.csv"):
+    """
+    Build the chunks export from the page export when only the latter exists
+    (a fresh checkout ships just knoccs_confluence.csv). Its excerpt column
+    stands in for the page body until the next sync fetches the full pages.
+    Returns True when chunks were written.
+    """
+    if knowledge_snapshot.exists(chunks_path(output_csv)):
+        return False
+    rows = load_existing_rows(output_csv)
+    if not rows:
+        return False
+    write_chunks(output_csv, {page_id: build_chunks(row, row.get("excerpt") or "") for page_id, row in rows.items()})
+    return True
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def build_row(item, body_storage):
+    """
+    Turn a search result plus its body storage value into a CSV row dict.
+    """
+    labels = []
+    # metadata.labels may be in item, or fetch via expand
+    md = item.get("metadata", {}).get("labels", {}).get("results", [])
+    if md:
+        labels = [lbl.get("name") for lbl in md]
+
+    return {
+        "page_id": item.get("id"),
+        "title": item.get("title") or "",
+        "space_key": item.get("space", {}).get("key") if item.get("space") else "",
+        "version_number": str(item.get("version", {}).get("number", "")),
+        "labels": ";".join(labels),
+        "excerpt": excerpt(storage_to_text(body_storage)) if body_storage else "",
+    }
+
+def build_chunks(row, body_storage):
+    """
+    Chunk rows for a page: its storage body split into clean-text chunks, tagged with the page metadata.
+    """
+    return [
+        {
+            "chunk_id": f"{row['page_id']}-{i}",
+            "page_id": row["page_id"],
+            "title": row["title"],
+            "space_key": row["space_key"],
+            "version_number": row["version_number"],
+            "heading": chunk["heading"],
+            "text": chunk["text"],
+        }
+        for i, chunk in enumerate(chunk_storage(body_storage, row["title"]))
+    ]
+
+def search_body(item):
+    """
+    The storage body embedded in a search result, or None if it was not expanded.
+    """
+    storage = item.get("body", {}).get("storage")
+    return storage.get("value", "") if storage is not None else None
+
+def is_unchanged(item, manifest, existing_rows):
+    """
+    True when the page is already exported at the same version, so its body need not be fetched again.
+    """
+    page_id = item.get("id")
+    known = manifest.get(page_id)
+    version = str(item.get("version", {}).get("number", ""))
+    return known is not None and page_id in existing_rows and str(known.get("version")) == version
+
+def checkpoint_path(output_csv):
+    return f"{os.path.splitext(output_csv)[0]}.checkpoint.jsonl"
+
+def load_checkpoint(output_csv, keyword, space_key):
+    """
+    Progress of an interrupted export of the same search: the rows and
+    manifest entries already processed and the next page URL, or None.
+    The checkpoint is append-only, one line per processed search page.
+    """
+    state = None
+    try:
+        with open(checkpoint_path(output_csv), encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if state is None:
+                    if entry.get("keyword") != keyword or entry.get("space_key") != space_key:
+                        return None
+                    state = {"rows": {}, "chunks": {}, "manifest": {}, "fetched": 0, "next_url": None}
+                state["rows"].update({row["page_id"]: row for row in entry["rows"]})
+                for chunk in entry["chunks"]:
+                    state["chunks"].setdefault(chunk["page_id"], []).append(chunk)
+                state["manifest"].update(entry["manifest"])
+                state["fetched"] += entry["fetched"]
+                state["next_url"] = entry["next_url"]
+    except (OSError, ValueError, KeyError):
+        return None
+    return state if state and state["next_url"] else None
+
+def append_checkpoint(output_csv, entry):
+    with open(checkpoint_path(output_csv), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+def clear_checkpoint(output_csv):
+    try:
+        os.remove(checkpoint_path(output_csv))
+    except OSError:
+        pass
+
+def write_export(output_csv, rows):
+    knowledge_snapshot.write_export(output_csv, rows, CSV_COLUMNS)
+
+def write_chunks(output_csv, chunks):
+    rows = [chunk for page_chunks in chunks.values() for chunk in page_chunks]
+    knowledge_snapshot.write_export(chunks_path(output_csv), rows, CHUNK_COLUMNS)
+
+def process_results(results, bodies, changed, manifest, existing_rows, existing_chunks):
+    """
+    Rows, chunks and manifest entries for one search page. Unchanged pages are
+    carried over from the previous export; changed ones are built from their
+    body (from the search result, or from `bodies` when fetched separately).
+    """
+    page_rows, page_chunks, page_manifest = {}, {}, {}
+    for item in results:
+        page_id = item.get("id")
+        if page_id not in changed:
+            row = {**build_row(item, ""), "excerpt": existing_rows[page_id]["excerpt"]}
+            page_chunks[page_id] = existing_chunks[page_id]
+            page_manifest[page_id] = manifest[page_id]
+        else:
+            if page_id in bodies:
+                body_storage = bodies[page_id].get("body", {}).get("storage", {}).get("value", "")
+            else:
+                body_storage = search_body(item)
+            row = build_row(item, body_storage)
+            page_chunks[page_id] = build_chunks(row, body_storage)
+            page_manifest[page_id] = {"version": row["version_number"], "hash": content_hash(body_storage)}
+        page_rows[page_id] = row
+    return page_rows, page_chunks, page_manifest
+
+def load_previous_export(output_csv, keyword, space_key, incremental, resume):
+    manifest = load_manifest(output_csv) if incremental else {}
+    existing_rows = load_existing_rows(output_csv) if incremental else {}
+    existing_chunks = load_existing_chunks(output_csv) if incremental else {}
+    checkpoint = load_checkpoint(output_csv, keyword, space_key) if resume else None
+    return manifest, existing_rows, existing_chunks, checkpoint
+
+def finish_export(output_csv, rows, chunks, new_manifest, existing_rows, existing_chunks):
+    if list(rows.values()) != list(existing_rows.values()):
+        write_export(output_csv, rows.values())
+    else:
+        # Leave the file untouched so downstream caches and knowledge bases see no change
+        print(f"No changes in {output_csv}")
+    if chunks != existing_chunks:
+        write_chunks(output_csv, chunks)
+    save_manifest(output_csv, new_manifest)
+    clear_checkpoint(output_csv)
+
+async def export_keyword_results_async(keyword, space_key=None, output_csv="knoccs_confluence.csv", incremental=True,
+                                       stats=None, page_size=PAGE_SIZE, resume=True, transport=None):
+    """
+    Export every page matching `keyword` to `output_csv`, and its body as
+    heading-aware clean-text chunks to `<output>_chunks.csv`. Both are
+    written as Arrow snapshots (`.arrow`), plus CSVs when
+    KNOWLEDGE_CSV_EXPORT is on.
+
+    In incremental mode the previous export and its manifest (page_id ->
+    version, content hash) are reused: bodies are only fetched for new pages
+    or pages whose version changed, and pages no longer returned by the
+    search are dropped. An unchanged space costs just the paginated search.
+
+    Bodies come back with the search results; a separate content request is
+    only made for results where the server did not expand the body, at most
+    CONFLUENCE_FETCH_WORKERS at a time. Pass a RequestStats as `stats` to
+    inspect how many requests the export made.
+
+    Pagination follows `_links.next`. After every search page the progress is
+    checkpointed, so with `resume` an interrupted export continues from the
+    last completed page instead of starting over.
+
+    Runs on the caller's event loop; parsing and file writes go to worker
+    threads so the loop keeps serving requests. Returns the number of pages written.
+    """
+    check_config()
+    stats = stats if stats is not None else RequestStats()
+    manifest, existing_rows, existing_chunks, checkpoint = await asyncio.to_thread(
+        load_previous_export, output_csv, keyword, space_key, incremental, resume
+    )
+    if checkpoint:
+        print(f"Resuming Confluence export after {len(checkpoint['rows'])} pages")
+        rows, chunks = checkpoint["rows"], checkpoint["chunks"]
+        new_manifest, fetched = checkpoint["manifest"], checkpoint["fetched"]
+    else:
+        await asyncio.to_thread(clear_checkpoint, output_csv)
+        await asyncio.to_thread(append_checkpoint, output_csv, {"keyword": keyword, "space_key": space_key, "rows": [],
+                                                                "chunks": [], "manifest": {}, "fetched": 0, "next_url": None})
+        rows, chunks, new_manifest, fetched = {}, {}, {}, 0
+    seen_urls = set()
+    fetch_slots = asyncio.Semaphore(FETCH_WORKERS)
+
+    client = make_client(transport)
+
+    async def fetch_body(page_id):
+        async with fetch_slots:
+            return await fetch_content_body(client, page_id, stats=stats)
+
+    # Pagination: the next search page is requested as soon as its link is
+    # known, while the bodies for the current page are still downloading
+    if checkpoint:
+        search_task = asyncio.ensure_future(fetch_search_page(client, checkpoint["next_url"], stats=stats))
+    else:
+        search_task = asyncio.ensure_future(search_keyword(client, keyword, space_key=space_key, limit=page_size, stats=stats))
+    try:
+        while search_task is not None:
+            try:
+                search_results = await search_task
+            except httpx.HTTPStatusError:
+                if checkpoint and not seen_urls:
+                    # the checkpointed cursor was rejected (e.g. expired); start over next time
+                    await asyncio.to_thread(clear_checkpoint, output_csv)
+                raise
+            search_task = None
             results = search_results.get("results", [])
             if not results:
                 break
 
-            for item in results:
-                page_id = item.get("id")
-                title = item.get("title")
-                space = item.get("space", {}).get("key") if item.get("space") else ""
-                version_num = item.get("version", {}).get("number", "")
-                labels = []
-                # metadata.labels may be in item, or fetch via expand
-                md = item.get("metadata", {}).get("labels", {}).get("results", [])
-                if md:
-                    labels = [lbl.get("name") for lbl in md]
-
-                # try to get an excerpt / body snippet
-                # either from a summary field or fetch full content
-                excerpt = ""
-                # if item has a body excerpt already
-                # often there's no body in search results, so fetch full content
-                content = fetch_content_body(page_id)
-                body_storage = content.get("body", {}).get("storage", {}).get("value", "")
-                if body_storage:
-                    # truncate to first 500 chars
-                    excerpt = body_storage.replace("\n", " ").strip()[:500]
-
-                writer.writerow([
-                    page_id,
-                    title,
-                    space,
-                    version_num,
-                    ";".join(labels),
-                    excerpt
-                ])
-
-            # check for next page in search
-            # in cloud API the search with CQL returns a `cursor` or next link
-            next_cursor = search_results.get("cursor", None)
-            if not next_cursor:
-                # older API may use _links.next
-                # or break if no more
-                break
-            cursor = next_cursor
+            next_url = next_page_url(search_results)
+            if next_url in seen_urls:
+                print(f"Confluence returned a repeated next link, stopping pagination: {next_url}")
+                next_url = None
+            if next_url:
+                seen_urls.add(next_url)
+                search_task = asyncio.ensure_future(fetch_search_page(client, next_url, stats=stats))
 
-    print(f"Keyword export done, data stored in {output_csv}")
+            changed = {
+                item.get("id") for item in results
+                if not is_unchanged(item, manifest, existing_rows) or item.get("id") not in existing_chunks
+            }
+            # only fall back to a per-page request when the search did not expand the body
+            missing = [item.get("id") for item in results if item.get("id") in changed and search_body(item) is None]
+            bodies = dict(zip(missing, await asyncio.gather(*(fetch_body(page_id) for page_id in missing))))
+
+            page_rows, page_chunks, page_manifest = await asyncio.to_thread(
+                process_results, results, bodies, changed, manifest, existing_rows, existing_chunks
+            )
+            rows.update(page_rows)
+            chunks.update(page_chunks)
+            fetched += len(changed)
+            new_manifest.update(page_manifest)
+            await asyncio.to_thread(append_checkpoint, output_csv, {
+                "rows": list(page_rows.values()),
+                "chunks": [chunk for page in page_chunks.values() for chunk in page],
+                "manifest": page_manifest, "fetched": len(changed), "next_url": next_url,
+            })
+    finally:
+        if search_task is not None:
+            search_task.cancel()
+        if transport is None:
+            await client.aclose()
+
+    deleted = set(existing_rows) - set(rows)
+    await asyncio.to_thread(finish_export, output_csv, rows, chunks, new_manifest, existing_rows, existing_chunks)
+    print(
+        f"Keyword export done, {len(rows)} pages ({sum(map(len, chunks.values()))} chunks) stored in {output_csv} "
+        f"({fetched} new or changed, {len(rows) - fetched} unchanged, {len(deleted)} deleted; "
+        f"{stats.total} requests: {stats.summary()})"
+    )
+    return len(rows)
+
+def export_keyword_results(keyword, space_key=None, **kwargs):
+    """
+    Blocking form of export_keyword_results_async, for scripts and worker threads.
+    """
+    return asyncio.run(export_keyword_results_async(keyword, space_key=space_key, **kwargs))
 
 if __name__ == "__main__":
     export_keyword_results(KEYWORD, space_key=SPACE_KEY)
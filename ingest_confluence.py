@@ -1,40 +1,21 @@
 import asyncio
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from langgraph.prebuilt import create_react_agent
 from dotenv import load_dotenv
-import os
+from mcp_manager import MCPManager, server_connections
+from model_config import model_id
 
 load_dotenv()
 
 async def test_jira_server():
     print("Testing JIRA Server...")
-    client = MultiServerMCPClient({
-        "mcp-atlassian": {
-            "command": "docker",
-            "args": [
-                "run",
-                "-i",
-                "--rm",
-                "-e", "JIRA_URL",
-                "-e", "JIRA_USERNAME", 
-                "-e", "JIRA_API_TOKEN",
-                "ghcr.io/sooperset/mcp-atlassian:latest"
-            ],
-            "env": {
-                "JIRA_URL": os.getenv("JIRA_URL"),
-                "JIRA_USERNAME": os.getenv("JIRA_USERNAME"),
-                "JIRA_API_TOKEN": os.getenv("JIRA_API_TOKEN")
-            },
-            "transport": "stdio",
-        }
-    })
+    manager = MCPManager({"mcp-atlassian": server_connections()["mcp-atlassian"]})
     
     try:
-        #await client.initialize()
-        tools = await client.get_tools()
+        await manager.start()
+        tools = await manager.get_tools()
         print(f"JIRA server tools: {[tool.name for tool in tools]}")
 
-        agent = create_react_agent("gpt-4o", tools=tools)
+        agent = create_react_agent(model_id("mcp_agent"), tools=tools)
 
         response = await agent.ainvoke(
             {"messages": [{"role": "user", "content": "What are the tasks for the current sprint?"}]}
@@ -47,10 +28,7 @@ async def test_jira_server():
         print(f"JIRA server error: {e}")
         return False
     finally:
-        try:
-            await client.close()
-        except:
-            pass
+        await manager.stop()
 
 async def main():
     jira_ok = await test_jira_server()
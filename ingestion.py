@@ -0,0 +1,84 @@
+# ingestion.py
+
+"""
+Run the Notion and Confluence exports as coroutines on one event loop, both
+at once, with their HTTP clients drawing from one shared connection pool.
+
+    python ingestion.py                  # both sources, incremental
+    python ingestion.py confluence --full
+"""
+
+import argparse
+import asyncio
+import functools
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from data import export_notion_pages_async
+from import_confluence import KEYWORD, SPACE_KEY, export_keyword_results_async
+
+# Connections shared by all exporters; each exporter also bounds its own concurrency
+MAX_CONNECTIONS = int(os.getenv("INGEST_MAX_CONNECTIONS", "20"))
+
+
+def make_transport() -> httpx.AsyncHTTPTransport:
+    """
+    Keep-alive connection pool for the exporters' clients. Closing it is up to the caller.
+    """
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+    return httpx.AsyncHTTPTransport(limits=limits)
+
+
+def ingestion_jobs(transport: httpx.AsyncHTTPTransport = None, incremental: bool = True) -> Dict[str, Callable[[], Awaitable[int]]]:
+    """
+    Source name -> coroutine function running its export, for SyncScheduler or run_ingestion().
+    """
+    return {
+        "notion": functools.partial(export_notion_pages_async, incremental=incremental, transport=transport),
+        "confluence": functools.partial(export_keyword_results_async, KEYWORD, space_key=SPACE_KEY,
+                                        incremental=incremental, transport=transport),
+    }
+
+
+async def run_ingestion(sources: List[str] = None, incremental: bool = True) -> dict:
+    """
+    Export the given sources (all by default) concurrently. Returns source ->
+    rows written, or the exception the export raised.
+    """
+    transport = make_transport()
+    jobs = ingestion_jobs(transport, incremental)
+    names = sources or list(jobs)
+    try:
+        results = await asyncio.gather(*(jobs[name]() for name in names), return_exceptions=True)
+    finally:
+        await transport.aclose()
+    return dict(zip(names, results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Notion and Confluence for the knowledge bases")
+    parser.add_argument("sources", nargs="*", help="notion and/or confluence (default: all)")
+    parser.add_argument("--full", action="store_true", help="ignore the previous export and fetch everything")
+    args = parser.parse_args()
+    # Checked here rather than with choices=, which rejects an empty nargs="*" list on some Python versions
+    known = list(ingestion_jobs())
+    unknown = sorted(set(args.sources) - set(known))
+    if unknown:
+        parser.error(f"unknown source(s) {', '.join(unknown)}; choose from {', '.join(known)}")
+    args.sources = args.sources or known
+
+    started = time.perf_counter()
+    results = asyncio.run(run_ingestion(args.sources, incremental=not args.full))
+    for name, result in results.items():
+        print(f"{name}: {'failed: ' + str(result) if isinstance(result, Exception) else f'{result} rows'}")
+    print(f"Ingestion finished in {time.perf_counter() - started:.1f}s")
+    if any(isinstance(result, Exception) for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@
 from phi.agent import Agent
 from phi.tools.jira_tools import JiraTools
 from dotenv import load_dotenv
+from tool_cache import cache_toolkit
+from tracing import trace_toolkit
+from agent_pool import AgentPool
+from model_config import escalation_model_id, phi_model
 import os
 
 load_dotenv()
@@ -14,9 +18,10 @@ JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN")
 def make_jira_agent():
     agent = Agent(
         name="Jira Project Management Specialist", 
+        model=phi_model("specialist", "jira"),
         role="Expert project management and task tracking specialist focused on Jira issues, sprints, and project workflows",
         description="You are a specialized project management assistant that excels at retrieving and analyzing information from Jira. You understand project lifecycles, sprint planning, issue tracking, and can provide insights about task priorities, project status, and team workloads.",
-        tools=[JiraTools(JIRA_SERVER_URL, JIRA_USERNAME, JIRA_API_TOKEN)],
+        tools=[trace_toolkit(cache_toolkit(JiraTools(JIRA_SERVER_URL, JIRA_USERNAME, JIRA_API_TOKEN)))],
         instructions=[
             "Always include project restrictions in your queries to avoid unbounded JQL searches",
             "When searching for issues, provide context about project, status, assignee, or timeline",
@@ -41,8 +46,10 @@ def safe_jira_query(user_query: str, default_project: str = "AWS Migration") ->
         return f"{user_query} (in project {default_project})"
     return user_query
 
+# Reused Jira agents, so each query does not build a new JiraTools client and log in again
+jira_agents = AgentPool(make_jira_agent, name="jira", escalate_to=escalation_model_id("specialist", "jira"))
+
 def run_jira_query(query: str):
-    agent = make_jira_agent()
     safe_query = safe_jira_query(query)
-    response = agent.run(safe_query, stream=False, markdown=True)
+    response = jira_agents.run(safe_query, markdown=True)
     return response
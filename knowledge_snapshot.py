@@ -0,0 +1,102 @@
+# knowledge_snapshot.py
+
+import csv
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List
+
+import pyarrow as pa
+
+# The sync scripts always write an Arrow snapshot next to each logical
+# `<name>.csv`; the CSV itself is only written when this is enabled.
+CSV_EXPORT = os.getenv("KNOWLEDGE_CSV_EXPORT", "false").lower() == "true"
+
+HASH_COLUMN = "content_hash"
+
+
+def snapshot_path(csv_path) -> str:
+    return f"{os.path.splitext(csv_path)[0]}.arrow"
+
+
+def current_path(csv_path) -> str:
+    """
+    The file a reader should use for `csv_path`: the snapshot when there is one, else the CSV.
+    """
+    path = snapshot_path(csv_path)
+    return path if os.path.isfile(path) else str(csv_path)
+
+
+def exists(csv_path) -> bool:
+    return os.path.isfile(current_path(csv_path))
+
+
+def row_hash(row: Dict[str, str], columns: List[str]) -> str:
+    """
+    Hash of a row's values, so two snapshots can be diffed without comparing content.
+    """
+    return hashlib.sha256("\x1f".join(row.get(column) or "" for column in columns).encode("utf-8")).hexdigest()
+
+
+def write_snapshot(csv_path, rows: Iterable[Dict[str, str]], columns: List[str]) -> str:
+    """
+    Write `rows` as an Arrow IPC file of string columns plus a per-row
+    content hash, swapped in atomically. Returns the snapshot path.
+    """
+    rows = list(rows)
+    data = {column: [row.get(column) or "" for row in rows] for column in columns}
+    data[HASH_COLUMN] = [row_hash(row, columns) for row in rows]
+    schema = pa.schema(
+        [pa.field(column, pa.string()) for column in columns] + [pa.field(HASH_COLUMN, pa.string())],
+        metadata={"written_at": datetime.now(timezone.utc).isoformat()},
+    )
+    table = pa.Table.from_pydict(data, schema=schema)
+
+    path = snapshot_path(csv_path)
+    with pa.OSFile(f"{path}.tmp", "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        writer.write_table(table)
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+def write_csv(csv_path, rows: Iterable[Dict[str, str]], columns: List[str]) -> None:
+    # Written to a temp file and swapped in, so readers never see a partial export
+    with open(f"{csv_path}.tmp", mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(f"{csv_path}.tmp", csv_path)
+
+
+def write_export(csv_path, rows: Iterable[Dict[str, str]], columns: List[str]) -> None:
+    """
+    Write the snapshot for `csv_path`, and the CSV too when KNOWLEDGE_CSV_EXPORT is on.
+    """
+    rows = list(rows)
+    write_snapshot(csv_path, rows, columns)
+    if CSV_EXPORT:
+        write_csv(csv_path, rows, columns)
+
+
+def read_table(csv_path) -> pa.Table:
+    """
+    The snapshot for `csv_path`, memory-mapped: column buffers point into the
+    page cache instead of being copied onto the heap.
+    """
+    with pa.memory_map(snapshot_path(csv_path), "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def read_rows(csv_path, with_hash: bool = False) -> List[Dict[str, str]]:
+    """
+    Rows of the snapshot for `csv_path` as dicts, falling back to the CSV when no snapshot exists yet.
+    Raises OSError when there is neither.
+    """
+    if not os.path.isfile(snapshot_path(csv_path)):
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+    table = read_table(csv_path)
+    if not with_hash and HASH_COLUMN in table.column_names:
+        table = table.drop_columns([HASH_COLUMN])
+    columns = {name: table.column(name).to_pylist() for name in table.column_names}
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
@@ -0,0 +1,133 @@
+# knowledge_sync.py
+
+from hashlib import md5
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from phi.document import Document
+from phi.knowledge.csv import CSVKnowledgeBase
+from sqlalchemy import delete, select
+
+import knowledge_snapshot
+
+# IVFFlat centroids are fixed when the index is built; rebuild once this share of rows changed
+IVF_REBUILD_FRACTION = 0.1
+
+
+def content_hash(content: str) -> str:
+    """
+    Same hash PgVector stores in its content_hash column, so rows can be diffed without re-embedding.
+    """
+    return md5(content.replace("\x00", "\ufffd").encode()).hexdigest()
+
+
+def read_row_documents(path, id_column: str, title_column: str,
+                       content_columns: Optional[List[str]] = None) -> List[Document]:
+    """
+    One Document per CSV row, identified by the row's `id_column`, so a
+    changed row only invalidates its own embedding. With `content_columns`
+    only those columns are embedded and the rest are kept as metadata.
+    """
+    source = Path(path).stem
+    documents = {}
+    for row in knowledge_snapshot.read_rows(path):
+        row_id = row.get(id_column)
+        if not row_id:
+            continue
+        meta_data = {"source": source, id_column: row_id, "title": row.get(title_column, "")}
+        if content_columns:
+            meta_data.update({k: v for k, v in row.items() if k not in content_columns and k not in meta_data})
+        documents[row_id] = Document(
+            id=row_id,
+            name=row.get(title_column) or source,
+            meta_data=meta_data,
+            content="\n".join(
+                f"{column}: {value}" for column, value in row.items()
+                if value and (not content_columns or column in content_columns)
+            ),
+        )
+    return list(documents.values())
+
+
+def existing_hashes(vector_db) -> Dict[str, str]:
+    """
+    id -> content_hash of everything currently stored in the vector db.
+    """
+    if hasattr(vector_db, "existing_hashes"):
+        return vector_db.existing_hashes()
+    table = vector_db.table
+    with vector_db.Session() as sess:
+        return {row.id: row.content_hash for row in sess.execute(select(table.c.id, table.c.content_hash))}
+
+
+def delete_ids(vector_db, ids) -> None:
+    if hasattr(vector_db, "delete_ids"):
+        vector_db.delete_ids(ids)
+        return
+    table = vector_db.table
+    with vector_db.Session() as sess:
+        sess.execute(delete(table).where(table.c.id.in_(list(ids))))
+        sess.commit()
+
+
+def optimize_index(vector_db, churn: int, total: int) -> None:
+    """
+    Build the ANN index if it is missing, rebuilding an IVFFlat index after large changes.
+    """
+    index = getattr(vector_db, "vector_index", None)
+    rebuild = getattr(index, "lists", None) is not None and churn >= IVF_REBUILD_FRACTION * total
+    vector_db.optimize(force_recreate=rebuild)
+
+
+def sync_documents(vector_db, documents: List[Document]) -> Dict[str, int]:
+    """
+    Bring the vector db in line with `documents`: embed and upsert only new
+    or changed documents (by content hash) and delete ids that disappeared.
+    """
+    vector_db.create()
+    current = existing_hashes(vector_db)
+    changed = [doc for doc in documents if current.get(doc.id) != content_hash(doc.content)]
+    removed = set(current) - {doc.id for doc in documents}
+
+    if changed:
+        embedder = getattr(vector_db, "embedder", None)
+        if hasattr(embedder, "embed_batch"):
+            # embed in bulk up front; the upsert's per-document embed calls then hit the cache
+            embedder.embed_batch([doc.content for doc in changed])
+        vector_db.upsert(documents=changed)
+    if removed:
+        delete_ids(vector_db, removed)
+    if changed or removed:
+        optimize_index(vector_db, len(changed) + len(removed), len(documents))
+    return {"upserted": len(changed), "deleted": len(removed), "unchanged": len(documents) - len(changed)}
+
+
+class RowCSVKnowledgeBase(CSVKnowledgeBase):
+    """
+    CSV knowledge base that embeds one document per row (keyed by
+    `id_column`) and syncs incrementally instead of dropping and
+    re-embedding the whole table. Rows are read from the Arrow snapshot
+    next to `path` when there is one.
+    """
+
+    id_column: str
+    title_column: str
+    content_columns: Optional[List[str]] = None
+
+    @property
+    def document_lists(self) -> Iterator[List[Document]]:
+        if knowledge_snapshot.exists(self.path):
+            yield read_row_documents(self.path, self.id_column, self.title_column, self.content_columns)
+
+    def sync(self) -> Dict[str, int]:
+        """
+        Diff the exported rows against the vector db and apply only the changes.
+        """
+        if not knowledge_snapshot.exists(self.path):
+            # nothing exported yet; keep what is in the vector db rather than deleting it all
+            print(f"{self.path} not found, skipping knowledge base sync")
+            return {"upserted": 0, "deleted": 0, "unchanged": 0}
+        documents = [doc for document_list in self.document_lists for doc in document_list]
+        stats = sync_documents(self.vector_db, documents)
+        print(f"Synced {self.path} into vector db: {stats}")
+        return stats
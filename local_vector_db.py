@@ -0,0 +1,206 @@
+# local_vector_db.py
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from phi.document import Document
+from phi.embedder import Embedder
+from phi.vectordb.base import VectorDb
+
+from knowledge_sync import content_hash
+
+
+class LocalVectorDb(VectorDb):
+    """
+    In-process vector store for small corpora: one contiguous float32 matrix of
+    L2-normalised embeddings, memory-mapped from `<directory>/<table_name>.npy`,
+    with the documents alongside in `<table_name>.json`.
+
+    Search is a single matrix-vector product plus argpartition (cosine
+    similarity, like PgVector's default), so there is no network round trip.
+    Writes rewrite both files atomically and swap them in under a lock;
+    searches read whatever snapshot was current when they started.
+    """
+
+    def __init__(self, table_name: str, directory: str = "vector_store", embedder: Optional[Embedder] = None):
+        if embedder is None:
+            from phi.embedder.openai import OpenAIEmbedder
+
+            embedder = OpenAIEmbedder()
+        self.table_name = table_name
+        self.directory = Path(directory)
+        self.embedder = embedder
+        self.dimensions = embedder.dimensions
+        self._lock = threading.Lock()
+        self._matrix = np.empty((0, self.dimensions), dtype=np.float32)
+        self._records: List[Dict[str, Any]] = []
+        self._loaded = False
+
+    @property
+    def matrix_path(self) -> Path:
+        return self.directory / f"{self.table_name}.npy"
+
+    @property
+    def records_path(self) -> Path:
+        return self.directory / f"{self.table_name}.json"
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if self.exists():
+                with open(self.records_path, encoding="utf-8") as f:
+                    self._records = json.load(f)
+                self._matrix = np.load(self.matrix_path, mmap_mode="r")
+            self._loaded = True
+
+    def _save(self, matrix: np.ndarray, records: List[Dict[str, Any]]):
+        # called with the lock held
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_matrix = self.directory / f"{self.table_name}.tmp.npy"
+        np.save(tmp_matrix, np.ascontiguousarray(matrix, dtype=np.float32))
+        tmp_records = self.records_path.with_suffix(".json.tmp")
+        with open(tmp_records, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        os.replace(tmp_matrix, self.matrix_path)
+        os.replace(tmp_records, self.records_path)
+        self._matrix = np.load(self.matrix_path, mmap_mode="r") if records else matrix
+        self._records = records
+
+    def _embed(self, documents: List[Document]) -> np.ndarray:
+        missing = [doc for doc in documents if not doc.embedding]
+        if missing and hasattr(self.embedder, "embed_batch"):
+            for doc, embedding in zip(missing, self.embedder.embed_batch([doc.content for doc in missing])):
+                doc.embedding = embedding
+        else:
+            for doc in missing:
+                doc.embed(embedder=self.embedder)
+        vectors = np.asarray([doc.embedding for doc in documents], dtype=np.float32).reshape(-1, self.dimensions)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def create(self) -> None:
+        self._load()
+
+    def exists(self) -> bool:
+        return self.matrix_path.is_file() and self.records_path.is_file()
+
+    def doc_exists(self, document: Document) -> bool:
+        self._load()
+        cleaned_hash = content_hash(document.content)
+        return any(record["content_hash"] == cleaned_hash for record in self._records)
+
+    def name_exists(self, name: str) -> bool:
+        self._load()
+        return any(record["name"] == name for record in self._records)
+
+    def id_exists(self, id: str) -> bool:
+        self._load()
+        return any(record["id"] == id for record in self._records)
+
+    def upsert_available(self) -> bool:
+        return True
+
+    def insert(self, documents: List[Document], filters: Optional[Dict[str, Any]] = None) -> None:
+        self.upsert(documents, filters)
+
+    def upsert(self, documents: List[Document], filters: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Insert or replace documents by id (content hash when a document has no id).
+        """
+        self._load()
+        vectors = self._embed(documents)
+        with self._lock:
+            positions = {record["id"]: i for i, record in enumerate(self._records)}
+            matrix = np.array(self._matrix, dtype=np.float32)
+            records = list(self._records)
+            appended_vectors, appended_records = [], []
+            for doc, vector in zip(documents, vectors):
+                doc_hash = content_hash(doc.content)
+                record = {
+                    "id": doc.id or doc_hash,
+                    "name": doc.name,
+                    "meta_data": {**doc.meta_data, **(filters or {})},
+                    "content": doc.content,
+                    "content_hash": doc_hash,
+                }
+                if record["id"] in positions:
+                    matrix[positions[record["id"]]] = vector
+                    records[positions[record["id"]]] = record
+                else:
+                    positions[record["id"]] = len(records) + len(appended_records)
+                    appended_vectors.append(vector)
+                    appended_records.append(record)
+            if appended_vectors:
+                matrix = np.vstack([matrix, np.asarray(appended_vectors, dtype=np.float32)])
+            self._save(matrix, records + appended_records)
+
+    def existing_hashes(self) -> Dict[str, str]:
+        self._load()
+        return {record["id"]: record["content_hash"] for record in self._records}
+
+    def delete_ids(self, ids) -> None:
+        self._load()
+        ids = set(ids)
+        with self._lock:
+            keep = [i for i, record in enumerate(self._records) if record["id"] not in ids]
+            self._save(np.asarray(self._matrix)[keep], [self._records[i] for i in keep])
+
+    def search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        query_embedding = self.embedder.get_embedding(query)
+        if not query_embedding:
+            print(f"Error getting embedding for Query: {query}")
+            return []
+        return self.search_by_vector(query_embedding, limit, filters)
+
+    def search_by_vector(self, embedding, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        self._load()
+        with self._lock:
+            matrix, records = self._matrix, self._records
+        if not records:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        scores = matrix @ (query / (np.linalg.norm(query) or 1.0))
+        if filters:
+            mask = np.fromiter(
+                (all(record["meta_data"].get(k) == v for k, v in filters.items()) for record in records),
+                dtype=bool, count=len(records),
+            )
+            scores = np.where(mask, scores, -np.inf)
+
+        k = min(limit, len(records))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            Document(
+                id=records[i]["id"],
+                name=records[i]["name"],
+                meta_data=records[i]["meta_data"],
+                content=records[i]["content"],
+                embedder=self.embedder,
+            )
+            for i in top
+            if np.isfinite(scores[i])
+        ]
+
+    def drop(self) -> None:
+        with self._lock:
+            for path in (self.matrix_path, self.records_path):
+                path.unlink(missing_ok=True)
+            self._matrix = np.empty((0, self.dimensions), dtype=np.float32)
+            self._records = []
+
+    def optimize(self, force_recreate: bool = False) -> None:
+        # exact search over the whole matrix, there is no index to build
+        pass
+
+    def delete(self) -> bool:
+        self.drop()
+        return True
@@ -1,17 +1,29 @@
 import os
+import asyncio
+from typing import List
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from langgraph.prebuilt import create_react_agent
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
-from notion_agent import  make_notion_agent
-from jira_agent import make_jira_agent
-from confluence_agent import make_confluence_agent
+from notion_agent import notion_agents, refresh_notion_knowledge_base
+from jira_agent import jira_agents
+from confluence_agent import confluence_agents, refresh_confluence_knowledge_base
 from phi.agent import Agent
-from phi.model.openai import OpenAIChat
+from worker_pool import PoolSaturatedError, make_pool_from_env
+from answer_cache import SOURCE_FILES, make_answer_cache_from_env, source_fingerprint
+from sync_service import SyncScheduler
+from ingestion import ingestion_jobs, make_transport
+from team_orchestrator import Specialist, checkout_members, route_specialists, run_team_parallel, stream_team_parallel, team_slots
+from query_router import query_router
+from model_config import escalation_model_id, model_id, needs_escalation, phi_model
+from streaming import iterate_in_pool, langgraph_events, phi_events, sse_event, with_deadline
+from mcp_manager import MCPManager, server_connections
+from tool_cache import cache_tools, tool_cache, track_writes
+import tracing
 
 
 load_dotenv()
@@ -26,13 +38,37 @@ os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY  # make sure LangChain/LangGraph c
 app = FastAPI()
 
 # global variables
-client = None
+mcp_manager = None
 tools = []
 agent = None
-notion_agent = None
-jira_agent = None
-confluence_agent = None
-team_agent = None
+escalation_agent = None
+sync_scheduler = None
+ingest_transport = None
+
+# "parallel" fans out to all specialists at once and only synthesizes with the lead model,
+# "transfer" lets the phi team leader transfer to each specialist in turn
+TEAM_MODE = os.getenv("TEAM_MODE", "parallel").lower()
+
+# Response cache for both endpoints (None when ANSWER_CACHE_BACKEND=off)
+answer_cache = make_answer_cache_from_env()
+# /chat answers come from live MCP tools only; team answers also use the ingested CSVs
+CHAT_SOURCES = ()
+TEAM_SOURCES = ("notion", "confluence")
+
+SPECIALISTS = [
+    Specialist("Jira", jira_agents),
+    Specialist("Confluence", confluence_agents),
+    Specialist("Notion", notion_agents),
+]
+
+# Bounded pool for the synchronous phi team agent, configured via TEAM_CHAT_WORKERS,
+# TEAM_CHAT_QUEUE_DEPTH, TEAM_CHAT_TIMEOUT_SECONDS and TEAM_CHAT_RETRY_AFTER_SECONDS.
+# The defaults are sized in queries: a parallel query can hold a slot per specialist plus the synthesis
+team_pool = make_pool_from_env("team-chat", "TEAM_CHAT", team_slots(SPECIALISTS) if TEAM_MODE == "parallel" else 1)
+
+# Spans for every request, LLM call and embedding; see tracing.py for the exporters
+tracing.instrument_openai()
+app.add_middleware(tracing.TracingMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -43,114 +79,168 @@ app.add_middleware(
 )
 
 
+# What each specialist covers, for the transfer-mode team leader's prompt
+TEAM_MEMBER_ROLES = {
+    "Jira": "Jira Project Management Specialist: Provides real-time project status, task assignments, and work item progress.",
+    "Confluence": "Confluence Knowledge Specialist: Provides technical documentation, procedural guides, and organizational knowledge.",
+    "Notion": "Notion Knowledge Specialist: Provides high-level strategic plans, roadmaps, and detailed notes.",
+}
+TEAM_MEMBER_AREAS = {
+    "Jira": "project management (Jira)",
+    "Confluence": "technical documentation (Confluence)",
+    "Notion": "knowledge management (Notion)",
+}
+COUNT_WORDS = {1: "ONE", 2: "TWO", 3: "THREE"}
+
+
+def _and(items, last="and"):
+    return items[0] if len(items) == 1 else f"{', '.join(items[:-1])} {last} {items[-1]}"
+
+
+def team_instructions(specialists, members) -> List[str]:
+    """
+    Team leader instructions naming only the routed specialists and their transfer functions.
+    """
+    names = [s.name for s in specialists]
+    count = COUNT_WORDS.get(len(names), str(len(names)))
+    every = "BOTH" if len(names) == 2 else f"ALL {count}"
+    # phi names each transfer function after the member agent
+    transfers = [f"transfer_task_to_{m.name.replace(' ', '_').lower()}" for m in members]
+    citations = " ".join([f"'From {n},'" for n in names[:-1]] + [f"'From {names[-1]}'"])
+    return [
+        f"You are the lead Project Intelligence Agent, commanding a team of exactly {count} specialized sub-agents. Your mission is to provide comprehensive, synthesized answers by consulting {every} sources—{_and(names, 'AND')}.",
+        "",
+        "Your team consists of:",
+        *(f"• {TEAM_MEMBER_ROLES[name]}" for name in names),
+        "",
+        "CRITICAL DIRECTIVES:",
+        f"1. ALWAYS Consult {every} Specialists: For every user query, you MUST transfer tasks to {every} agents ({_and(names, 'AND')}) to ensure comprehensive coverage. Do not skip any agent.",
+        f"2. Transfer Tasks Explicitly: Use {_and(transfers, 'AND')} for every query.",
+        f"3. Build Context and Cohesion: Do not simply list information. Build a coherent narrative that connects what {_and(names)} each say about the query.",
+        "4. Provide a Cohesive Summary: Present the synthesized information clearly, using bold keywords, headings, and bullet points.",
+        "5. Identify and Resolve Discrepancies: If information from different sources conflicts, highlight the discrepancy and provide context to explain it.",
+        f"6. Focus on Actionable Insights: Conclude your response with clear, actionable insights or next steps based on {every} sources.",
+        f"7. Maintain Transparency: Always cite your sources by clearly referencing the application (e.g., {citations}).",
+        f"8. Quality Control: Ensure you have gathered information from {every.lower()} platforms before providing your final synthesis."
+    ]
+
+
+def make_team_agent(specialists, members) -> Agent:
+    """
+    Team leader for one transfer-mode request, over the routed specialists only.
+    It keeps the conversation in its own memory, so it is built per request
+    rather than shared between threads.
+    """
+    names = [s.name for s in specialists]
+    every = "both" if len(names) == 2 else f"all {COUNT_WORDS.get(len(names), len(names)).lower()}"
+    return Agent(
+        name="Integrated Workspace Assistant",
+        role=f"Team leader coordinating {every.upper()} specialized agents ({_and(names)}) to provide comprehensive workspace insights",
+        description=f"You are an expert workspace assistant that coordinates between {_and([TEAM_MEMBER_AREAS[n] for n in names])} specialists. You MUST consult {every} agents for every query to provide comprehensive, actionable insights about projects, tasks, documentation, and organizational processes.",
+        model=phi_model("lead"),
+        team=members,
+        instructions=team_instructions(specialists, members),
+        markdown=True,
+        show_tool_calls=True,
+        add_history_to_messages=True,
+        num_history_responses=3,
+        add_datetime_to_instructions=True,
+        prevent_hallucinations=True,
+        add_transfer_instructions=True
+    )
+
+
+def run_team_transfer(query: str, specialists):
+    # Members come out of the specialists' pools, so concurrent teams never share one
+    with checkout_members(specialists) as members:
+        return make_team_agent(specialists, members).run(query, stream=False)
+
+
+def stream_team_transfer(query: str, specialists):
+    with checkout_members(specialists) as members:
+        team = make_team_agent(specialists, members)
+        yield from phi_events(team.run(query, stream=True, stream_intermediate_steps=True))
+
+
+def build_mcp_agents(server_tools: dict):
+    global tools, agent, escalation_agent
+    # Cached per server, so a write clears the cached reads of its service (see tool_cache.tool_backend)
+    tools = tracing.trace_tools([tool for server, mcp_tools in server_tools.items() for tool in cache_tools(mcp_tools, server)])
+    agent = create_react_agent(model_id("mcp_agent"), tools=tools)
+    # Same tools on the larger model, for answers that fail the confidence check
+    escalation_model = escalation_model_id("mcp_agent")
+    escalation_agent = create_react_agent(escalation_model, tools=tools) if escalation_model else None
+    print(f"Successfully initialized with {len(tools)} tools")
+
+
+_mcp_tools_lock = asyncio.Lock()
+
+
+async def refresh_mcp_agents():
+    """
+    Rebuild the MCP agents once a server that was down at startup (or whose
+    tools failed to load) comes up, so its tools are used without a restart.
+    """
+    if mcp_manager is None or not mcp_manager.has_new_tools():
+        return
+    async with _mcp_tools_lock:
+        if mcp_manager.has_new_tools():
+            build_mcp_agents(await mcp_manager.get_server_tools())
+
+
 @app.on_event("startup")
 async def startup_event():
-    # Run the data.py script to refresh notion_pages.csv
-    import runpy
+    global mcp_manager, sync_scheduler, ingest_transport
     try:
-        runpy.run_path("data.py")
-        runpy.run_path("import_confluence.py")
-    except Exception as ex:
-        print(f"Error running data.py: {ex}")
+        mcp_manager = MCPManager(server_connections())
+        await mcp_manager.start()
 
-    global client, tools, agent, notion_agent, jira_agent, confluence_agent, team_agent
-    try:
-        client = MultiServerMCPClient(
-            {
-                "mcp-atlassian": {
-                    "command": "docker",
-                    "args": [
-                        "run",
-                        "-i",
-                        "--rm",
-                        "-e", "CONFLUENCE_URL",
-                        "-e", "CONFLUENCE_USERNAME",
-                        "-e", "CONFLUENCE_API_TOKEN",
-                        "-e", "JIRA_URL",
-                        "-e", "JIRA_USERNAME",
-                        "-e", "JIRA_API_TOKEN",
-                        "ghcr.io/sooperset/mcp-atlassian:latest"
-                    ],
-                    "env": {
-                        "CONFLUENCE_URL": os.getenv("CONFLUENCE_URL"),
-                        "CONFLUENCE_USERNAME": os.getenv("CONFLUENCE_USERNAME"),
-                        "CONFLUENCE_API_TOKEN": os.getenv("CONFLUENCE_API_TOKEN"),
-                        "JIRA_URL": os.getenv("JIRA_URL"),
-                        "JIRA_USERNAME": os.getenv("JIRA_USERNAME"),
-                        "JIRA_API_TOKEN": os.getenv("JIRA_API_TOKEN")
-                    },
-                    "transport": "stdio",
-                },
-                "mcp-notion": {
-                    "command": "docker",
-                    "args": [
-                        "run",
-                        "-i",
-                        "--rm",
-                        "-e", "OPENAPI_MCP_HEADERS",
-                        "mcp/notion"
-                    ],
-                    "env": {
-                        "OPENAPI_MCP_HEADERS": os.getenv("OPENAPI_MCP_HEADERS")
-                        # e.g., '{"Authorization":"Bearer ntn_XXXX...","Notion-Version":"2022-06-28"}'
-                    },
-                    "transport": "stdio",
-                }
-            }
-        )
+        build_mcp_agents(await mcp_manager.get_server_tools())
+
+        # Build one agent per specialist up front so the first team query skips the setup;
+        # both team modes take their specialist agents from these pools
+        for specialist in SPECIALISTS:
+            specialist.agents.prewarm()
+
+        print("Successfully initialized all agents (MCP agent, Notion agent, Jira agent, Confluence agent)")
 
-        tools = await client.get_tools()
-        agent = create_react_agent('gpt-4o', tools=tools)
-        print(f"Successfully initialized with {len(tools)} tools")
-        
-        # Initialize individual agents
-        notion_agent = make_notion_agent()
-        jira_agent = make_jira_agent()
-        confluence_agent = make_confluence_agent()
-        
-        # Build a team agent
-        team_instructions = [
-            "You are the lead Project Intelligence Agent, commanding a team of exactly THREE specialized sub-agents. Your mission is to provide comprehensive, synthesized answers by consulting ALL THREE sources—Jira, Confluence, AND Notion.",
-            "",
-            "Your team consists of:",
-            "• Jira Project Management Specialist: Provides real-time project status, task assignments, and work item progress.",
-            "• Confluence Knowledge Specialist: Provides technical documentation, procedural guides, and organizational knowledge.",
-            "• Notion Knowledge Specialist: Provides high-level strategic plans, roadmaps, and detailed notes.",
-            "",
-            "CRITICAL DIRECTIVES:",
-            "1. ALWAYS Consult ALL THREE Specialists: For every user query, you MUST transfer tasks to ALL THREE agents (Jira, Confluence, AND Notion) to ensure comprehensive coverage. Do not skip any agent.",
-            "2. Transfer Tasks Explicitly: Use transfer_task_to_jira_project_management_specialist, transfer_task_to_confluence_knowledge_specialist, AND transfer_task_to_notion_knowledge_specialist for every query.",
-            "3. Build Context and Cohesion: Do not simply list information. Build a coherent narrative that connects tasks in Jira to their documentation in Confluence and their strategic purpose in Notion.",
-            "4. Provide a Cohesive Summary: Present the synthesized information clearly, using bold keywords, headings, and bullet points.",
-            "5. Identify and Resolve Discrepancies: If information from different sources conflicts, highlight the discrepancy and provide context to explain it.",
-            "6. Focus on Actionable Insights: Conclude your response with clear, actionable insights or next steps based on ALL THREE sources.",
-            "7. Maintain Transparency: Always cite your sources by clearly referencing the application (e.g., 'From Jira,' 'From Confluence,' 'From Notion').",
-            "8. Quality Control: Ensure you have gathered information from all three platforms before providing your final synthesis."
-        ]
-        team_agent = Agent(
-            name="Integrated Workspace Assistant",
-            role="Team leader coordinating ALL THREE specialized agents (Jira, Confluence, and Notion) to provide comprehensive workspace insights",
-            description="You are an expert workspace assistant that coordinates between project management (Jira), technical documentation (Confluence), and knowledge management (Notion) specialists. You MUST consult all three agents for every query to provide comprehensive, actionable insights about projects, tasks, documentation, and organizational processes.",
-            model=OpenAIChat(id="gpt-4o"),
-            team=[notion_agent, jira_agent, confluence_agent],
-            instructions=team_instructions,
-            markdown=True,
-            show_tool_calls=True,
-            add_history_to_messages=True,
-            num_history_responses=3,
-            add_datetime_to_instructions=True,
-            prevent_hallucinations=True,
-            add_transfer_instructions=True
-        )
-        
-        print("Successfully initialized all agents (MCP agent, Notion agent, Jira agent, Confluence agent, and Team agent)")
-        
     except Exception as ex:
         print(f"Error during startup: {ex}")
 
+    # Refresh notion_pages.csv / knoccs_confluence(_chunks).csv in the background; we serve
+    # from the existing files until a sync completes
+    if os.getenv("SYNC_ENABLED", "true").lower() == "true":
+        ingest_transport = make_transport()
+        sync_scheduler = SyncScheduler(jobs=ingestion_jobs(ingest_transport), on_synced=on_source_synced)
+        sync_scheduler.start()
+
+
+_synced_fingerprints = {source: source_fingerprint(source) for source in SOURCE_FILES}
+
+
+def on_source_synced(source: str):
+    """
+    Called after a background sync of a source. Incremental exports leave the
+    CSV untouched when nothing changed, in which case there is nothing to reload.
+    """
+    fingerprint = source_fingerprint(source)
+    if fingerprint == _synced_fingerprints.get(source):
+        print(f"{source} unchanged since last sync")
+        return
+    _synced_fingerprints[source] = fingerprint
+
+    if source == "notion":
+        refresh_notion_knowledge_base()
+    elif source == "confluence":
+        refresh_confluence_knowledge_base()
+    if answer_cache is not None:
+        answer_cache.invalidate_source(source)
+
 
 class ChatInput(BaseModel):
     message: str
+    # /team_chat only: consult every specialist instead of the ones the query router picks
+    force_all: bool = False
 
 
 from typing import List, Dict, Any
@@ -161,20 +251,70 @@ class SourceInfo(BaseModel):
 
 class TeamChatOutput(BaseModel):
     responses: Dict[str, str]
+    timings: Dict[str, float] = {}
+    cache: str = "miss"
     # sources: List[SourceInfo]
 
 class ChatOutput(BaseModel):
     response: str
+    cache: str = "miss"
+
+
+def team_namespace(chat_input: ChatInput) -> str:
+    # Routed and force_all answers to the same prompt differ, so they are cached apart
+    return "team_chat_all" if chat_input.force_all else "team_chat"
+
+
+def team_sources(specialists) -> tuple:
+    # Only the knowledge sources that were consulted can make a cached answer stale
+    return tuple(s.name.lower() for s in specialists if s.name.lower() in TEAM_SOURCES)
+
+
+# The cache may embed the prompt (an OpenAI request) and scan its backend, so both
+# helpers run on a thread instead of blocking the event loop
+async def cache_lookup(namespace: str, prompt: str):
+    if answer_cache is None:
+        return None
+    value, status = await asyncio.to_thread(answer_cache.lookup, namespace, prompt)
+    print(f"Answer cache {status} for {namespace}")
+    return value
+
+
+async def cache_store(namespace: str, prompt: str, value: dict, sources):
+    if answer_cache is not None:
+        await asyncio.to_thread(answer_cache.store, namespace, prompt, value, sources)
+
+
+async def cache_answer(namespace: str, prompt: str, value: dict, sources, writes):
+    # An answer that reports a write ("created ABC-123") would skip the write when replayed
+    if writes:
+        print(f"Not caching {namespace} answer, it called {', '.join(sorted(writes))}")
+        return
+    await cache_store(namespace, prompt, value, sources)
 
 
 @app.post("/chat", response_model=ChatOutput)
 async def chat_endpoint(chat_input: ChatInput):
     try:
-        response = await agent.ainvoke(
-            {"messages": [HumanMessage(content=chat_input.message)]}
-        )
-        ai_response_message = response["messages"][-1].content
+        cached = await cache_lookup("chat", chat_input.message)
+        if cached is not None:
+            return ChatOutput(response=cached["response"], cache="hit")
+
+        await refresh_mcp_agents()
+        with track_writes() as writes:
+            response = await agent.ainvoke(
+                {"messages": [HumanMessage(content=chat_input.message)]}
+            )
+            ai_response_message = response["messages"][-1].content
+            if escalation_agent is not None and needs_escalation(ai_response_message):
+                print(f"Escalating /chat answer from {model_id('mcp_agent')} to {escalation_model_id('mcp_agent')}")
+                tracing.set_attribute(escalated_to=escalation_model_id("mcp_agent"))
+                response = await escalation_agent.ainvoke(
+                    {"messages": [HumanMessage(content=chat_input.message)]}
+                )
+                ai_response_message = response["messages"][-1].content
         print(f"AI message {ai_response_message}")
+        await cache_answer("chat", chat_input.message, {"response": ai_response_message}, CHAT_SOURCES, writes)
         return ChatOutput(response=ai_response_message)
     except Exception as ex:
         print(ex)
@@ -184,14 +324,33 @@ async def chat_endpoint(chat_input: ChatInput):
 @app.post("/team_chat", response_model=TeamChatOutput)
 async def team_chat_endpoint(chat_input: ChatInput):
     try:
-        # Use pre-instantiated team agent
-        global team_agent
-        
-        if team_agent is None:
-            raise HTTPException(status_code=500, detail="Team agent not initialized. Please wait for startup to complete.")
+        namespace = team_namespace(chat_input)
+        cached = await cache_lookup(namespace, chat_input.message)
+        if cached is not None:
+            return TeamChatOutput(responses={"team": cached["team"]}, cache="hit")
 
-        # Run the team agent and capture the response
-        response = team_agent.run(chat_input.message, stream=False)
+        specialists = await asyncio.to_thread(route_specialists, SPECIALISTS, chat_input.message, chat_input.force_all)
+
+        if TEAM_MODE == "parallel":
+            # One slot per specialist and the synthesis, each held until its thread returns
+            with team_pool.lease(team_slots(specialists)) as lease, track_writes() as writes:
+                result = await asyncio.wait_for(
+                    run_team_parallel(lease, specialists, chat_input.message), team_pool.timeout
+                )
+            print(f"Team agent response: {result.content}")
+            print(f"Team agent timings: {result.timings}")
+            # An answer with a source missing is served once, not cached for the whole TTL
+            if all(r.status == "ok" for r in result.specialists):
+                await cache_answer(namespace, chat_input.message, {"team": result.content}, team_sources(specialists), writes)
+            return TeamChatOutput(responses={"team": result.content}, timings=result.timings)
+
+        # Run the team agent on the worker pool so the event loop stays free; a query
+        # that needs only one specialist goes straight to it, skipping the leader's transfers
+        with track_writes() as writes:
+            if len(specialists) == 1:
+                response = await team_pool.run(specialists[0].agents.run, chat_input.message)
+            else:
+                response = await team_pool.run(run_team_transfer, chat_input.message, specialists)
 
         # Extract content
         content = response.content
@@ -211,13 +370,187 @@ async def team_chat_endpoint(chat_input: ChatInput):
         #             sources.append(src)
 
         # Return structured output
+        await cache_answer(namespace, chat_input.message, {"team": str(content)}, team_sources(specialists), writes)
         return TeamChatOutput(responses={"team": str(content)})
 
+    except HTTPException:
+        raise
+    except PoolSaturatedError as ex:
+        raise HTTPException(
+            status_code=429,
+            detail="Team agent is busy, please retry later.",
+            headers={"Retry-After": str(ex.retry_after)},
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Team agent did not respond within {team_pool.timeout:.0f}s")
     except Exception as ex:
         # For debugging/logging
         print("Error in /team_chat:", ex)
         raise HTTPException(status_code=500, detail=str(ex))
 
+@app.get("/sync/status")
+async def sync_status_endpoint():
+    if sync_scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **sync_scheduler.status()}
+
+
+@app.get("/cache/stats")
+async def cache_stats_endpoint():
+    return {
+        "answers": answer_cache.stats() if answer_cache is not None else None,
+        "tools": tool_cache.stats() if tool_cache is not None else None,
+    }
+
+
+@app.get("/router/stats")
+async def router_stats_endpoint():
+    return query_router.stats()
+
+
+@app.get("/mcp/status")
+async def mcp_status_endpoint():
+    if mcp_manager is None:
+        return {}
+    return mcp_manager.status()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return PlainTextResponse(tracing.tracer.metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if sync_scheduler is not None:
+        await sync_scheduler.stop()
+    if ingest_transport is not None:
+        await ingest_transport.aclose()
+    if mcp_manager is not None:
+        await mcp_manager.stop()
+    team_pool.shutdown()
+    tracing.tracer.shutdown()
+
+
+# --- Streaming (SSE) Endpoints ---
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def _sse_stream(events, on_finish=None):
+    """
+    Turn (event, data) tuples into SSE frames, reporting failures as an
+    "error" event since the HTTP status has already been sent.
+    """
+    try:
+        async for event, data in events:
+            yield sse_event(event, data)
+    except asyncio.TimeoutError:
+        yield sse_event("error", {"detail": f"No response within {team_pool.timeout:.0f}s"})
+    except Exception as ex:
+        print("Error while streaming:", ex)
+        yield sse_event("error", {"detail": str(ex)})
+    finally:
+        if on_finish:
+            on_finish()
+
+
+async def _replay_cached(text: str):
+    yield "token", {"text": text}
+    yield "done", {"cache": "hit"}
+
+
+async def _caching_events(events, namespace: str, prompt: str, sources):
+    """
+    Pass events through, storing the answer once the stream completes,
+    unless a specialist timed out or failed or a write tool ran along the way.
+    Only the tokens after the last tool call or handoff are the answer; text
+    the model streamed before calling a tool is not cached.
+    """
+    answer, complete, writes = [], True, set()
+    iterator = events.__aiter__()
+    while True:
+        # Each step may run in its own task (see with_deadline), so tracking is set up per step
+        with track_writes(writes):
+            try:
+                event, data = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+        if event == "token":
+            answer.append(data["text"])
+        elif event in ("tool_start", "tool_end", "handoff"):
+            answer = []
+        elif event == "specialist_done" and data.get("status") != "ok":
+            complete = False
+        elif event == "done":
+            if complete:
+                await cache_answer(namespace, prompt, {"response" if namespace == "chat" else "team": "".join(answer)}, sources, writes)
+            data = {**data, "cache": "miss"}
+        yield event, data
+
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(chat_input: ChatInput):
+    cached = await cache_lookup("chat", chat_input.message)
+    if cached is not None:
+        return StreamingResponse(_sse_stream(_replay_cached(cached["response"])), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    await refresh_mcp_agents()
+    if agent is None:
+        raise HTTPException(status_code=500, detail="MCP agent not initialized. Please wait for startup to complete.")
+
+    async def events():
+        async for event in langgraph_events(agent, chat_input.message):
+            yield event
+        yield "done", {}
+
+    events = _caching_events(events(), "chat", chat_input.message, CHAT_SOURCES)
+    return StreamingResponse(_sse_stream(events), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.post("/team_chat/stream")
+async def team_chat_stream_endpoint(chat_input: ChatInput):
+    namespace = team_namespace(chat_input)
+    cached = await cache_lookup(namespace, chat_input.message)
+    if cached is not None:
+        return StreamingResponse(_sse_stream(_replay_cached(cached["team"])), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    specialists = await asyncio.to_thread(route_specialists, SPECIALISTS, chat_input.message, chat_input.force_all)
+
+    # Admit before the response starts so saturation can still be reported as a 429
+    try:
+        lease = team_pool.lease(team_slots(specialists) if TEAM_MODE == "parallel" else 1)
+    except PoolSaturatedError as ex:
+        raise HTTPException(
+            status_code=429,
+            detail="Team agent is busy, please retry later.",
+            headers={"Retry-After": str(ex.retry_after)},
+        )
+
+    if TEAM_MODE == "parallel":
+        events = stream_team_parallel(lease, specialists, chat_input.message)
+    else:
+        if len(specialists) == 1:
+            def run():
+                with specialists[0].agents.agent() as specialist_agent:
+                    yield from phi_events(specialist_agent.run(chat_input.message, stream=True, stream_intermediate_steps=True))
+        else:
+            run = lambda: stream_team_transfer(chat_input.message, specialists)
+
+        async def transfer_events():
+            async for event in iterate_in_pool(lease, run):
+                yield event
+            yield "done", {}
+        events = transfer_events()
+    events = _caching_events(events, namespace, chat_input.message, team_sources(specialists))
+
+    return StreamingResponse(
+        _sse_stream(with_deadline(events, team_pool.timeout), on_finish=lease.close),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
\ No newline at end of file
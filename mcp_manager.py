@@ -0,0 +1,335 @@
+# mcp_manager.py
+
+import asyncio
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from langchain_mcp_adapters.sessions import create_session
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from tool_cache import is_cacheable
+from tracing import span
+
+# Sessions kept open per server; each serves one tool call at a time
+SESSIONS_PER_SERVER = int(os.getenv("MCP_SESSIONS_PER_SERVER", "2"))
+CONNECT_TIMEOUT_SECONDS = float(os.getenv("MCP_CONNECT_TIMEOUT_SECONDS", "60"))
+CALL_TIMEOUT_SECONDS = float(os.getenv("MCP_CALL_TIMEOUT_SECONDS", "120"))
+HEALTH_INTERVAL_SECONDS = float(os.getenv("MCP_HEALTH_INTERVAL_SECONDS", "30"))
+RECONNECT_BASE_SECONDS = float(os.getenv("MCP_RECONNECT_BASE_SECONDS", "1"))
+RECONNECT_MAX_SECONDS = float(os.getenv("MCP_RECONNECT_MAX_SECONDS", "60"))
+
+
+# McpError codes that mean the session is gone or hung rather than that the server rejected the call
+SESSION_ERROR_CODES = {CONNECTION_CLOSED, 408}
+# Of those, the ones a read-only call may be retried after; a timed-out (408) call is never retried
+RETRY_ERROR_CODES = {CONNECTION_CLOSED}
+
+
+def _is_session_error(ex: Exception) -> bool:
+    return not isinstance(ex, McpError) or ex.error.code in SESSION_ERROR_CODES
+
+
+def _is_retryable(ex: Exception) -> bool:
+    return not isinstance(ex, McpError) or ex.error.code in RETRY_ERROR_CODES
+
+
+def _transport_for(url: str) -> str:
+    return "sse" if url.rstrip("/").endswith("/sse") else "streamable_http"
+
+
+def server_connections() -> Dict[str, dict]:
+    """
+    Connection config for each MCP server. A server with MCP_<NAME>_URL set is
+    reached over streamable HTTP (or SSE for a URL ending in /sse), so one
+    long-lived container serves every process; otherwise it falls back to a
+    `docker run` over stdio, kept open for the life of the session.
+    """
+    connections = {}
+
+    atlassian_url = os.getenv("MCP_ATLASSIAN_URL")
+    if atlassian_url:
+        connections["mcp-atlassian"] = {"transport": _transport_for(atlassian_url), "url": atlassian_url}
+    else:
+        connections["mcp-atlassian"] = {
+            "command": "docker",
+            "args": [
+                "run",
+                "-i",
+                "--rm",
+                "-e", "CONFLUENCE_URL",
+                "-e", "CONFLUENCE_USERNAME",
+                "-e", "CONFLUENCE_API_TOKEN",
+                "-e", "JIRA_URL",
+                "-e", "JIRA_USERNAME",
+                "-e", "JIRA_API_TOKEN",
+                "ghcr.io/sooperset/mcp-atlassian:latest"
+            ],
+            "env": {
+                "CONFLUENCE_URL": os.getenv("CONFLUENCE_URL"),
+                "CONFLUENCE_USERNAME": os.getenv("CONFLUENCE_USERNAME"),
+                "CONFLUENCE_API_TOKEN": os.getenv("CONFLUENCE_API_TOKEN"),
+                "JIRA_URL": os.getenv("JIRA_URL"),
+                "JIRA_USERNAME": os.getenv("JIRA_USERNAME"),
+                "JIRA_API_TOKEN": os.getenv("JIRA_API_TOKEN")
+            },
+            "transport": "stdio",
+        }
+
+    notion_url = os.getenv("MCP_NOTION_URL")
+    if notion_url:
+        connections["mcp-notion"] = {"transport": _transport_for(notion_url), "url": notion_url}
+    else:
+        connections["mcp-notion"] = {
+            "command": "docker",
+            "args": [
+                "run",
+                "-i",
+                "--rm",
+                "-e", "OPENAPI_MCP_HEADERS",
+                "mcp/notion"
+            ],
+            "env": {
+                "OPENAPI_MCP_HEADERS": os.getenv("OPENAPI_MCP_HEADERS")
+                # e.g., '{"Authorization":"Bearer ntn_XXXX...","Notion-Version":"2022-06-28"}'
+            },
+            "transport": "stdio",
+        }
+
+    return connections
+
+
+class _Slot:
+    def __init__(self, session):
+        self.session = session
+        self.broken = asyncio.Event()
+
+
+class MCPServerPool:
+    """
+    A few long-lived sessions to one MCP server.
+
+    Each session is owned by its own task, which opens it, pings it every
+    HEALTH_INTERVAL_SECONDS and reopens it with exponential backoff (plus
+    jitter) whenever it breaks, so a crashed server is reconnected instead of
+    silently failing every later tool call. Tool calls borrow an idle
+    session. A call that fails before it was sent (no healthy session) is
+    retried once; after it was sent, the server may already have run it, so
+    only read-only tools are retried, and never after a timeout.
+    """
+
+    def __init__(self, name: str, connection: dict, size: int = SESSIONS_PER_SERVER):
+        self.name = name
+        self.connection = connection
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+        self._ready = asyncio.Event()
+        self.connected = 0
+        self.reconnects = 0
+        self.calls = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def transport(self) -> str:
+        return self.connection.get("transport", "stdio")
+
+    async def start(self, timeout: float = CONNECT_TIMEOUT_SECONDS) -> None:
+        """
+        Open the sessions in the background and wait until at least one is usable.
+        """
+        self._closing = False
+        self._tasks = [asyncio.create_task(self._own_session(i), name=f"mcp-{self.name}-{i}")
+                       for i in range(self.size)]
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise ConnectionError(f"MCP server {self.name} not reachable: {self.last_error}") from None
+
+    async def stop(self) -> None:
+        self._closing = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _own_session(self, index: int) -> None:
+        attempt = 0
+        while not self._closing:
+            slot = None
+            try:
+                async with create_session(self.connection) as session:
+                    await asyncio.wait_for(session.initialize(), CONNECT_TIMEOUT_SECONDS)
+                    slot = _Slot(session)
+                    attempt = 0
+                    self.connected += 1
+                    self._idle.put_nowait(slot)
+                    self._ready.set()
+                    await self._watch(slot)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                self.last_error = f"{type(ex).__name__}: {ex}"
+            finally:
+                if slot is not None:
+                    slot.broken.set()
+                    self.connected -= 1
+            if self._closing:
+                return
+            delay = min(RECONNECT_MAX_SECONDS, RECONNECT_BASE_SECONDS * 2 ** attempt)
+            delay *= random.uniform(0.5, 1.0)
+            attempt += 1
+            self.reconnects += 1
+            print(f"MCP server {self.name} session {index} disconnected ({self.last_error}), "
+                  f"reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _watch(self, slot: _Slot) -> None:
+        # Keep the session open until it breaks, pinging it to notice dead servers early
+        while not slot.broken.is_set():
+            try:
+                await asyncio.wait_for(slot.broken.wait(), HEALTH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                try:
+                    await asyncio.wait_for(slot.session.send_ping(), CONNECT_TIMEOUT_SECONDS)
+                except Exception as ex:
+                    self.last_error = f"health check failed: {type(ex).__name__}: {ex}"
+                    return
+
+    @asynccontextmanager
+    async def session(self, timeout: float = CONNECT_TIMEOUT_SECONDS):
+        """
+        Borrow a healthy session. Marks it broken if the body fails at the transport level.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ConnectionError(f"No healthy MCP session for {self.name}: {self.last_error}")
+            slot = await asyncio.wait_for(self._idle.get(), remaining)
+            if not slot.broken.is_set():
+                break
+        try:
+            yield slot.session
+        except Exception as ex:
+            # a server-side error leaves the session usable; a dropped or hung one does not
+            if _is_session_error(ex):
+                self.last_error = f"{type(ex).__name__}: {ex}"
+                slot.broken.set()
+            raise
+        finally:
+            if not slot.broken.is_set():
+                self._idle.put_nowait(slot)
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None, read_timeout_seconds=None,
+                        progress_callback=None, **kwargs):
+        self.calls += 1
+        timeout = read_timeout_seconds or timedelta(seconds=CALL_TIMEOUT_SECONDS)
+        with span(f"mcp {self.name}/{name}", "mcp", server=self.name, tool=name, metric_name=f"{self.name}/{name}") as call:
+            read_only = is_cacheable(name)
+            for attempt in range(2):
+                sent = False
+                try:
+                    async with self.session() as session:
+                        sent = True
+                        result = await session.call_tool(name, arguments, read_timeout_seconds=timeout,
+                                                         progress_callback=progress_callback, **kwargs)
+                    call.set(attempts=attempt + 1, is_error=bool(getattr(result, "isError", False)))
+                    return result
+                except Exception as ex:
+                    if not _is_session_error(ex):
+                        raise
+                    self.failures += 1
+                    # A write that reached the server may have run; running it again could duplicate it
+                    if attempt == 1 or (sent and not (read_only and _is_retryable(ex))):
+                        raise
+
+    async def list_tools(self, cursor: Optional[str] = None, **kwargs):
+        async with self.session() as session:
+            return await session.list_tools(cursor=cursor, **kwargs)
+
+    def status(self) -> dict:
+        return {
+            "transport": self.transport,
+            "sessions": self.size,
+            "connected": self.connected,
+            "idle": self._idle.qsize(),
+            "reconnects": self.reconnects,
+            "calls": self.calls,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class MCPManager:
+    """
+    Session pools for all MCP servers, exposed as LangChain tools whose calls
+    go through the pools instead of opening a new connection per call (which
+    is what MultiServerMCPClient.get_tools() does).
+    """
+
+    def __init__(self, connections: Dict[str, dict], sessions_per_server: int = SESSIONS_PER_SERVER):
+        self.pools = {name: MCPServerPool(name, connection, sessions_per_server)
+                      for name, connection in connections.items()}
+        # Tools loaded per server, and when loading last failed (retried after HEALTH_INTERVAL_SECONDS)
+        self._tools: Dict[str, list] = {}
+        self._load_failed: Dict[str, float] = {}
+
+    async def start(self) -> None:
+        """
+        Connect to every server concurrently. Servers that cannot be reached are
+        reported and keep retrying in the background; their tools are added by
+        a later get_tools() once they connect.
+        """
+        results = await asyncio.gather(*(pool.start() for pool in self.pools.values()), return_exceptions=True)
+        for pool, result in zip(self.pools.values(), results):
+            if isinstance(result, Exception):
+                print(f"MCP server {pool.name} unavailable at startup: {result}")
+            else:
+                print(f"MCP server {pool.name} connected over {pool.transport} ({pool.connected} sessions)")
+
+    def _pending(self) -> List[MCPServerPool]:
+        now = time.monotonic()
+        return [pool for name, pool in self.pools.items()
+                if pool._ready.is_set() and name not in self._tools
+                and now - self._load_failed.get(name, -HEALTH_INTERVAL_SECONDS) >= HEALTH_INTERVAL_SECONDS]
+
+    def has_new_tools(self) -> bool:
+        """
+        True when a server that was down at startup has connected since the tools were last collected.
+        """
+        return bool(self._pending())
+
+    async def get_tools(self) -> list:
+        """
+        Tools of every connected server. Each server's tools are loaded once,
+        the first time it is up; servers still down are skipped.
+        """
+        return [tool for server_tools in (await self.get_server_tools()).values() for tool in server_tools]
+
+    async def get_server_tools(self) -> Dict[str, list]:
+        """
+        Like get_tools(), grouped by server name.
+        """
+        for pool in self._pending():
+            try:
+                # the pool stands in for a ClientSession: the tools call pool.call_tool()
+                self._tools[pool.name] = await load_mcp_tools(pool, server_name=pool.name)
+                print(f"Loaded {len(self._tools[pool.name])} tools from MCP server {pool.name}")
+            except Exception as ex:
+                self._load_failed[pool.name] = time.monotonic()
+                print(f"Could not load tools from MCP server {pool.name}: {ex}")
+        return {name: self._tools[name] for name in self.pools if name in self._tools}
+
+    async def stop(self) -> None:
+        await asyncio.gather(*(pool.stop() for pool in self.pools.values()), return_exceptions=True)
+
+    def status(self) -> Dict[str, dict]:
+        return {name: pool.status() for name, pool in self.pools.items()}
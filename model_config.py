@@ -0,0 +1,65 @@
+# model_config.py
+
+import os
+import re
+from typing import Optional
+
+from dotenv import load_dotenv
+from phi.model.openai import OpenAIChat
+
+load_dotenv()
+
+# Model per role. Specialists and the MCP agent mostly pick tools and
+# summarize what they return, so they default to the small, fast model; the
+# team lead writes the final synthesis and keeps the large one.
+MODEL_LEAD = os.getenv("MODEL_LEAD", "gpt-4o")
+MODEL_SPECIALIST = os.getenv("MODEL_SPECIALIST", "gpt-4o-mini")
+MODEL_MCP_AGENT = os.getenv("MODEL_MCP_AGENT", "gpt-4o-mini")
+# Model a specialist or MCP agent answer is re-run on when it fails the
+# confidence check; empty disables escalation
+MODEL_ESCALATION = os.getenv("MODEL_ESCALATION", "gpt-4o")
+ESCALATION_MIN_CHARS = int(os.getenv("ESCALATION_MIN_CHARS", "40"))
+
+ROLES = {"lead": MODEL_LEAD, "specialist": MODEL_SPECIALIST, "mcp_agent": MODEL_MCP_AGENT}
+
+# Answers that say the model gave up, or that pass a tool error on verbatim
+LOW_CONFIDENCE = re.compile(
+    r"\b(i (do not|don't|couldn't|could not|can't|cannot|was unable to|am unable to|am not sure)"
+    r"|unable to (find|locate|determine|access|retrieve)|no (relevant )?(information|results|data) (was |were )?(found|available)"
+    r"|not enough (information|context))\b|\{\s*\"error\"\s*:",
+    re.IGNORECASE,
+)
+
+
+def model_id(role: str, name: Optional[str] = None) -> str:
+    """
+    Model for `role` ("lead", "specialist" or "mcp_agent"). A specialist
+    `name` can be overridden on its own with MODEL_<NAME>, e.g. MODEL_JIRA.
+    """
+    if name:
+        override = os.getenv(f"MODEL_{name.upper()}")
+        if override:
+            return override
+    return ROLES[role]
+
+
+def phi_model(role: str, name: Optional[str] = None) -> OpenAIChat:
+    return OpenAIChat(id=model_id(role, name))
+
+
+def escalation_model_id(role: str, name: Optional[str] = None) -> Optional[str]:
+    """
+    Model to escalate to from `role`, or None when escalation is off or would not change the model.
+    """
+    if not MODEL_ESCALATION or MODEL_ESCALATION == model_id(role, name):
+        return None
+    return MODEL_ESCALATION
+
+
+def needs_escalation(answer: Optional[str]) -> bool:
+    """
+    Confidence check on a small-model answer: empty or very short answers,
+    "I couldn't find ..." style refusals and raw tool errors fail it.
+    """
+    text = (answer or "").strip()
+    return len(text) < ESCALATION_MIN_CHARS or LOW_CONFIDENCE.search(text) is not None
@@ -1,8 +1,10 @@
 # agents/notion_agent.py
 
-from phi.knowledge.csv import CSVKnowledgeBase
-from phi.vectordb.pgvector import PgVector
+from hybrid_retrieval import HybridCSVKnowledgeBase
+from vector_store import make_vector_db
 from phi.agent import Agent
+from agent_pool import AgentPool
+from model_config import escalation_model_id, phi_model
 import os
 from dotenv import load_dotenv
 
@@ -17,6 +19,17 @@ os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
 _notion_knowledge_base = None
 _knowledge_base_loaded = False
 
+def create_notion_knowledge_base():
+    """
+    Build (but do not load) the Notion knowledge base: one document per CSV row, keyed by Page ID.
+    """
+    return HybridCSVKnowledgeBase(
+        path="notion_pages.csv",
+        id_column="Page ID",
+        title_column="Page Title",
+        vector_db=make_vector_db("csv_documents"),
+    )
+
 def get_notion_knowledge_base():
     """
     Singleton function to get or create the Notion knowledge base.
@@ -26,27 +39,18 @@ def get_notion_knowledge_base():
     
     if _notion_knowledge_base is None:
         print("Initializing Notion knowledge base for the first time...")
-        _notion_knowledge_base = CSVKnowledgeBase(
-            path="notion_pages.csv",
-            vector_db=PgVector(
-                table_name="csv_documents",
-                db_url="postgresql+psycopg://ai:ai@localhost:5532/ai",
-            ),
-        )
+        _notion_knowledge_base = create_notion_knowledge_base()
         
-        # Load the knowledge base only once
+        # Sync the knowledge base only once; only new or changed rows are embedded
         if not _knowledge_base_loaded:
             try:
-                print("Loading Notion knowledge base...")
-                _notion_knowledge_base.load(recreate=False)
-                _knowledge_base_loaded = True
+                print("Syncing Notion knowledge base...")
+                _notion_knowledge_base.sync()
                 print("Notion knowledge base loaded successfully!")
             except Exception as e:
-                print(f"Error loading Notion knowledge base: {e}")
-                print("Attempting to recreate knowledge base...")
-                _notion_knowledge_base.load(recreate=True)
-                _knowledge_base_loaded = True
-                print("Notion knowledge base recreated successfully!")
+                # Serve whatever is already in the vector db rather than re-embedding everything
+                print(f"Error syncing Notion knowledge base: {e}")
+            _knowledge_base_loaded = True
     else:
         print("Using existing Notion knowledge base instance")
     
@@ -61,6 +65,7 @@ def make_notion_agent():
     
     agent = Agent(
         name="Notion Knowledge Specialist",
+        model=phi_model("specialist", "notion"),
         role="Expert knowledge retrieval specialist focused on organizational documentation, procedures, and information stored in Notion databases",
         description="You are a specialized knowledge assistant that excels at searching through Notion databases to find relevant documentation, procedures, guidelines, feature roadmaps, and organizational information. You have deep expertise in understanding context and providing comprehensive answers from knowledge bases.",
         knowledge=knowledge_base,
@@ -82,16 +87,29 @@ def make_notion_agent():
     
     return agent
 
+# Reused Notion agents; each run gets a fresh session
+notion_agents = AgentPool(make_notion_agent, name="notion", escalate_to=escalation_model_id("specialist", "notion"))
+
 def run_notion_query(query: str):
     """
-    Runs a query against the Notion agent.
+    Runs a query against a pooled Notion agent.
     Uses the singleton knowledge base for efficiency.
     """
-    agent = make_notion_agent()
     # returns a RunResponse object
-    response = agent.run(query, stream=False)
+    response = notion_agents.run(query)
     return response
 
+def refresh_notion_knowledge_base():
+    """
+    Re-read the CSV into the already-loaded knowledge base, e.g. after a background sync.
+    Does nothing if the knowledge base has not been created yet.
+    """
+    if _notion_knowledge_base is None:
+        return
+    print("Refreshing Notion knowledge base...")
+    _notion_knowledge_base.sync()
+    print("Notion knowledge base refreshed!")
+
 def reset_notion_knowledge_base():
     """
     Utility function to reset the knowledge base (useful for development/testing).
@@ -132,24 +150,14 @@ class NotionKnowledgeBaseSingleton:
             with self._lock:
                 if not hasattr(self, 'knowledge_base') or not self._loaded:
                     print("Initializing thread-safe Notion knowledge base...")
-                    self.knowledge_base = CSVKnowledgeBase(
-                        path="notion_pages.csv",
-                        vector_db=PgVector(
-                            table_name="csv_documents",
-                            db_url="postgresql+psycopg://ai:ai@localhost:5532/ai",
-                        ),
-                    )
+                    self.knowledge_base = create_notion_knowledge_base()
                     try:
-                        print("Loading Notion knowledge base (thread-safe)...")
-                        self.knowledge_base.load(recreate=False)
-                        self._loaded = True
+                        print("Syncing Notion knowledge base (thread-safe)...")
+                        self.knowledge_base.sync()
                         print("Notion knowledge base loaded successfully!")
                     except Exception as e:
-                        print(f"Error loading knowledge base: {e}")
-                        print("Attempting to recreate...")
-                        self.knowledge_base.load(recreate=True)
-                        self._loaded = True
-                        print("Notion knowledge base recreated successfully!")
+                        print(f"Error syncing knowledge base: {e}")
+                    self._loaded = True
         
         return self.knowledge_base
     
@@ -170,6 +178,7 @@ def make_notion_agent_threadsafe():
     
     agent = Agent(
         name="Notion Knowledge Specialist",
+        model=phi_model("specialist", "notion"),
         role="Expert knowledge retrieval specialist focused on organizational documentation, procedures, and information stored in Notion databases",
         description="You are a specialized knowledge assistant that excels at searching through Notion databases to find relevant documentation, procedures, guidelines, feature roadmaps, and organizational information. You have deep expertise in understanding context and providing comprehensive answers from knowledge bases.",
         knowledge=knowledge_base,
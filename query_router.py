@@ -0,0 +1,166 @@
+# query_router.py
+
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+# "keywords" routes on the rules below, "embedding" also compares the query
+# with labeled example queries, "off" always consults every specialist
+ROUTER_MODE = os.getenv("ROUTER_MODE", "keywords").lower()
+# Minimum cosine similarity to a specialist's nearest example, and how far
+# below the best specialist another one may score and still be consulted
+ROUTER_MIN_SIMILARITY = float(os.getenv("ROUTER_MIN_SIMILARITY", "0.35"))
+ROUTER_MARGIN = float(os.getenv("ROUTER_MARGIN", "0.05"))
+
+# Signals per specialist. A query mentioning none of them goes to everyone.
+KEYWORD_RULES: Dict[str, List[str]] = {
+    "Jira": [
+        r"\bjira\b", r"(?-i:\b[A-Z][A-Z0-9]+-\d+\b)", r"\bsprints?\b", r"\bbacklog\b", r"\btickets?\b", r"\bissues?\b",
+        r"\bbugs?\b", r"\bstor(y|ies)\b", r"\bepics?\b", r"\bassign(ed|ee)?\b", r"\bblock(ed|er|ers)\b",
+        r"\bin progress\b", r"\bto do\b", r"\bstatus\b", r"\bjql\b", r"\bkanban\b", r"\bboard\b",
+    ],
+    "Confluence": [
+        r"\bconfluence\b", r"\bdoc(s|umentation|umented)?\b", r"\bhow (do|to|can)\b", r"\bguides?\b",
+        r"\brunbooks?\b", r"\bprocedures?\b", r"\bsetup\b", r"\binstall(ation)?\b", r"\bconfigur(e|ation)\b",
+        r"\barchitecture\b", r"\bspec(ification)?s?\b", r"\bwiki\b", r"\btroubleshoot(ing)?\b", r"\bapi\b",
+    ],
+    "Notion": [
+        r"\bnotion\b", r"\broadmaps?\b", r"\bstrateg(y|ic|ies)\b", r"\bokrs?\b", r"\bgoals?\b", r"\bvision\b",
+        r"\bnotes\b", r"\bquarter(ly)?\b", r"\bq[1-4]\b", r"\bplan(s|ned|ning)?\b",
+        r"\bpriorities\b", r"\binitiatives?\b", r"\bfeature (list|requests?)\b",
+    ],
+}
+
+# Labeled examples for the embedding classifier
+EXAMPLES: Dict[str, List[str]] = {
+    "Jira": [
+        "What's assigned to me this sprint?",
+        "Which tickets are blocked right now?",
+        "Show the open bugs for the mobile app",
+        "What is the status of KNOCCS-142?",
+        "How many stories are left in the backlog for the next release?",
+        "Who is working on the login issue?",
+    ],
+    "Confluence": [
+        "How do I deploy the backend service?",
+        "Where is the onboarding guide for new developers?",
+        "Explain the architecture of the payment system",
+        "What are the steps to configure the staging environment?",
+        "Is there a runbook for database failover?",
+        "Show me the API documentation for the user service",
+    ],
+    "Notion": [
+        "What is on the product roadmap for next quarter?",
+        "What are our OKRs this year?",
+        "Summarize the notes from the last planning meeting",
+        "What is the strategy behind the new pricing model?",
+        "Which features are planned for version 7?",
+        "What are the team's priorities and goals?",
+    ],
+}
+
+
+@dataclass
+class Route:
+    specialists: List[str]
+    reason: str  # "forced", "keywords", "embedding", "fallback" or "off"
+    scores: Optional[Dict[str, float]] = None
+
+
+class QueryRouter:
+    """
+    Decides which specialists a team query needs, so a Jira-only question
+    does not pay for Confluence and Notion retrieval and their LLM loops.
+
+    Keyword rules come first and are nearly free. In "embedding" mode, a
+    query the rules cannot place is compared with the labeled EXAMPLES
+    (embedded once, through the on-disk embedding cache). Every specialist
+    whose nearest example is close enough, and within ROUTER_MARGIN of the
+    best one, is consulted. When neither method is confident, all
+    specialists are consulted, as before.
+    """
+
+    def __init__(self, mode: str = ROUTER_MODE, rules: Dict[str, List[str]] = None,
+                 examples: Dict[str, List[str]] = None, embedder=None,
+                 min_similarity: float = ROUTER_MIN_SIMILARITY, margin: float = ROUTER_MARGIN):
+        self.mode = mode
+        self.rules = {name: [re.compile(p, re.IGNORECASE) for p in patterns]
+                      for name, patterns in (rules or KEYWORD_RULES).items()}
+        self.examples = examples or EXAMPLES
+        self.min_similarity = min_similarity
+        self.margin = margin
+        self._embedder = embedder
+        self._example_vectors = None
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+
+    def keyword_scores(self, query: str) -> Dict[str, int]:
+        return {name: sum(1 for pattern in patterns if pattern.search(query)) for name, patterns in self.rules.items()}
+
+    def _vectors(self):
+        import numpy as np
+
+        with self._lock:
+            if self._example_vectors is None:
+                if self._embedder is None:
+                    from embedding_cache import CachedBatchEmbedder
+                    self._embedder = CachedBatchEmbedder()
+                vectors = {}
+                for name, texts in self.examples.items():
+                    matrix = np.asarray(self._embedder.embed_batch(texts), dtype=np.float32)
+                    vectors[name] = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+                self._example_vectors = vectors
+            return self._example_vectors
+
+    def embedding_scores(self, query: str) -> Dict[str, float]:
+        """
+        Cosine similarity of `query` to each specialist's nearest example.
+        """
+        import numpy as np
+
+        examples = self._vectors()
+        vector = np.asarray(self._embedder.get_embedding(query), dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        return {name: float((matrix @ vector).max()) for name, matrix in examples.items()}
+
+    def route(self, query: str, names: Sequence[str], force_all: bool = False) -> Route:
+        """
+        The subset of `names` (specialist names, in their original order) to consult for `query`.
+        """
+        route = self._route(query, list(names), force_all)
+        with self._lock:
+            key = "all" if len(route.specialists) == len(names) else "+".join(route.specialists)
+            self._counts[key] = self._counts.get(key, 0) + 1
+        return route
+
+    def _route(self, query: str, names: List[str], force_all: bool) -> Route:
+        if force_all:
+            return Route(names, "forced")
+        if self.mode == "off":
+            return Route(names, "off")
+
+        scores = self.keyword_scores(query)
+        matched = [name for name in names if scores.get(name)]
+        if matched:
+            return Route(matched, "keywords", {k: float(v) for k, v in scores.items()})
+
+        if self.mode == "embedding":
+            try:
+                similarities = self.embedding_scores(query)
+            except Exception as ex:
+                print(f"Query router embedding failed, consulting every specialist: {ex}")
+                return Route(names, "fallback")
+            best = max((similarities.get(name, 0.0) for name in names), default=0.0)
+            if best >= self.min_similarity:
+                chosen = [name for name in names if similarities.get(name, 0.0) >= best - self.margin]
+                return Route(chosen, "embedding", similarities)
+        return Route(names, "fallback")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"mode": self.mode, "routes": dict(self._counts)}
+
+
+query_router = QueryRouter()
@@ -0,0 +1,176 @@
+# storage_chunker.py
+
+import os
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Tuple
+
+# Target chunk size and the tail of the previous chunk repeated at the start of the next
+CHUNK_MAX_CHARS = int(os.getenv("CONFLUENCE_CHUNK_MAX_CHARS", "1200"))
+CHUNK_OVERLAP_CHARS = int(os.getenv("CONFLUENCE_CHUNK_OVERLAP_CHARS", "200"))
+
+HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+# Tags that end a block of text
+BLOCKS = {"p", "div", "li", "tr", "pre", "blockquote", "br", "hr", "table", "ul", "ol", "dt", "dd",
+          "ac:task", "ac:layout-cell"}
+CELLS = {"td", "th"}
+# Macro configuration, attachments and similar carry no readable text
+SKIPPED = {"ac:parameter", "ri:attachment", "ri:user", "style", "script"}
+
+
+class StorageTextExtractor(HTMLParser):
+    """
+    Walks Confluence storage-format XHTML and collects readable text as
+    sections: (heading path, paragraphs), where the heading path is the list
+    of headings above the section.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sections: List[Tuple[List[str], List[str]]] = [([], [])]
+        self.headings: List[Tuple[int, str]] = []
+        self.current: List[str] = []
+        self.heading_level = 0
+        self.skip_depth = 0
+
+    def _flush(self):
+        text = re.sub(r"\s+", " ", "".join(self.current)).strip()
+        self.current = []
+        if not text:
+            return
+        if self.heading_level:
+            self.headings = [h for h in self.headings if h[0] < self.heading_level] + [(self.heading_level, text)]
+            self.sections.append(([h[1] for h in self.headings], []))
+        else:
+            self.sections[-1][1].append(text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED:
+            self.skip_depth += 1
+        elif tag in HEADINGS:
+            self._flush()
+            self.heading_level = HEADINGS[tag]
+        elif tag in BLOCKS:
+            if "".join(self.current).strip() != "-":  # keep a list bullet with its <p>
+                self._flush()
+            if tag == "li":
+                self.current.append("- ")
+        elif tag in CELLS and self.current:
+            self.current.append(" | ")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCKS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in HEADINGS:
+            self._flush()
+            self.heading_level = 0
+        elif tag in BLOCKS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.current.append(data)
+
+    def unknown_decl(self, data):
+        # code and no-format macros keep their body in CDATA
+        if data.startswith("CDATA[") and not self.skip_depth:
+            self._flush()
+            self.current.append(data[len("CDATA["):])
+            self._flush()
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def parse_storage(storage: str) -> List[Tuple[List[str], List[str]]]:
+    """
+    Non-empty (heading path, paragraphs) sections of a storage-format body.
+    """
+    parser = StorageTextExtractor()
+    parser.feed(storage or "")
+    parser.close()
+    return [(path, paragraphs) for path, paragraphs in parser.sections if paragraphs]
+
+
+def storage_to_text(storage: str) -> str:
+    """
+    Clean text of a storage-format body, headings kept as their own lines.
+    """
+    lines = []
+    for path, paragraphs in parse_storage(storage):
+        if path:
+            lines.append(path[-1])
+        lines.extend(paragraphs)
+    return "\n".join(lines)
+
+
+def excerpt(text: str, max_chars: int = 500) -> str:
+    """
+    The start of `text`, cut at a word boundary.
+    """
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+
+def _overlap_tail(text: str, overlap: int) -> str:
+    if overlap <= 0 or len(text) <= overlap:
+        return text if overlap > 0 else ""
+    tail = text[-overlap:]
+    return tail.split(" ", 1)[1] if " " in tail else tail
+
+
+def _split_long(paragraph: str, max_chars: int) -> List[str]:
+    """
+    Split a paragraph longer than `max_chars` at sentence, then word, boundaries.
+    """
+    pieces, current = [], ""
+    for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_storage(storage: str, title: str = "", max_chars: int = CHUNK_MAX_CHARS,
+                  overlap: int = CHUNK_OVERLAP_CHARS) -> List[Dict[str, str]]:
+    """
+    Split a storage-format body into heading-aware chunks of about
+    `max_chars` of clean text. A chunk never spans two sections; within a
+    section consecutive chunks share `overlap` characters. Every page yields
+    at least one chunk (just the title when the body is empty).
+    """
+    chunks = []
+    for path, paragraphs in parse_storage(storage):
+        heading = " > ".join(path)
+        # leave room for the overlap carried into the next chunk
+        piece_chars = max(max_chars - overlap, 1)
+        pieces = [piece for paragraph in paragraphs for piece in _split_long(paragraph, piece_chars)]
+        current = ""
+        for piece in pieces:
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append({"heading": heading, "text": current})
+                current = f"{_overlap_tail(current, overlap)}\n{piece}".strip()
+            else:
+                current = f"{current}\n{piece}".strip()
+        if current:
+            chunks.append({"heading": heading, "text": current})
+    return chunks or [{"heading": "", "text": title}]
@@ -0,0 +1,120 @@
+# streaming.py
+
+import asyncio
+import json
+import threading
+import time
+from typing import Union
+
+from worker_pool import BoundedWorkerPool, Lease
+
+_DONE = object()
+
+# Tool outputs can be whole Jira issues or Confluence pages; keep events small
+MAX_EVENT_PAYLOAD_CHARS = 2000
+
+
+def sse_event(event: str, data: dict) -> str:
+    """
+    Format one server-sent event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _truncate(value) -> str:
+    text = value if isinstance(value, str) else str(value)
+    return text if len(text) <= MAX_EVENT_PAYLOAD_CHARS else text[:MAX_EVENT_PAYLOAD_CHARS] + "…"
+
+
+async def iterate_in_pool(pool: Union[BoundedWorkerPool, Lease], gen_fn, *args, **kwargs):
+    """
+    Drive a synchronous generator (e.g. phi's Agent.run(stream=True)) on a
+    worker thread and yield its items on the event loop as they are produced.
+    The producer stops at the next item once the consumer goes away.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in gen_fn(*args, **kwargs):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except Exception as ex:
+            loop.call_soon_threadsafe(queue.put_nowait, (_DONE, ex))
+            return
+        loop.call_soon_threadsafe(queue.put_nowait, (_DONE, None))
+
+    producer = asyncio.ensure_future(pool.execute(produce))
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                break
+            yield item
+    finally:
+        stop.set()
+        if producer.done():
+            producer.result()
+
+
+async def with_deadline(events, seconds: float):
+    """
+    Re-yield an async iterator, raising asyncio.TimeoutError once `seconds`
+    have elapsed in total.
+    """
+    deadline = time.monotonic() + seconds
+    iterator = events.__aiter__()
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        try:
+            item = await asyncio.wait_for(iterator.__anext__(), remaining)
+        except StopAsyncIteration:
+            return
+        yield item
+
+
+async def langgraph_events(agent, message: str):
+    """
+    Map LangGraph astream_events to (event, data) tuples: tokens, tool starts and tool results.
+    """
+    from langchain_core.messages import HumanMessage
+
+    async for event in agent.astream_events({"messages": [HumanMessage(content=message)]}, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            text = event["data"]["chunk"].content
+            if text:
+                yield "token", {"text": text}
+        elif kind == "on_tool_start":
+            yield "tool_start", {"tool": event["name"], "args": _truncate(event["data"].get("input"))}
+        elif kind == "on_tool_end":
+            output = event["data"].get("output")
+            yield "tool_end", {"tool": event["name"], "output": _truncate(getattr(output, "content", output))}
+
+
+def phi_events(run_stream):
+    """
+    Map a phi `Agent.run(stream=True, stream_intermediate_steps=True)` iterator
+    to (event, data) tuples. Team transfers surface as "handoff" events.
+    """
+    for chunk in run_stream:
+        kind = getattr(chunk, "event", "RunResponse")
+        if kind == "RunResponse":
+            if chunk.content:
+                yield "token", {"text": str(chunk.content)}
+        elif kind in ("ToolCallStarted", "ToolCallCompleted"):
+            tool = (chunk.tools or [{}])[-1]
+            name = tool.get("tool_name", "")
+            if kind == "ToolCallStarted":
+                if name.startswith("transfer_task_to_"):
+                    yield "handoff", {"specialist": name[len("transfer_task_to_"):]}
+                yield "tool_start", {"tool": name, "args": _truncate(tool.get("tool_args"))}
+            else:
+                yield "tool_end", {"tool": name, "output": _truncate(tool.get("content"))}
@@ -0,0 +1,106 @@
+# sync_service.py
+
+import asyncio
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+SYNC_INTERVAL_SECONDS = float(os.getenv("SYNC_INTERVAL_SECONDS", "3600"))
+# Delay before the first sync so startup and the first requests are not competing with it
+SYNC_INITIAL_DELAY_SECONDS = float(os.getenv("SYNC_INITIAL_DELAY_SECONDS", "5"))
+
+
+@dataclass
+class SyncStatus:
+    last_started: Optional[str] = None
+    last_finished: Optional[str] = None
+    last_success: Optional[str] = None
+    duration_seconds: Optional[float] = None
+    rows: Optional[int] = None
+    error: Optional[str] = None
+    runs: int = 0
+    running: bool = False
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class SyncScheduler:
+    """
+    Periodically runs the ingest jobs (Notion and Confluence exports) in the
+    background while the server keeps answering from the existing files.
+
+    `jobs` maps a source name to a callable returning the number of rows
+    written: a coroutine function runs on the event loop, anything else on a
+    worker thread. The jobs of one run execute concurrently. `on_synced(name)`
+    is called on a worker thread after a job succeeds, e.g. to refresh the
+    knowledge base and invalidate cached answers.
+    """
+
+    def __init__(self, jobs: Dict[str, Callable[[], int]], interval: float = SYNC_INTERVAL_SECONDS,
+                 initial_delay: float = SYNC_INITIAL_DELAY_SECONDS, on_synced: Callable[[str], None] = None):
+        self.jobs = jobs
+        self.interval = interval
+        self.initial_delay = initial_delay
+        self.on_synced = on_synced
+        self._status = {name: SyncStatus() for name in jobs}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        await asyncio.sleep(self.initial_delay)
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self, names: List[str] = None):
+        """
+        Run the selected jobs (all by default) concurrently. Concurrent calls are serialized.
+        """
+        async with self._lock:
+            await asyncio.gather(*(self._run_job(name) for name in names or list(self.jobs)))
+
+    async def _run_job(self, name: str):
+        status = self._status[name]
+        status.running = True
+        status.last_started = _now()
+        started = time.perf_counter()
+        try:
+            job = self.jobs[name]
+            rows = await job() if asyncio.iscoroutinefunction(job) else await asyncio.to_thread(job)
+            if self.on_synced:
+                await asyncio.to_thread(self.on_synced, name)
+            status.rows = rows
+            status.error = None
+            status.last_success = _now()
+            print(f"Sync of {name} finished: {rows} rows")
+        except Exception as ex:
+            status.error = str(ex)
+            print(f"Sync of {name} failed: {ex}")
+        finally:
+            status.duration_seconds = round(time.perf_counter() - started, 3)
+            status.last_finished = _now()
+            status.runs += 1
+            status.running = False
+
+    def status(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "sources": {name: asdict(status) for name, status in self._status.items()},
+        }
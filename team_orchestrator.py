@@ -0,0 +1,209 @@
+# team_orchestrator.py
+
+import asyncio
+import os
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from phi.agent import Agent
+
+from agent_pool import AgentPool
+from model_config import phi_model
+from query_router import query_router
+from streaming import iterate_in_pool, phi_events
+from tracing import set_attribute, span
+from worker_pool import Lease
+
+DEFAULT_SPECIALIST_TIMEOUT = float(os.getenv("TEAM_SPECIALIST_TIMEOUT_SECONDS", "90"))
+
+SYNTHESIS_INSTRUCTIONS = [
+    "You are the lead Project Intelligence Agent. Your specialists (Jira, Confluence and Notion) have already researched the user's query; their findings are included in the message.",
+    "Build a coherent narrative that connects tasks in Jira to their documentation in Confluence and their strategic purpose in Notion. Do not simply list information.",
+    "Present the synthesized information clearly, using bold keywords, headings, and bullet points.",
+    "If information from different sources conflicts, highlight the discrepancy and provide context to explain it.",
+    "If a specialist timed out or failed, say which source is missing instead of guessing its content.",
+    "Only the specialists relevant to the query were consulted; do not mention sources whose findings are not in the message.",
+    "Always cite your sources by clearly referencing the application (e.g., 'From Jira,' 'From Confluence,' 'From Notion').",
+    "Conclude your response with clear, actionable insights or next steps.",
+]
+
+
+@dataclass
+class Specialist:
+    """
+    A team member for the parallel orchestrator: a display name, the pool
+    its phi Agents come from, and an optional deadline override.
+    """
+    name: str
+    agents: AgentPool
+    timeout: Optional[float] = None
+
+
+@dataclass
+class SpecialistResult:
+    name: str
+    status: str  # "ok", "timeout" or "error"
+    content: str = ""
+    seconds: float = 0.0
+
+
+@dataclass
+class TeamResult:
+    content: str
+    specialists: List[SpecialistResult] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def specialist_timeout(name: str) -> float:
+    """
+    Per-specialist deadline, e.g. TEAM_JIRA_TIMEOUT_SECONDS, falling back to
+    TEAM_SPECIALIST_TIMEOUT_SECONDS.
+    """
+    return float(os.getenv(f"TEAM_{name.upper()}_TIMEOUT_SECONDS", DEFAULT_SPECIALIST_TIMEOUT))
+
+
+def make_synthesis_agent() -> Agent:
+    return Agent(
+        name="Integrated Workspace Assistant",
+        description="You are an expert workspace assistant that synthesizes findings from project management (Jira), technical documentation (Confluence), and knowledge management (Notion) specialists into comprehensive, actionable insights.",
+        model=phi_model("lead"),
+        instructions=SYNTHESIS_INSTRUCTIONS,
+        markdown=True,
+        add_datetime_to_instructions=True,
+        prevent_hallucinations=True,
+    )
+
+
+@contextmanager
+def checkout_members(specialists: List[Specialist]):
+    """
+    One pooled agent per specialist, in a fresh session, for a phi team
+    leader to transfer to; they go back to their pools when the block exits.
+    """
+    with ExitStack() as stack:
+        yield [stack.enter_context(s.agents.agent()) for s in specialists]
+
+
+def route_specialists(specialists: List[Specialist], query: str, force_all: bool = False) -> List[Specialist]:
+    """
+    The specialists `query` needs according to the query router (all of them with `force_all`).
+    """
+    route = query_router.route(query, [s.name for s in specialists], force_all)
+    print(f"Routing team query to {', '.join(route.specialists)} ({route.reason})")
+    set_attribute(route=",".join(route.specialists), route_reason=route.reason)
+    return [s for s in specialists if s.name in route.specialists]
+
+
+def team_slots(specialists: List[Specialist]) -> int:
+    """
+    Worker slots a parallel team query can occupy at once: one per specialist,
+    plus the synthesis step, which may start while a timed-out specialist's
+    thread is still running.
+    """
+    return len(specialists) + (1 if len(specialists) > 1 else 0)
+
+
+def _single_answer(results: List[SpecialistResult]) -> Optional[str]:
+    # With one specialist there is nothing to synthesize; pass its answer through
+    if len(results) == 1 and results[0].status == "ok":
+        return results[0].content
+    return None
+
+
+def _run_specialist(specialist: Specialist, query: str) -> str:
+    response = specialist.agents.run(query)
+    return str(response.content)
+
+
+async def _gather_specialist(lease: Lease, specialist: Specialist, query: str) -> SpecialistResult:
+    timeout = specialist.timeout or specialist_timeout(specialist.name)
+    started = time.perf_counter()
+    with span(f"specialist {specialist.name}", "specialist", metric_name=specialist.name) as handoff:
+        try:
+            content = await asyncio.wait_for(lease.execute(_run_specialist, specialist, query), timeout)
+            status = "ok"
+        except asyncio.TimeoutError:
+            content, status = "", "timeout"
+        except Exception as ex:
+            print(f"Specialist {specialist.name} failed: {ex}")
+            content, status = "", "error"
+        handoff.set(status=status)
+    return SpecialistResult(specialist.name, status, content, round(time.perf_counter() - started, 3))
+
+
+def build_synthesis_prompt(query: str, results: List[SpecialistResult]) -> str:
+    sections = [f"User query: {query}", ""]
+    for result in results:
+        if result.status == "ok":
+            sections.append(f"## Findings from the {result.name} specialist\n{result.content}")
+        else:
+            sections.append(f"## {result.name} specialist\nNo findings ({result.status} after {result.seconds:.1f}s).")
+    return "\n\n".join(sections)
+
+
+async def gather_specialists(lease: Lease, specialists: List[Specialist], query: str) -> List[SpecialistResult]:
+    """
+    Send `query` to every specialist at once and wait for each up to its own deadline.
+    """
+    return list(await asyncio.gather(*(_gather_specialist(lease, s, query) for s in specialists)))
+
+
+async def run_team_parallel(lease: Lease, specialists: List[Specialist], query: str) -> TeamResult:
+    """
+    Fan the query out to the given specialists concurrently, then hand only
+    the final synthesis step to the lead model. Wall time is roughly the
+    slowest specialist (bounded by its deadline) plus one synthesis call; a
+    lone specialist's answer is returned as is, without synthesis.
+    """
+    started = time.perf_counter()
+    results = await gather_specialists(lease, specialists, query)
+
+    synthesis_started = time.perf_counter()
+    content = _single_answer(results)
+    if content is None:
+        with span("synthesis", "synthesis"):
+            lead = make_synthesis_agent()
+            response = await lease.execute(lead.run, build_synthesis_prompt(query, results), stream=False)
+        content = str(response.content)
+
+    timings = {r.name.lower(): r.seconds for r in results}
+    timings["synthesis"] = round(time.perf_counter() - synthesis_started, 3)
+    timings["total"] = round(time.perf_counter() - started, 3)
+    return TeamResult(content=content, specialists=results, timings=timings)
+
+
+async def stream_team_parallel(lease: Lease, specialists: List[Specialist], query: str):
+    """
+    Streaming variant of run_team_parallel yielding (event, data) tuples:
+    specialist start/done events as each specialist finishes, then the
+    synthesis tokens, then a final "done" event with the timings.
+    """
+    started = time.perf_counter()
+    for specialist in specialists:
+        yield "specialist_start", {"specialist": specialist.name}
+
+    results = []
+    for finished in asyncio.as_completed([_gather_specialist(lease, s, query) for s in specialists]):
+        result = await finished
+        results.append(result)
+        yield "specialist_done", {"specialist": result.name, "status": result.status, "seconds": result.seconds}
+
+    synthesis_started = time.perf_counter()
+    order = [s.name for s in specialists]
+    results.sort(key=lambda r: order.index(r.name))
+    content = _single_answer(results)
+    if content is not None:
+        yield "token", {"text": content}
+    else:
+        with span("synthesis", "synthesis"):
+            lead = make_synthesis_agent()
+            prompt = build_synthesis_prompt(query, results)
+            async for event in iterate_in_pool(lease, lambda: phi_events(lead.run(prompt, stream=True, stream_intermediate_steps=True))):
+                yield event
+
+    timings = {r.name.lower(): r.seconds for r in results}
+    timings["synthesis"] = round(time.perf_counter() - synthesis_started, 3)
+    timings["total"] = round(time.perf_counter() - started, 3)
+    yield "done", {"timings": timings}
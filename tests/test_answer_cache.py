@@ -0,0 +1,86 @@
+# tests/test_answer_cache.py
+
+import os
+
+import pytest
+
+import answer_cache
+from answer_cache import AnswerCache, MemoryCacheBackend, SQLiteCacheBackend
+
+VECTORS = {
+    "what is blocked": [1.0, 0.0, 0.0],
+    "which tickets are blocked": [0.98, 0.2, 0.0],
+    "what is on the roadmap": [0.0, 1.0, 0.0],
+}
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return VECTORS[text]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteCacheBackend(str(tmp_path / "answers.sqlite3"), 1 << 20)
+    return MemoryCacheBackend(1 << 20)
+
+
+def test_similar_prompt_hits_in_the_same_namespace_only(backend):
+    cache = AnswerCache(backend, ttl=60, embed_fn=CountingEmbedder(), similarity_threshold=0.95)
+    cache.store("team", "What is blocked?", {"team": "ABC-1"})
+
+    assert cache.lookup("team", "Which tickets are blocked") == ({"team": "ABC-1"}, "hit")
+    assert cache.lookup("chat", "Which tickets are blocked") == (None, "miss")
+    assert cache.lookup("team", "What is on the roadmap") == (None, "miss")
+
+
+def test_miss_then_store_embeds_the_prompt_once(backend):
+    embedder = CountingEmbedder()
+    cache = AnswerCache(backend, ttl=60, embed_fn=embedder, similarity_threshold=0.95)
+
+    assert cache.lookup("team", "What is blocked?") == (None, "miss")
+    cache.store("team", "What is blocked?", {"team": "ABC-1"})
+    assert embedder.calls == ["what is blocked"]
+    assert cache.lookup("team", "what is blocked") == ({"team": "ABC-1"}, "hit")
+
+
+@pytest.fixture
+def notion_export(tmp_path, monkeypatch):
+    path = tmp_path / "notion_pages.csv"
+    path.write_text("page_id,title\n1,Roadmap\n")
+    monkeypatch.setitem(answer_cache.SOURCE_FILES, "notion", str(path))
+    return path
+
+
+def test_rewritten_source_invalidates_answers_built_from_it(backend, notion_export):
+    cache = AnswerCache(backend, ttl=60)
+    cache.store("team", "What is on the roadmap?", {"team": "v7"}, sources=("notion",))
+    cache.store("chat", "What is on the roadmap?", {"response": "v7"})
+    assert cache.lookup("team", "What is on the roadmap?")[1] == "hit"
+
+    notion_export.write_text("page_id,title\n1,Roadmap\n2,OKRs\n")
+    os.utime(notion_export, ns=(0, 1))
+    assert cache.lookup("team", "What is on the roadmap?") == (None, "miss")
+    # answers that did not use the source are kept
+    assert cache.lookup("chat", "What is on the roadmap?")[1] == "hit"
+
+
+def test_invalidate_source_drops_only_its_answers(backend, notion_export):
+    cache = AnswerCache(backend, ttl=60)
+    cache.store("team", "roadmap", {"team": "v7"}, sources=("notion",))
+    cache.store("team", "blocked", {"team": "ABC-1"})
+
+    cache.invalidate_source("notion")
+    assert cache.lookup("team", "roadmap") == (None, "miss")
+    assert cache.lookup("team", "blocked")[1] == "hit"
+
+
+def test_expired_answers_miss(backend):
+    cache = AnswerCache(backend, ttl=-1)
+    cache.store("team", "blocked", {"team": "ABC-1"})
+    assert cache.lookup("team", "blocked") == (None, "miss")
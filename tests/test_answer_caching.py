@@ -0,0 +1,86 @@
+# tests/test_answer_caching.py
+
+"""
+/chat must not replay the answer to a prompt that ran a write tool. Needs the
+full app environment (FastAPI and the agent modules' dependencies).
+"""
+
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pandas")
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["SYNC_ENABLED"] = "false"
+os.environ["ANSWER_CACHE_BACKEND"] = "memory"
+os.environ.pop("ANSWER_CACHE_SIMILARITY_THRESHOLD", None)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+
+import main  # noqa: E402
+from tool_cache import ToolCache  # noqa: E402
+
+
+class FakeAgent:
+    """Calls one tool per prompt and answers with its result."""
+
+    def __init__(self, tool):
+        self.tool = tool
+
+    async def ainvoke(self, state):
+        result = await self.tool(summary=state["messages"][-1].content)
+        return {"messages": [AIMessage(content=f"Done: {result}, and here is a long enough answer to pass the check")]}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "answer_cache", main.make_answer_cache_from_env())
+    monkeypatch.setattr(main, "escalation_agent", None)
+    monkeypatch.setattr(main, "mcp_manager", None)
+    return TestClient(main.app)
+
+
+def make_tool(name, calls):
+    async def tool(runtime=None, **arguments):
+        calls.append(arguments)
+        return "ABC-1"
+    return ToolCache(ttls={}).wrap_coroutine("mcp", name, tool)
+
+
+def test_write_prompt_runs_the_tool_each_time(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "agent", FakeAgent(make_tool("jira_create_issue", calls)))
+    for _ in range(2):
+        response = client.post("/chat", json={"message": "create a ticket for the login bug"})
+        assert response.json()["cache"] == "miss"
+    assert len(calls) == 2
+
+
+def test_read_prompt_is_served_from_the_cache(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "agent", FakeAgent(make_tool("jira_search", calls)))
+    first = client.post("/chat", json={"message": "what is blocked?"}).json()
+    second = client.post("/chat", json={"message": "what is blocked?"}).json()
+    assert (first["cache"], second["cache"]) == ("miss", "hit")
+    assert len(calls) == 1
+
+
+def test_stream_caches_only_the_final_answer(client):
+    async def events():
+        yield "token", {"text": "Let me look that up."}
+        yield "tool_start", {"tool": "jira_search", "args": "{}"}
+        yield "tool_end", {"tool": "jira_search", "output": "ABC-1"}
+        yield "token", {"text": "ABC-1 is "}
+        yield "token", {"text": "blocked."}
+        yield "done", {}
+
+    async def run():
+        async for _ in main._caching_events(events(), "chat", "what is blocked?", main.CHAT_SOURCES):
+            pass
+        return await main.cache_lookup("chat", "what is blocked?")
+
+    assert asyncio.run(run()) == {"response": "ABC-1 is blocked."}
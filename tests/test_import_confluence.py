@@ -0,0 +1,126 @@
+# tests/test_import_confluence.py
+
+import asyncio
+import os
+import shutil
+import urllib.parse
+
+import httpx
+import pytest
+
+import import_confluence
+import knowledge_snapshot
+from benchmarks.fake_confluence import FakeConfluence
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_ensure_chunks_builds_chunks_from_shipped_page_csv(tmp_path):
+    output_csv = str(tmp_path / "knoccs_confluence.csv")
+    shutil.copy(os.path.join(REPO_ROOT, "knoccs_confluence.csv"), output_csv)
+
+    assert import_confluence.ensure_chunks(output_csv)
+
+    pages = knowledge_snapshot.read_rows(output_csv)
+    chunks = knowledge_snapshot.read_rows(import_confluence.chunks_path(output_csv))
+    assert {chunk["page_id"] for chunk in chunks} == {page["page_id"] for page in pages}
+    assert all(chunk["text"] and "<p>" not in chunk["text"] for chunk in chunks)
+    # already there: left alone
+    assert not import_confluence.ensure_chunks(output_csv)
+
+
+def test_ensure_chunks_without_page_export(tmp_path):
+    assert not import_confluence.ensure_chunks(str(tmp_path / "knoccs_confluence.csv"))
+
+
+class MockConfluence:
+    """
+    FakeConfluence's search and content endpoints served through httpx.MockTransport,
+    optionally failing the search request number `fail_search`.
+    """
+
+    def __init__(self, fake, fail_search=None):
+        self.fake = fake
+        self.fail_search = fail_search
+        self.searches = 0
+        self.transport = httpx.MockTransport(self.handle)
+
+    def handle(self, request):
+        query = dict(urllib.parse.parse_qsl(request.url.query.decode()))
+        if request.url.path == "/wiki/rest/api/content/search":
+            self.searches += 1
+            if self.searches == self.fail_search:
+                return httpx.Response(400, json={"message": "injected failure"})
+            return httpx.Response(200, json=self.fake._search(query))
+        page = self.fake.pages.get(request.url.path.rsplit("/", 1)[-1])
+        if page is None:
+            return httpx.Response(404, json={"message": "Not found"})
+        return httpx.Response(200, json=self.fake._render(page, query.get("expand", "")))
+
+
+@pytest.fixture
+def fake():
+    fake = FakeConfluence(pages=7, max_limit=3)
+    yield fake
+    fake._server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def confluence_config(monkeypatch):
+    monkeypatch.setattr(import_confluence, "CONFLUENCE_URL", "http://confluence.test")
+    monkeypatch.setattr(import_confluence, "USERNAME", "user")
+    monkeypatch.setattr(import_confluence, "API_TOKEN", "token")
+
+
+def export(output_csv, mock, **kwargs):
+    return asyncio.run(import_confluence.export_keyword_results_async(
+        "knoccs", output_csv=output_csv, page_size=3, transport=mock.transport, **kwargs
+    ))
+
+
+def page_ids(output_csv):
+    return sorted(row["page_id"] for row in knowledge_snapshot.read_rows(output_csv))
+
+
+def test_export_follows_next_links(tmp_path, fake):
+    output_csv = str(tmp_path / "pages.csv")
+    mock = MockConfluence(fake)
+
+    assert export(output_csv, mock) == 7
+    # 7 pages at 3 per search page
+    assert mock.searches == 3
+    assert page_ids(output_csv) == sorted(fake.pages)
+    chunks = knowledge_snapshot.read_rows(import_confluence.chunks_path(output_csv))
+    assert {chunk["page_id"] for chunk in chunks} == set(fake.pages)
+    assert not os.path.exists(import_confluence.checkpoint_path(output_csv))
+
+
+def test_export_resumes_from_checkpoint(tmp_path, fake):
+    output_csv = str(tmp_path / "pages.csv")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        export(output_csv, MockConfluence(fake, fail_search=3))
+    assert os.path.exists(import_confluence.checkpoint_path(output_csv))
+
+    mock = MockConfluence(fake)
+    assert export(output_csv, mock) == 7
+    # only the search page that failed is requested again
+    assert mock.searches == 1
+    assert page_ids(output_csv) == sorted(fake.pages)
+    assert not os.path.exists(import_confluence.checkpoint_path(output_csv))
+
+
+def test_export_stops_on_self_referencing_next_link(tmp_path, fake):
+    output_csv = str(tmp_path / "pages.csv")
+    mock = MockConfluence(fake)
+    search = fake._search
+
+    def looping_search(query):
+        results = search({**query, "cursor": ""})
+        results["_links"]["next"] = "/rest/api/content/search?cql=loop&limit=3"
+        return results
+
+    fake._search = looping_search
+    assert export(output_csv, mock) == 3
+    # the first page, then the linked page once; its link back to itself ends the export
+    assert mock.searches == 2
@@ -0,0 +1,54 @@
+# tests/test_knowledge_sync.py
+
+from phi.document import Document
+
+from knowledge_sync import content_hash, sync_documents
+
+
+class FakeVectorDb:
+    """Records what sync_documents writes; stores id -> content hash."""
+
+    def __init__(self, hashes=None):
+        self.hashes = dict(hashes or {})
+        self.upserted, self.deleted, self.optimized = [], [], 0
+
+    def create(self):
+        pass
+
+    def existing_hashes(self):
+        return dict(self.hashes)
+
+    def upsert(self, documents):
+        self.upserted.extend(doc.id for doc in documents)
+        self.hashes.update({doc.id: content_hash(doc.content) for doc in documents})
+
+    def delete_ids(self, ids):
+        self.deleted.extend(sorted(ids))
+        for row_id in ids:
+            self.hashes.pop(row_id, None)
+
+    def optimize(self, force_recreate=False):
+        self.optimized += 1
+
+
+def docs(**contents):
+    return [Document(id=row_id, content=content) for row_id, content in contents.items()]
+
+
+def test_only_new_and_changed_rows_are_embedded():
+    db = FakeVectorDb({"a": content_hash("same"), "b": content_hash("old"), "gone": content_hash("x")})
+    stats = sync_documents(db, docs(a="same", b="new", c="added"))
+
+    assert stats == {"upserted": 2, "deleted": 1, "unchanged": 1}
+    assert sorted(db.upserted) == ["b", "c"]
+    assert db.deleted == ["gone"]
+    assert db.optimized == 1
+
+
+def test_unchanged_export_touches_nothing():
+    db = FakeVectorDb()
+    sync_documents(db, docs(a="one", b="two"))
+    db.upserted.clear()
+
+    assert sync_documents(db, docs(a="one", b="two")) == {"upserted": 0, "deleted": 0, "unchanged": 2}
+    assert db.upserted == [] and db.optimized == 1
@@ -0,0 +1,84 @@
+# tests/test_mcp_manager.py
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, ErrorData
+
+from mcp_manager import MCPServerPool, _Slot
+
+
+class FlakySession:
+    """Fails the first `failures` calls with `error`, then succeeds."""
+
+    def __init__(self, calls, error, failures=1):
+        self.calls = calls
+        self.error = error
+        self.failures = failures
+
+    async def call_tool(self, name, arguments, **kwargs):
+        self.calls.append(name)
+        if len(self.calls) <= self.failures:
+            raise self.error
+        return "ok"
+
+
+def make_pool(session, sessions=2):
+    pool = MCPServerPool("test", {"transport": "streamable_http", "url": "http://unused"}, size=sessions)
+    for _ in range(sessions):
+        pool._idle.put_nowait(_Slot(session))
+    pool._ready.set()
+    return pool
+
+
+def closed():
+    return McpError(ErrorData(code=CONNECTION_CLOSED, message="Connection closed"))
+
+
+def timed_out():
+    return McpError(ErrorData(code=408, message="Timed out"))
+
+
+def test_read_only_tool_is_retried_after_a_dropped_connection():
+    calls = []
+    pool = make_pool(FlakySession(calls, closed()))
+    assert asyncio.run(pool.call_tool("jira_search", {"jql": "x"})) == "ok"
+    assert calls == ["jira_search", "jira_search"]
+
+
+@pytest.mark.parametrize("error", [closed(), ConnectionResetError("reset")])
+def test_write_tool_is_not_retried_once_sent(error):
+    calls = []
+    pool = make_pool(FlakySession(calls, error))
+    with pytest.raises(type(error)):
+        asyncio.run(pool.call_tool("jira_create_issue", {"summary": "x"}))
+    assert calls == ["jira_create_issue"]
+
+
+def test_timed_out_call_is_not_retried():
+    calls = []
+    pool = make_pool(FlakySession(calls, timed_out()))
+    with pytest.raises(McpError):
+        asyncio.run(pool.call_tool("jira_search", {"jql": "x"}))
+    assert calls == ["jira_search"]
+
+
+def test_write_tool_is_retried_when_no_session_could_be_borrowed():
+    calls = []
+    pool = make_pool(FlakySession(calls, closed(), failures=0))
+    borrow = pool.session
+    attempts = []
+
+    @asynccontextmanager
+    async def session():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("No healthy MCP session")
+        async with borrow() as session:
+            yield session
+
+    pool.session = session
+    assert asyncio.run(pool.call_tool("jira_create_issue", {"summary": "x"})) == "ok"
+    assert calls == ["jira_create_issue"]
@@ -0,0 +1,50 @@
+# tests/test_query_router.py
+
+from query_router import QueryRouter
+
+NAMES = ["Jira", "Confluence", "Notion"]
+
+
+class FakeEmbedder:
+    """Embeds a text onto the axis of the first specialist word it contains."""
+
+    AXES = {"ticket": 0, "deploy": 1, "roadmap": 2}
+
+    def get_embedding(self, text):
+        vector = [0.0, 0.0, 0.0, 0.1]
+        for word, axis in self.AXES.items():
+            if word in text.lower():
+                vector[axis] = 1.0
+                break
+        return vector
+
+    def embed_batch(self, texts):
+        return [self.get_embedding(text) for text in texts]
+
+
+def test_keywords_pick_the_specialists_in_their_order():
+    router = QueryRouter(mode="keywords")
+    assert router.route("Which tickets are blocked?", NAMES).specialists == ["Jira"]
+    assert router.route("Where is the roadmap doc?", NAMES).specialists == ["Confluence", "Notion"]
+
+
+def test_issue_keys_must_be_upper_case():
+    router = QueryRouter(mode="keywords")
+    assert router.route("what about KNOCCS-142", NAMES).specialists == ["Jira"]
+    assert router.route("what about covid-19", NAMES).reason == "fallback"
+
+
+def test_unmatched_forced_and_off_consult_everyone():
+    assert QueryRouter(mode="keywords").route("hello there", NAMES).specialists == NAMES
+    assert QueryRouter(mode="keywords").route("tickets", NAMES, force_all=True).reason == "forced"
+    assert QueryRouter(mode="off").route("tickets", NAMES).specialists == NAMES
+
+
+def test_embedding_mode_places_queries_the_rules_miss():
+    examples = {"Jira": ["ticket"], "Confluence": ["deploy"], "Notion": ["roadmap"]}
+    router = QueryRouter(mode="embedding", rules={name: [] for name in NAMES}, examples=examples,
+                         embedder=FakeEmbedder(), min_similarity=0.5)
+    route = router.route("Where do we deploy from?", NAMES)
+    assert (route.specialists, route.reason) == (["Confluence"], "embedding")
+    assert router.route("good morning", NAMES).reason == "fallback"
+    assert router.stats()["routes"] == {"Confluence": 1, "all": 1}
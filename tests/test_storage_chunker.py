@@ -0,0 +1,48 @@
+# tests/test_storage_chunker.py
+
+from storage_chunker import chunk_storage, excerpt, parse_storage, storage_to_text
+
+
+def test_sections_follow_the_heading_path():
+    storage = (
+        "<p>Intro</p><h1>Setup</h1><p>Install it.</p><h2>Linux</h2><p>Use apt.</p>"
+        "<h2>Mac</h2><p>Use brew.</p><h1>Usage</h1><ul><li><p>Run it</p></li></ul>"
+    )
+    assert parse_storage(storage) == [
+        ([], ["Intro"]),
+        (["Setup"], ["Install it."]),
+        (["Setup", "Linux"], ["Use apt."]),
+        (["Setup", "Mac"], ["Use brew."]),
+        (["Usage"], ["- Run it"]),
+    ]
+
+
+def test_macro_parameters_are_skipped_and_code_is_kept():
+    storage = (
+        '<ac:structured-macro ac:name="code"><ac:parameter ac:name="language">bash</ac:parameter>'
+        "<ac:plain-text-body><![CDATA[make deploy]]></ac:plain-text-body></ac:structured-macro>"
+    )
+    assert storage_to_text(storage) == "make deploy"
+
+
+def test_chunks_stay_within_one_section_and_size():
+    sentence = "The deploy pipeline builds, tests and ships the service. "
+    storage = f"<h2>Deploy</h2><p>{sentence * 40}</p><h2>Rollback</h2><p>Revert the release.</p>"
+    chunks = chunk_storage(storage, "Runbook", max_chars=300, overlap=50)
+
+    deploy = [chunk for chunk in chunks if chunk["heading"] == "Deploy"]
+    assert len(deploy) > 1
+    assert all(len(chunk["text"]) <= 300 for chunk in chunks)
+    assert chunks[-1] == {"heading": "Rollback", "text": "Revert the release."}
+    # consecutive chunks of a section share the overlap
+    for previous, current in zip(deploy, deploy[1:]):
+        assert current["text"][:20] in previous["text"]
+
+
+def test_empty_body_yields_the_title():
+    assert chunk_storage("", "Release notes") == [{"heading": "", "text": "Release notes"}]
+
+
+def test_excerpt_cuts_at_a_word_boundary():
+    assert excerpt("one two three four", max_chars=10) == "one two…"
+    assert excerpt("  short  text ") == "short text"
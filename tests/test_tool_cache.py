@@ -0,0 +1,122 @@
+# tests/test_tool_cache.py
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from tool_cache import ToolCache, track_toolkit, track_writes
+
+
+class Toolkit:
+    """Stand-in for a phi Toolkit: name plus functions with entrypoints."""
+
+    class Function:
+        def __init__(self, entrypoint):
+            self.entrypoint = entrypoint
+
+    def __init__(self, name, **functions):
+        self.name = name
+        self.functions = {key: self.Function(fn) for key, fn in functions.items()}
+
+
+def test_track_writes_sees_mutating_calls_only():
+    cache = ToolCache(ttls={})
+    search = cache.wrap_function("jira", "search_issues", lambda jql: "[]")
+    create = cache.wrap_function("jira", "create_issue", lambda summary: "ABC-1")
+    with track_writes() as writes:
+        search("project = ABC")
+    assert writes == set()
+    with track_writes() as writes:
+        create("x")
+    assert writes == {"create_issue"}
+
+
+def test_track_writes_follows_worker_threads_and_tasks():
+    cache = ToolCache(ttls={})
+    create = cache.wrap_function("jira", "create_issue", lambda summary: "ABC-1")
+
+    async def add_comment(runtime=None, **arguments):
+        return "done"
+
+    comment = cache.wrap_coroutine("mcp", "jira_add_comment", add_comment)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(1) as executor, track_writes() as writes:
+            ctx = contextvars.copy_context()
+            await loop.run_in_executor(executor, lambda: ctx.run(create, "x"))
+            await asyncio.create_task(comment(issue_key="ABC-1", body="hi"))
+        return writes
+
+    assert asyncio.run(run()) == {"create_issue", "jira_add_comment"}
+
+
+def test_writes_are_tracked_with_the_cache_disabled():
+    calls = []
+    toolkit = track_toolkit(Toolkit("jira", get_issue=lambda key: calls.append("get") or "{}",
+                                    create_issue=lambda summary: calls.append("create") or "ABC-1"))
+    with track_writes() as writes:
+        toolkit.functions["get_issue"].entrypoint("ABC-1")
+        toolkit.functions["create_issue"].entrypoint("x")
+    assert writes == {"create_issue"}
+    assert calls == ["get", "create"]
+
+
+def test_repeated_write_runs_again():
+    calls = []
+    cache = ToolCache(ttls={})
+    create = cache.wrap_function("jira", "create_issue", lambda summary: calls.append(summary) or "ABC-1")
+    for _ in range(2):
+        with track_writes() as writes:
+            create("x")
+        assert writes
+    assert calls == ["x", "x"]
+
+
+def test_write_clears_reads_of_the_same_service_in_every_namespace():
+    calls = []
+    cache = ToolCache(ttls={})
+
+    async def mcp_search(runtime=None, **arguments):
+        calls.append("mcp")
+        return "[]"
+
+    async def notion_search(runtime=None, **arguments):
+        calls.append("notion")
+        return "[]"
+
+    jira_search = cache.wrap_coroutine("mcp-atlassian", "jira_search", mcp_search)
+    notion_query = cache.wrap_coroutine("mcp-notion", "API-post-search", notion_search)
+    toolkit = cache.wrap_toolkit(Toolkit("jira_tools", create_issue=lambda summary: "ABC-1"))
+
+    async def read_both():
+        await jira_search(jql="project = ABC")
+        await notion_query(query="roadmap")
+
+    asyncio.run(read_both())
+    asyncio.run(read_both())
+    assert calls == ["mcp", "notion"]
+    # a JiraTools write drops the MCP server's cached Jira search, not the Notion one
+    toolkit.functions["create_issue"].entrypoint("x")
+    asyncio.run(read_both())
+    assert calls == ["mcp", "notion", "mcp"]
+
+
+def test_successful_write_invalidates_cached_reads():
+    calls, results = [], iter(["ok", '{"error": "permission denied"}'])
+    cache = ToolCache(ttls={})
+    search = cache.wrap_function("jira_tools", "search_issues", lambda jql: calls.append(jql) or "[]")
+    transition = cache.wrap_function("jira_tools", "transition_issue", lambda key: next(results))
+
+    search("project = ABC")
+    search("project = ABC")
+    assert calls == ["project = ABC"]
+
+    transition("ABC-1")
+    search("project = ABC")
+    assert len(calls) == 2
+
+    # a failed write changed nothing, so the cache is kept
+    transition("ABC-1")
+    search("project = ABC")
+    assert len(calls) == 2
@@ -0,0 +1,92 @@
+# tests/test_worker_pool.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from worker_pool import BoundedWorkerPool, PoolSaturatedError, make_pool_from_env
+
+
+def wait_for_in_flight(pool, expected, timeout=2.0):
+    # slots are released from the worker thread's done callback
+    deadline = time.monotonic() + timeout
+    while pool.in_flight != expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return pool.in_flight
+
+
+@pytest.fixture
+def pool():
+    pool = BoundedWorkerPool("test", max_workers=2, max_queue=2, timeout=5, retry_after=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_admission_is_bounded_by_workers_plus_queue(pool):
+    pool.admit(3)
+    pool.admit()
+    with pytest.raises(PoolSaturatedError):
+        pool.admit()
+    pool.release(2)
+    pool.admit(2)
+    assert pool.in_flight == 4
+
+
+def test_timed_out_call_keeps_its_slot_until_the_thread_returns(pool):
+    done = threading.Event()
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(done.wait, timeout=0.05)
+
+    asyncio.run(run())
+    assert pool.in_flight == 1
+    done.set()
+    assert wait_for_in_flight(pool, 0) == 0
+
+
+def test_lease_holds_its_slots_until_closed(pool):
+    with pool.lease(3) as lease:
+        assert pool.in_flight == 3
+        with pytest.raises(PoolSaturatedError):
+            pool.lease(2)
+        assert asyncio.run(lease.execute(lambda: "ok")) == "ok"
+        assert pool.in_flight == 3
+    assert pool.in_flight == 0
+    lease.close()
+    assert pool.in_flight == 0
+
+
+def test_closed_lease_keeps_slots_of_running_calls(pool):
+    done = threading.Event()
+    lease = pool.lease(3)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(lease.execute(done.wait), 0.05)
+
+    asyncio.run(run())
+    lease.close()
+    assert pool.in_flight == 1
+    done.set()
+    assert wait_for_in_flight(pool, 0) == 0
+
+
+def test_lease_is_capped_at_capacity(pool):
+    with pool.lease(10):
+        assert pool.in_flight == pool.capacity
+
+
+def test_default_size_counts_requests(monkeypatch):
+    monkeypatch.delenv("TEST_POOL_WORKERS", raising=False)
+    monkeypatch.delenv("TEST_POOL_QUEUE_DEPTH", raising=False)
+    pool = make_pool_from_env("test", "TEST_POOL", slots_per_request=4)
+    assert (pool.max_workers, pool.max_queue) == (16, 32)
+    pool.shutdown()
+
+    monkeypatch.setenv("TEST_POOL_WORKERS", "8")
+    pool = make_pool_from_env("test", "TEST_POOL", slots_per_request=4)
+    assert pool.max_workers == 8
+    pool.shutdown()
@@ -0,0 +1,342 @@
+# tool_cache.py
+
+import functools
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from answer_cache import CacheEntry, MemoryCacheBackend
+from tracing import set_attribute
+
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+TOOL_CACHE_MAX_BYTES = int(os.getenv("TOOL_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+TOOL_CACHE_TTL_SECONDS = float(os.getenv("TOOL_CACHE_TTL_SECONDS", "300"))
+
+# Default TTL by tool name, first match wins: sprint and board state moves
+# fastest, documentation pages slowest. TOOL_CACHE_TTLS overrides per tool,
+# e.g. "jira_search=30,confluence_get_page=3600" (0 disables caching).
+DEFAULT_TTLS = [
+    (re.compile(r"sprint|board"), 60.0),
+    (re.compile(r"search|query|jql|issue|comment|transition"), 120.0),
+    (re.compile(r"page|space|confluence|block"), 900.0),
+    (re.compile(r"database|notion|user"), 300.0),
+]
+
+# Tools are cached only when their name reads like a lookup; a write verb
+# without one (jira_create_issue, add_comment, API-patch-page) is never cached.
+READ_WORDS = re.compile(r"(^|_)(get|search|query|list|read|fetch|retrieve|find|lookup)(_|$)")
+WRITE_WORDS = re.compile(
+    r"(^|_)(create|update|delete|remove|add|transition|link|upload|post|patch|put|set|move|"
+    r"archive|assign|append|edit|merge|restore)(_|$)"
+)
+
+# Services whose tools share cached state, whichever tool set they come from:
+# a write through JiraTools must clear the MCP server's cached Jira reads too
+BACKENDS = ("jira", "confluence", "notion")
+
+
+def _parse_ttls(value: str) -> Dict[str, float]:
+    ttls = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, seconds = item.partition("=")
+        ttls[name.strip()] = float(seconds)
+    return ttls
+
+
+def _words(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", re.sub(r"([a-z])([A-Z])", r"\1_\2", name).lower())
+
+
+def tool_backend(namespace: str, name: str) -> str:
+    """
+    The service a tool talks to: a backend named in the tool name
+    (jira_search) or else in its namespace (jira_tools, mcp-notion),
+    falling back to the namespace itself.
+    """
+    for words in (_words(name), _words(namespace)):
+        backend = next((b for b in BACKENDS if re.search(rf"(^|_){b}(_|$)", words)), None)
+        if backend:
+            return backend
+    return namespace
+
+
+def is_mutating(name: str, metadata: Optional[dict] = None) -> bool:
+    metadata = metadata or {}
+    if metadata.get("destructiveHint"):
+        return True
+    if metadata.get("readOnlyHint"):
+        return False
+    words = _words(name)
+    return not READ_WORDS.search(words) and bool(WRITE_WORDS.search(words))
+
+
+def is_cacheable(name: str, metadata: Optional[dict] = None) -> bool:
+    return not is_mutating(name, metadata) and (
+        bool((metadata or {}).get("readOnlyHint")) or bool(READ_WORDS.search(_words(name)))
+    )
+
+
+# Names of the mutating tools called during the current request, see track_writes()
+_writes: ContextVar[Optional[set]] = ContextVar("tool_writes", default=None)
+
+
+@contextmanager
+def track_writes(writes: Optional[set] = None):
+    """
+    Collect the names of mutating tools called inside the block, including
+    from the tasks and worker threads it starts (they copy the context),
+    into `writes` or a new set. An answer produced by a write ("created
+    ABC-123") must not be cached.
+    """
+    writes = set() if writes is None else writes
+    token = _writes.set(writes)
+    try:
+        yield writes
+    finally:
+        _writes.reset(token)
+
+
+def _note_write(name: str):
+    writes = _writes.get()
+    if writes is not None:
+        writes.add(name)
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value.strip())
+    return value
+
+
+def canonical_arguments(arguments: dict) -> str:
+    """
+    Stable form of a tool call's arguments: sorted keys, None values dropped,
+    whitespace collapsed, so equivalent calls share a cache entry.
+    """
+    return json.dumps(_canonical(arguments), sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _is_error_result(result: Any) -> bool:
+    # JiraTools reports failures as a JSON string instead of raising; MCP
+    # tools return (content, artifact) pairs
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    return isinstance(result, str) and re.match(r'\s*\[?\s*\{\s*"error"\s*:', result) is not None
+
+
+class ToolCache:
+    """
+    Result cache for read-only tool calls, keyed on backend (see
+    tool_backend()), namespace, tool name and canonical arguments.
+
+    Each tool gets a TTL from TOOL_CACHE_TTLS or DEFAULT_TTLS. Mutating tools
+    are passed straight through, and a successful one drops every cached
+    result of its backend across all namespaces, so a read after a write is
+    never stale. Errors are not cached.
+    """
+
+    def __init__(self, max_bytes: int = TOOL_CACHE_MAX_BYTES, default_ttl: float = TOOL_CACHE_TTL_SECONDS,
+                 ttls: Optional[Dict[str, float]] = None):
+        self.backend = MemoryCacheBackend(max_bytes)
+        self.default_ttl = default_ttl
+        self.ttls = ttls if ttls is not None else _parse_ttls(os.getenv("TOOL_CACHE_TTLS", ""))
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0, "bypassed": 0})
+
+    def ttl_for(self, name: str) -> float:
+        if name in self.ttls:
+            return self.ttls[name]
+        words = _words(name)
+        return next((ttl for pattern, ttl in DEFAULT_TTLS if pattern.search(words)), self.default_ttl)
+
+    def _count(self, name: str, outcome: str):
+        with self._lock:
+            self._counts[name][outcome] += 1
+        set_attribute(cache={"hits": "hit", "misses": "miss", "bypassed": "bypass"}[outcome])
+
+    @staticmethod
+    def _key(namespace: str, name: str, arguments: dict) -> str:
+        return f"{tool_backend(namespace, name)}:{namespace}:{name}:{canonical_arguments(arguments)}"
+
+    def lookup(self, namespace: str, name: str, arguments: dict):
+        """
+        Return (True, result) on a hit, (False, None) on a miss.
+        """
+        entry = self.backend.get(self._key(namespace, name, arguments))
+        self._count(name, "hits" if entry is not None else "misses")
+        return (True, entry.value["result"]) if entry is not None else (False, None)
+
+    def store(self, namespace: str, name: str, arguments: dict, result: Any):
+        ttl = self.ttl_for(name)
+        if ttl > 0 and not _is_error_result(result):
+            self.backend.set(self._key(namespace, name, arguments), CacheEntry({"result": result}, time.time() + ttl))
+
+    def invalidate(self, backend: str):
+        """
+        Drop every cached result of `backend`, from any namespace.
+        """
+        for key, _ in self.backend.items():
+            if key.startswith(f"{backend}:"):
+                self.backend.delete(key)
+
+    def wrap_function(self, namespace: str, name: str, fn, metadata: Optional[dict] = None):
+        """
+        Cached version of a synchronous tool function, keeping its signature.
+        """
+        cacheable, mutating = is_cacheable(name, metadata), is_mutating(name, metadata)
+        backend = tool_backend(namespace, name)
+
+        @functools.wraps(fn)
+        def cached(*args, **kwargs):
+            if not cacheable:
+                self._count(name, "bypassed")
+                if mutating:
+                    _note_write(name)
+                result = fn(*args, **kwargs)
+                if mutating and not _is_error_result(result):
+                    self.invalidate(backend)
+                return result
+            arguments = dict(kwargs, _args=list(args)) if args else kwargs
+            hit, result = self.lookup(namespace, name, arguments)
+            if not hit:
+                result = fn(*args, **kwargs)
+                self.store(namespace, name, arguments, result)
+            return result
+
+        return cached
+
+    def wrap_coroutine(self, namespace: str, name: str, fn, metadata: Optional[dict] = None):
+        """
+        Cached version of an async tool coroutine that takes keyword arguments.
+        """
+        cacheable, mutating = is_cacheable(name, metadata), is_mutating(name, metadata)
+        backend = tool_backend(namespace, name)
+
+        async def cached(runtime=None, **arguments):
+            if not cacheable:
+                self._count(name, "bypassed")
+                if mutating:
+                    _note_write(name)
+                result = await fn(runtime=runtime, **arguments)
+                if mutating and not _is_error_result(result):
+                    self.invalidate(backend)
+                return result
+            hit, result = self.lookup(namespace, name, arguments)
+            if not hit:
+                result = await fn(runtime=runtime, **arguments)
+                self.store(namespace, name, arguments, result)
+            return result
+
+        return cached
+
+    def wrap_tools(self, tools: list, namespace: str = "mcp") -> list:
+        """
+        Cached copies of LangChain MCP tools (as returned by get_tools()).
+        """
+        from langchain_core.tools import StructuredTool
+
+        wrapped = []
+        for tool in tools:
+            if not isinstance(tool, StructuredTool) or tool.coroutine is None:
+                wrapped.append(tool)
+                continue
+            wrapped.append(StructuredTool(
+                name=tool.name,
+                description=tool.description,
+                args_schema=tool.args_schema,
+                coroutine=self.wrap_coroutine(namespace, tool.name, tool.coroutine, tool.metadata),
+                response_format=tool.response_format,
+                metadata=tool.metadata,
+                handle_tool_error=tool.handle_tool_error,
+            ))
+        return wrapped
+
+    def wrap_toolkit(self, toolkit):
+        """
+        Route the functions of a phi Toolkit (e.g. JiraTools) through the cache, in place.
+        """
+        for name, function in toolkit.functions.items():
+            if function.entrypoint is not None:
+                function.entrypoint = self.wrap_function(toolkit.name, name, function.entrypoint)
+        return toolkit
+
+    def stats(self) -> dict:
+        with self._lock:
+            tools = {name: dict(counts) for name, counts in self._counts.items()}
+        for counts in tools.values():
+            looked_up = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = counts["hits"] / looked_up if looked_up else 0.0
+        hits = sum(c["hits"] for c in tools.values())
+        misses = sum(c["misses"] for c in tools.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "bypassed": sum(c["bypassed"] for c in tools.values()),
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": len(self.backend.items()),
+            "tools": tools,
+        }
+
+
+tool_cache = ToolCache() if TOOL_CACHE_ENABLED else None
+
+
+def _tracked_function(name: str, fn):
+    @functools.wraps(fn)
+    def tracked(*args, **kwargs):
+        _note_write(name)
+        return fn(*args, **kwargs)
+    return tracked
+
+
+def _tracked_coroutine(name: str, fn):
+    async def tracked(runtime=None, **arguments):
+        _note_write(name)
+        return await fn(runtime=runtime, **arguments)
+    return tracked
+
+
+def track_tools(tools: list) -> list:
+    """
+    Copies of LangChain tools whose mutating calls are seen by track_writes(), without caching.
+    """
+    from langchain_core.tools import StructuredTool
+
+    return [
+        StructuredTool(
+            name=tool.name, description=tool.description, args_schema=tool.args_schema,
+            coroutine=_tracked_coroutine(tool.name, tool.coroutine), response_format=tool.response_format,
+            metadata=tool.metadata, handle_tool_error=tool.handle_tool_error,
+        )
+        if isinstance(tool, StructuredTool) and tool.coroutine is not None and is_mutating(tool.name, tool.metadata)
+        else tool
+        for tool in tools
+    ]
+
+
+def track_toolkit(toolkit):
+    """
+    Make a phi Toolkit's mutating calls visible to track_writes(), in place, without caching.
+    """
+    for name, function in toolkit.functions.items():
+        if function.entrypoint is not None and is_mutating(name):
+            function.entrypoint = _tracked_function(name, function.entrypoint)
+    return toolkit
+
+
+def cache_tools(tools: list, namespace: str = "mcp") -> list:
+    return tool_cache.wrap_tools(tools, namespace) if tool_cache is not None else track_tools(tools)
+
+
+def cache_toolkit(toolkit):
+    return tool_cache.wrap_toolkit(toolkit) if tool_cache is not None else track_toolkit(toolkit)
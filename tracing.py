@@ -0,0 +1,511 @@
+# tracing.py
+
+import contextvars
+import functools
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# "jsonl" appends finished spans to TRACE_JSONL_PATH, "otlp" posts them to an
+# OTLP/HTTP collector; metrics for /metrics are collected either way.
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH", "traces.jsonl")
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "team10-api")
+FLUSH_INTERVAL_SECONDS = float(os.getenv("TRACE_FLUSH_INTERVAL_SECONDS", "2"))
+MAX_QUEUED_SPANS = 10_000
+
+# Latency buckets (seconds) wide enough for vector searches and 60s team queries
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+# OTLP span kinds for the span categories used in this app
+OTLP_KINDS = {"endpoint": 2, "llm": 3, "embedding": 3, "tool": 3, "mcp": 3}
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def seconds(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "kind": self.kind, "start_ns": self.start_ns, "end_ns": self.end_ns,
+            "seconds": round(self.seconds, 6), "attributes": self.attributes, "error": self.error,
+        }
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Prometheus metrics fed by finished spans: a latency histogram per span
+    kind and name, an error counter, and LLM token counters per model.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.errors: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.tokens: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def record_span(self, span: Span):
+        key = (span.kind, span.attributes.get("metric_name", span.name))
+        with self._lock:
+            self.durations[key].observe(span.seconds)
+            if span.error:
+                self.errors[key] += 1
+
+    def record_tokens(self, model: str, prompt: int, completion: int):
+        with self._lock:
+            self.tokens[(model, "prompt")] += prompt or 0
+            self.tokens[(model, "completion")] += completion or 0
+
+    def render(self) -> str:
+        """
+        Metrics in the Prometheus text exposition format.
+        """
+        def labels(**values):
+            return ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                            for k, v in values.items())
+
+        lines = ["# HELP span_duration_seconds Duration of traced operations by kind and name",
+                 "# TYPE span_duration_seconds histogram"]
+        with self._lock:
+            for (kind, name), hist in sorted(self.durations.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), hist.counts):
+                    cumulative += count
+                    lines.append(f"span_duration_seconds_bucket{{{labels(kind=kind, name=name, le=bound)}}} {cumulative}")
+                lines.append(f"span_duration_seconds_sum{{{labels(kind=kind, name=name)}}} {hist.sum:.6f}")
+                lines.append(f"span_duration_seconds_count{{{labels(kind=kind, name=name)}}} {hist.count}")
+            lines += ["# HELP span_errors_total Traced operations that raised", "# TYPE span_errors_total counter"]
+            lines += [f"span_errors_total{{{labels(kind=kind, name=name)}}} {n}" for (kind, name), n in sorted(self.errors.items())]
+            lines += ["# HELP llm_tokens_total LLM tokens by model and type", "# TYPE llm_tokens_total counter"]
+            lines += [f"llm_tokens_total{{{labels(model=model, type=kind)}}} {n}" for (model, kind), n in sorted(self.tokens.items())]
+        return "\n".join(lines) + "\n"
+
+
+class JsonlExporter:
+    def __init__(self, path: str = TRACE_JSONL_PATH):
+        self.path = path
+
+    def export(self, spans: List[Span]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpExporter:
+    """
+    Posts spans to an OTLP/HTTP collector (JSON encoding, `<endpoint>/v1/traces`).
+    """
+
+    def __init__(self, endpoint: str = OTLP_ENDPOINT, service_name: str = SERVICE_NAME):
+        self.url = f"{endpoint.rstrip('/')}/v1/traces"
+        self.service_name = service_name
+
+    def payload(self, spans: List[Span]) -> dict:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "tracing"}, "spans": [{
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent_id or "",
+                "name": span.name,
+                "kind": OTLP_KINDS.get(span.kind, 1),
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)}
+                               for k, v in {"span.kind": span.kind, **span.attributes}.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            } for span in spans]}],
+        }]}
+
+    def export(self, spans: List[Span]):
+        import requests
+
+        requests.post(self.url, json=self.payload(spans), timeout=5).raise_for_status()
+
+
+class Tracer:
+    """
+    Creates spans, keeps the current one in a context variable (so asyncio
+    tasks and context-copying worker threads parent their spans correctly),
+    feeds finished spans to the metrics and hands them to the exporter on a
+    background thread in batches.
+    """
+
+    def __init__(self, exporter=None):
+        self.metrics = Metrics()
+        self.exporter = exporter
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(MAX_QUEUED_SPANS)
+        self._thread: Optional[threading.Thread] = None
+        if exporter is not None:
+            self._thread = threading.Thread(target=self._export_loop, name="trace-export", daemon=True)
+            self._thread.start()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes):
+        parent = _current.get()
+        span = Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+        )
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as ex:
+            span.error = f"{type(ex).__name__}: {ex}"
+            raise
+        finally:
+            try:
+                _current.reset(token)
+            except ValueError:
+                # Exited in another context, e.g. an async generator stepped by asyncio.wait_for
+                _current.set(parent)
+            self.finish(span)
+
+    def finish(self, span: Span):
+        span.end_ns = span.end_ns or time.time_ns()
+        self.metrics.record_span(span)
+        if self.exporter is not None:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                pass  # drop spans rather than block requests when the exporter is down
+
+    def _export_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL_SECONDS
+            while batch[-1] is not None and len(batch) < 512 and time.monotonic() < deadline:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            spans = [span for span in batch if span is not None]
+            if spans:
+                try:
+                    self.exporter.export(spans)
+                except Exception as ex:
+                    print(f"Trace export failed ({len(spans)} spans dropped): {ex}")
+            if batch[-1] is None:
+                return
+
+    def shutdown(self, timeout: float = 5.0):
+        """
+        Flush queued spans and stop the export thread.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def make_tracer_from_env() -> Tracer:
+    if TRACE_EXPORTER == "jsonl":
+        return Tracer(JsonlExporter())
+    if TRACE_EXPORTER == "otlp":
+        return Tracer(OtlpExporter())
+    return Tracer()
+
+
+tracer = make_tracer_from_env()
+span = tracer.span
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def set_attribute(**attributes):
+    """
+    Add attributes to the current span, if any.
+    """
+    current = _current.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+# --- Endpoints ---
+
+class TracingMiddleware:
+    """
+    ASGI middleware recording each HTTP request as an "endpoint" span named
+    after its route, covering streamed response bodies to the last byte.
+    """
+
+    def __init__(self, app, exclude=("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            return await self.app(scope, receive, send)
+
+        with span(f"{scope['method']} {scope['path']}", "endpoint", method=scope["method"]) as request:
+            async def traced_send(message):
+                if message["type"] == "http.response.start":
+                    request.set(status_code=message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, traced_send)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    request.name = f"{scope['method']} {route}"
+                # Keep unrouted paths (404s, scanners) out of the metric labels
+                request.set(route=route or scope["path"], metric_name=request.name if route else "unmatched")
+
+
+# --- LLM calls ---
+
+def _record_usage(span: Span, model: str, usage):
+    if usage is None:
+        return
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    span.set(prompt_tokens=prompt, completion_tokens=completion)
+    tracer.metrics.record_tokens(model, prompt, completion)
+
+
+class _TracedStream:
+    """
+    Wraps an OpenAI Stream so its span ends, with the token usage from the
+    final chunk, when the stream is exhausted or closed.
+    """
+
+    def __init__(self, stream, span: Span, model: str):
+        self._stream = stream
+        self._span = span
+        self._model = model
+        self._done = False
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def _finish(self, error: Exception = None):
+        if not self._done:
+            self._done = True
+            if error is not None:
+                self._span.error = f"{type(error).__name__}: {error}"
+            tracer.finish(self._span)
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                _record_usage(self._span, self._model, getattr(chunk, "usage", None))
+                yield chunk
+        except Exception as ex:
+            self._finish(ex)
+            raise
+        finally:
+            self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._stream.close()
+        self._finish()
+
+    def close(self):
+        self._stream.close()
+        self._finish()
+
+
+class _TracedAsyncStream(_TracedStream):
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                _record_usage(self._span, self._model, getattr(chunk, "usage", None))
+                yield chunk
+        except Exception as ex:
+            self._finish(ex)
+            raise
+        finally:
+            self._finish()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._stream.close()
+        self._finish()
+
+    async def close(self):
+        await self._stream.close()
+        self._finish()
+
+
+def _start_llm_span(kind: str, kwargs: dict) -> Tuple[Span, contextvars.Token]:
+    parent = _current.get()
+    model = str(kwargs.get("model", "unknown"))
+    span = Span(
+        name=f"{kind} {model}", kind=kind,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16), span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else None, start_ns=time.time_ns(),
+        attributes={"model": model, "metric_name": model, "stream": bool(kwargs.get("stream"))},
+    )
+    return span, _current.set(span)
+
+
+def _with_stream_usage(kind: str, kwargs: dict) -> dict:
+    # A streamed completion only reports token usage (in a final, choice-less
+    # chunk) when asked to; callers that set stream_options keep theirs
+    if kind == "llm" and kwargs.get("stream") and not kwargs.get("stream_options"):
+        return {**kwargs, "stream_options": {"include_usage": True}}
+    return kwargs
+
+
+def _wrap_create(create, kind: str):
+    @functools.wraps(create)
+    def traced(self, *args, **kwargs):
+        kwargs = _with_stream_usage(kind, kwargs)
+        span, token = _start_llm_span(kind, kwargs)
+        try:
+            response = create(self, *args, **kwargs)
+        except Exception as ex:
+            span.error = f"{type(ex).__name__}: {ex}"
+            tracer.finish(span)
+            raise
+        finally:
+            _current.reset(token)
+        if kwargs.get("stream"):
+            return _TracedStream(response, span, span.attributes["model"])
+        _record_usage(span, span.attributes["model"], getattr(response, "usage", None))
+        tracer.finish(span)
+        return response
+
+    return traced
+
+
+def _wrap_async_create(create, kind: str):
+    @functools.wraps(create)
+    async def traced(self, *args, **kwargs):
+        kwargs = _with_stream_usage(kind, kwargs)
+        span, token = _start_llm_span(kind, kwargs)
+        try:
+            response = await create(self, *args, **kwargs)
+        except Exception as ex:
+            span.error = f"{type(ex).__name__}: {ex}"
+            tracer.finish(span)
+            raise
+        finally:
+            _current.reset(token)
+        if kwargs.get("stream"):
+            return _TracedAsyncStream(response, span, span.attributes["model"])
+        _record_usage(span, span.attributes["model"], getattr(response, "usage", None))
+        tracer.finish(span)
+        return response
+
+    return traced
+
+
+def instrument_openai():
+    """
+    Trace every OpenAI chat completion and embedding request, whichever
+    library makes it (phi, LangChain, the embedder), with token usage.
+    Safe to call more than once.
+    """
+    from openai.resources.chat.completions import AsyncCompletions, Completions
+    from openai.resources.embeddings import AsyncEmbeddings, Embeddings
+
+    for cls, kind, wrap in [(Completions, "llm", _wrap_create), (AsyncCompletions, "llm", _wrap_async_create),
+                            (Embeddings, "embedding", _wrap_create), (AsyncEmbeddings, "embedding", _wrap_async_create)]:
+        if not getattr(cls.create, "_traced", False):
+            cls.create = wrap(cls.create, kind)
+            cls.create._traced = True
+
+
+# --- Tools ---
+
+def trace_tools(tools: list) -> list:
+    """
+    Copies of LangChain tools whose calls are recorded as "tool" spans.
+    """
+    from langchain_core.tools import StructuredTool
+
+    def wrap(tool):
+        coroutine = tool.coroutine
+
+        async def traced(runtime=None, **arguments):
+            with span(f"tool {tool.name}", "tool", tool=tool.name, metric_name=tool.name):
+                return await coroutine(runtime=runtime, **arguments)
+
+        return StructuredTool(
+            name=tool.name, description=tool.description, args_schema=tool.args_schema, coroutine=traced,
+            response_format=tool.response_format, metadata=tool.metadata, handle_tool_error=tool.handle_tool_error,
+        )
+
+    return [wrap(tool) if isinstance(tool, StructuredTool) and tool.coroutine is not None else tool for tool in tools]
+
+
+def trace_toolkit(toolkit):
+    """
+    Record the calls of a phi Toolkit's functions (e.g. JiraTools) as "tool" spans, in place.
+    """
+    for name, function in toolkit.functions.items():
+        if function.entrypoint is None:
+            continue
+
+        def wrap(fn, name=name):
+            @functools.wraps(fn)
+            def traced(*args, **kwargs):
+                with span(f"tool {name}", "tool", tool=name, metric_name=name):
+                    return fn(*args, **kwargs)
+            return traced
+
+        function.entrypoint = wrap(function.entrypoint)
+    return toolkit
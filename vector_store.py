@@ -0,0 +1,81 @@
+# vector_store.py
+
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from embedding_cache import CachedBatchEmbedder
+
+load_dotenv()
+
+# "pgvector" (needs the Postgres container) or "local" (in-process, memory-mapped files)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pgvector").lower()
+VECTOR_DB_URL = os.getenv("VECTOR_DB_URL", "postgresql+psycopg://ai:ai@localhost:5532/ai")
+LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR", "vector_store")
+
+# PgVector ANN index: "hnsw", "ivfflat" or "none" (exact scan)
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "hnsw").lower()
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+# candidates kept per search; must be at least the number of documents retrieved
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+# unset: rows / 1000 (sqrt(rows) past a million), recomputed whenever the index is built
+IVF_LISTS = os.getenv("IVF_LISTS")
+IVF_PROBES = int(os.getenv("IVF_PROBES", "10"))
+INDEX_MAINTENANCE_WORK_MEM = os.getenv("VECTOR_INDEX_MAINTENANCE_WORK_MEM", "256MB")
+
+TABLES = ("csv_documents", "csv_documents_confluence")
+
+
+def make_vector_index(table_name):
+    """
+    A fresh index config per table. phi's PgVector default is a single shared
+    HNSW() instance that takes the name of whichever table builds first.
+    """
+    from phi.vectordb.pgvector import HNSW, Ivfflat
+
+    configuration = {"maintenance_work_mem": INDEX_MAINTENANCE_WORK_MEM}
+    if VECTOR_INDEX == "hnsw":
+        return HNSW(name=f"{table_name}_hnsw_index", m=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION,
+                    ef_search=HNSW_EF_SEARCH, configuration=configuration)
+    if VECTOR_INDEX == "ivfflat":
+        return Ivfflat(name=f"{table_name}_ivfflat_index", lists=int(IVF_LISTS or 100), probes=IVF_PROBES,
+                       dynamic_lists=IVF_LISTS is None, configuration=configuration)
+    if VECTOR_INDEX == "none":
+        return None
+    raise RuntimeError(f"Unknown VECTOR_INDEX {VECTOR_INDEX!r}, expected 'hnsw', 'ivfflat' or 'none'")
+
+
+def make_vector_db(table_name):
+    """
+    Vector db for a knowledge base table, using the backend selected by VECTOR_BACKEND.
+    """
+    if VECTOR_BACKEND == "local":
+        from local_vector_db import LocalVectorDb
+
+        return LocalVectorDb(table_name=table_name, directory=LOCAL_VECTOR_DIR, embedder=CachedBatchEmbedder())
+    if VECTOR_BACKEND == "pgvector":
+        from phi.vectordb.pgvector import PgVector
+
+        return PgVector(table_name=table_name, db_url=VECTOR_DB_URL, embedder=CachedBatchEmbedder(),
+                        vector_index=make_vector_index(table_name))
+    raise RuntimeError(f"Unknown VECTOR_BACKEND {VECTOR_BACKEND!r}, expected 'pgvector' or 'local'")
+
+
+def reindex(tables=TABLES):
+    """
+    Drop and rebuild the ANN index of each table, e.g. after changing HNSW_M /
+    HNSW_EF_CONSTRUCTION / IVF_LISTS (search-time settings apply without a rebuild).
+    """
+    for table_name in tables:
+        vector_db = make_vector_db(table_name)
+        if vector_db.exists():
+            print(f"Rebuilding vector index of {table_name}...")
+            vector_db.optimize(force_recreate=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["reindex"]:
+        sys.exit("usage: python vector_store.py reindex [table ...]")
+    reindex(sys.argv[2:] or TABLES)
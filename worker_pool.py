@@ -0,0 +1,193 @@
+# worker_pool.py
+
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class PoolSaturatedError(Exception):
+    """
+    Raised when a request cannot be admitted because every worker is busy
+    and the wait queue is already full.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Worker pool saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class BoundedWorkerPool:
+    """
+    Runs blocking callables (e.g. phi's synchronous Agent.run) on a bounded
+    thread pool so they never block the event loop.
+
+    Admission control counts in-flight requests: at most `max_workers` run at
+    once and at most `max_queue` more may wait for a worker. Anything beyond
+    that is rejected immediately with PoolSaturatedError.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, timeout: float, retry_after: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def admit(self, count: int = 1):
+        """
+        Reserve `count` slots; pair with release(count). Raises PoolSaturatedError if the pool is full.
+        """
+        with self._lock:
+            if self._in_flight + count > self.capacity:
+                raise PoolSaturatedError(self.retry_after)
+            self._in_flight += count
+
+    def release(self, count: int = 1):
+        with self._lock:
+            self._in_flight -= count
+
+    @contextmanager
+    def slot(self):
+        """
+        Reserve one request slot for the duration of the block.
+        Raises PoolSaturatedError if the pool is full.
+        """
+        self.admit()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def execute(self, fn, *args, **kwargs):
+        """
+        Run `fn` on the pool's threads without admission control or timeout.
+        Use inside a `slot()` block when one request fans out to several calls.
+        """
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context (e.g. the current trace span) onto the worker thread
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, lambda: ctx.run(fn, *args, **kwargs))
+
+    async def run(self, fn, *args, timeout: float = None, **kwargs):
+        """
+        Admit the request, run `fn` on a worker thread and wait at most
+        `timeout` seconds (defaults to the pool timeout) for the result.
+
+        A timed-out call keeps its slot until the worker thread actually
+        returns, so admission stays honest about how busy the pool is.
+        """
+        self.admit()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        except Exception:
+            self.release()
+            raise
+        future.add_done_callback(lambda _: self.release())
+        return await asyncio.wait_for(asyncio.wrap_future(future, loop=loop), timeout or self.timeout)
+
+    def lease(self, count: int = 1) -> "Lease":
+        """
+        Admit a request that fans out to up to `count` concurrent calls.
+        Raises PoolSaturatedError if the pool is full.
+        """
+        count = max(1, min(count, self.capacity))
+        self.admit(count)
+        return Lease(self, count)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Lease:
+    """
+    Admission for one request that runs several calls on a BoundedWorkerPool,
+    e.g. the specialists of a team query and then its synthesis step.
+
+    The lease holds `count` slots. When it is closed, the slots of calls
+    that are still running stay taken until their worker thread actually
+    returns. A call past its deadline (asyncio.wait_for does not stop the
+    thread) therefore keeps counting against admission.
+    """
+
+    def __init__(self, pool: BoundedWorkerPool, count: int):
+        self.pool = pool
+        self.timeout = pool.timeout
+        self._lock = threading.Lock()
+        self._held = count
+        self._running = 0
+        self._closed = False
+
+    async def execute(self, fn, *args, **kwargs):
+        """
+        Run `fn` on the pool's threads under this lease's admission.
+        """
+        with self._lock:
+            self._running += 1
+        try:
+            future = self.pool._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        except Exception:
+            self._call_done()
+            raise
+        future.add_done_callback(self._call_done)
+        return await asyncio.wrap_future(future, loop=asyncio.get_running_loop())
+
+    def _call_done(self, *_):
+        with self._lock:
+            self._running -= 1
+            free = self._closed and self._held > self._running
+            if free:
+                self._held -= 1
+        if free:
+            self.pool.release()
+
+    def close(self):
+        """
+        Release the slots not taken by a still-running call; idempotent.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            free = max(0, self._held - self._running)
+            self._held -= free
+        if free:
+            self.pool.release(free)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def make_pool_from_env(name: str, prefix: str, slots_per_request: int = 1) -> BoundedWorkerPool:
+    """
+    Build a pool configured through <PREFIX>_WORKERS, <PREFIX>_QUEUE_DEPTH,
+    <PREFIX>_TIMEOUT_SECONDS and <PREFIX>_RETRY_AFTER_SECONDS.
+
+    Workers and queue depth count slots. Their defaults are sized in requests
+    (4 running, 8 waiting) of `slots_per_request` slots each, so a request
+    that leases several slots does not shrink the default concurrency.
+    """
+    return BoundedWorkerPool(
+        name=name,
+        max_workers=int(os.getenv(f"{prefix}_WORKERS", str(4 * slots_per_request))),
+        max_queue=int(os.getenv(f"{prefix}_QUEUE_DEPTH", str(8 * slots_per_request))),
+        timeout=float(os.getenv(f"{prefix}_TIMEOUT_SECONDS", "180")),
+        retry_after=int(os.getenv(f"{prefix}_RETRY_AFTER_SECONDS", "30")),
+    )